@@ -0,0 +1,220 @@
+import os
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+import catalog
+
+# Root folder of the shared cache: one dataset per ticker/interval lives under <root>/bars and is
+# registered in the catalog at <root>/catalog.sqlite
+DEFAULT_CACHE_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+
+# DataFrame column -> (file name, dtype) for the columnar layout
+COLUMNS = {
+    'Open': ('open', np.float64),
+    'High': ('high', np.float64),
+    'Low': ('low', np.float64),
+    'Close': ('close', np.float64),
+    'Adj Close': ('adj_close', np.float64),
+    'Volume': ('volume', np.int64),
+}
+
+TIMESTAMP_FILE = 'timestamp'
+
+
+def bars_path(ticker, interval, root=DEFAULT_CACHE_ROOT):
+    """Return the folder holding the dataset for a ticker and interval."""
+    return os.path.join(root, 'bars', interval, ticker)
+
+
+def index_name(interval):
+    """Return the index name yfinance uses for the interval ('Date' for daily bars and up)."""
+    return 'Datetime' if interval[-1] in ('m', 'h') else 'Date'
+
+
+def to_epoch_ns(values):
+    """Convert datetimes (naive values are taken as UTC) to int64 epoch nanoseconds."""
+    if values is None:
+        return None
+    index = pd.DatetimeIndex(pd.to_datetime(values, utc=True))
+    return index.as_unit('ns').asi8
+
+
+def column_files(columns):
+    """Return the file names of a dataset with the given columns, timestamp first."""
+    return [f"{TIMESTAMP_FILE}.npy"] + [f"{COLUMNS[column][0]}.npy" for column in columns]
+
+
+def dataset_checksum(folder, columns):
+    """Return the SHA-1 of the column files of a dataset."""
+    digest = hashlib.sha1()
+    for file_name in column_files(columns):
+        with open(os.path.join(folder, file_name), 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _save_array(folder, name, values):
+    """Write one column atomically so readers never see a half-written file."""
+    tmp_path = os.path.join(folder, f"{name}.tmp.npy")
+    np.save(tmp_path, values)
+    os.replace(tmp_path, os.path.join(folder, f"{name}.npy"))
+
+
+def save_bars(ticker, interval, tickerData, start=None, end=None, root=DEFAULT_CACHE_ROOT):
+    """Store the bars of a ticker/interval as typed column files and register them in the catalog,
+    replacing any previous dataset.
+
+    Args:
+        ticker (str): The ticker symbol.
+        interval (str): The bar interval, e.g. '15m' or '1d'.
+        tickerData (pd.DataFrame): OHLCV bars indexed by datetime.
+        start, end: The window that was requested from the provider. Defaults to the first and last bar.
+        root (str): The cache root.
+    """
+    folder = bars_path(ticker, interval, root)
+    os.makedirs(folder, exist_ok=True)
+
+    tickerData = tickerData[~tickerData.index.duplicated(keep='last')].sort_index()
+    timestamps = to_epoch_ns(tickerData.index)
+    _save_array(folder, TIMESTAMP_FILE, timestamps)
+
+    columns = []
+    for column, (name, dtype) in COLUMNS.items():
+        if column not in tickerData.columns:
+            continue
+        values = tickerData[column]
+        if dtype is np.int64:
+            values = values.fillna(0)
+        _save_array(folder, name, values.to_numpy(dtype=dtype))
+        columns.append(column)
+
+    first = int(timestamps[0]) if len(timestamps) else None
+    last = int(timestamps[-1]) if len(timestamps) else None
+    # The catalog records the bars held and the window the provider has been asked for
+    catalog.upsert(root, {
+        'ticker': ticker,
+        'interval': interval,
+        'first': first,
+        'last': last,
+        'rows': len(tickerData),
+        'start': int(to_epoch_ns([start])[0]) if start is not None else first,
+        'end': int(to_epoch_ns([end])[0]) if end is not None else last,
+        'columns': columns,
+        'path': os.path.relpath(folder, root),
+        'checksum': dataset_checksum(folder, columns),
+    })
+
+    logging.info(f"{ticker}: Stored {len(tickerData)} {interval} bars in {folder}")
+
+
+def merge_bars(ticker, interval, tickerData, start, end, root=DEFAULT_CACHE_ROOT):
+    """Merge newly downloaded bars into the stored dataset and extend its coverage to start..end.
+
+    Bars already in the store are replaced by downloaded bars with the same timestamp, so a bar
+    that was still forming when it was cached gets refreshed.
+    """
+    meta = load_meta(ticker, interval, root)
+    start_ns, end_ns = to_epoch_ns([start, end])
+
+    if not tickerData.empty:
+        tickerData = tickerData.copy()
+        tickerData.index = pd.to_datetime(tickerData.index, utc=True)
+
+    if meta is not None:
+        storedData = load_bars(ticker, interval, root=root)
+        if tickerData.empty:
+            tickerData = storedData
+        elif not storedData.empty:
+            tickerData = pd.concat([storedData, tickerData])
+        start_ns = min(start_ns, meta['start'])
+        end_ns = max(end_ns, meta['end'])
+
+    save_bars(ticker, interval, tickerData, start=start_ns, end=end_ns, root=root)
+
+
+def load_meta(ticker, interval, root=DEFAULT_CACHE_ROOT):
+    """Return the catalog entry of a stored dataset, or None if it does not exist."""
+    return catalog.lookup(root, ticker, interval)
+
+
+def load_many_meta(tickers, interval, root=DEFAULT_CACHE_ROOT):
+    """Return {ticker: catalog entry} for the stored datasets of an interval, in one catalog query."""
+    return catalog.lookup_many(root, tickers, interval)
+
+
+def missing_ranges(meta, start, end):
+    """Return the (start, end) windows in epoch ns that still have to be downloaded to cover start..end.
+
+    Only the bars before the first requested start and after the last cached bar are missing. The
+    last cached bar is fetched again since it may have been cached before it closed. Nothing past
+    the current time is ever considered missing.
+
+    merge_bars records the stored coverage as one span, so the missing windows always join it: a
+    request starting after the cached end also fetches the bars in between.
+    """
+    start_ns, end_ns = to_epoch_ns([start, end])
+    end_ns = min(end_ns, pd.Timestamp.now(tz='UTC').value)
+    if meta is None:
+        return [(start_ns, end_ns)] if start_ns < end_ns else []
+
+    ranges = []
+    if start_ns < meta['start']:
+        ranges.append((start_ns, meta['start']))
+    if end_ns > meta['end']:
+        tail_start = meta['last'] if meta['last'] is not None else meta['end']
+        ranges.append((tail_start, end_ns))
+    return ranges
+
+
+def load_arrays(ticker, interval, start=None, end=None, root=DEFAULT_CACHE_ROOT, mmap=False, meta=None):
+    """Load the stored columns of a ticker/interval as NumPy arrays.
+
+    Args:
+        start, end: Optional window; bars with start <= timestamp < end are returned.
+        mmap (bool): Memory-map the column files instead of reading them.
+        meta (dict): The catalog entry, if it was already looked up.
+
+    Returns:
+        dict: 'timestamp' (int64 epoch ns, UTC) plus one array per stored column,
+              or None if nothing is stored.
+    """
+    if meta is None:
+        meta = load_meta(ticker, interval, root)
+        if meta is None:
+            return None
+
+    folder = os.path.join(root, meta['path'])
+    mmap_mode = 'r' if mmap else None
+    timestamps = np.load(os.path.join(folder, f"{TIMESTAMP_FILE}.npy"), mmap_mode=mmap_mode)
+
+    first, last = 0, len(timestamps)
+    if start is not None:
+        first = np.searchsorted(timestamps, to_epoch_ns([start])[0], side='left')
+    if end is not None:
+        last = np.searchsorted(timestamps, to_epoch_ns([end])[0], side='left')
+
+    arrays = {'timestamp': timestamps[first:last]}
+    for column in meta['columns']:
+        name = COLUMNS[column][0]
+        arrays[column] = np.load(os.path.join(folder, f"{name}.npy"), mmap_mode=mmap_mode)[first:last]
+    return arrays
+
+
+def arrays_to_frame(arrays, interval):
+    """Build an OHLCV DataFrame with a UTC DatetimeIndex from loaded arrays."""
+    index = pd.DatetimeIndex(pd.to_datetime(np.asarray(arrays['timestamp']), unit='ns', utc=True), name=index_name(interval))
+    data = {column: np.asarray(values) for column, values in arrays.items() if column != 'timestamp'}
+    return pd.DataFrame(data, index=index)
+
+
+def load_bars(ticker, interval, start=None, end=None, root=DEFAULT_CACHE_ROOT):
+    """Load stored bars as a DataFrame, optionally sliced to start <= timestamp < end.
+
+    Returns None if the ticker/interval is not stored.
+    """
+    arrays = load_arrays(ticker, interval, start, end, root)
+    if arrays is None:
+        return None
+    return arrays_to_frame(arrays, interval)
@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import sqlite3
+
+CATALOG_FILE = 'catalog.sqlite'
+
+# Catalog columns in the order of the dataset dicts returned by the lookups
+FIELDS = ('ticker', 'interval', 'first', 'last', 'rows', 'start', 'end', 'columns', 'path', 'checksum', 'updated_at')
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+
+def connect(root):
+    """Open the catalog of a cache root, creating it if needed."""
+    os.makedirs(root, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(root, CATALOG_FILE), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS datasets ("
+                 "ticker TEXT NOT NULL, interval TEXT NOT NULL, "
+                 "first_ts INTEGER, last_ts INTEGER, rows INTEGER NOT NULL, "
+                 "start_ts INTEGER, end_ts INTEGER, columns TEXT NOT NULL, "
+                 "path TEXT NOT NULL, checksum TEXT NOT NULL, updated_at REAL NOT NULL, "
+                 "PRIMARY KEY (ticker, interval))")
+    return conn
+
+
+def _to_dataset(row):
+    dataset = dict(zip(FIELDS, row))
+    dataset['columns'] = json.loads(dataset['columns'])
+    return dataset
+
+
+_SELECT = ("SELECT ticker, interval, first_ts, last_ts, rows, start_ts, end_ts, columns, path, checksum, updated_at "
+           "FROM datasets")
+
+
+def upsert(root, dataset):
+    """Insert or replace the catalog entry of a dataset (a dict with the keys in FIELDS)."""
+    conn = connect(root)
+    try:
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         (dataset['ticker'], dataset['interval'], dataset['first'], dataset['last'], dataset['rows'],
+                          dataset['start'], dataset['end'], json.dumps(dataset['columns']), dataset['path'],
+                          dataset['checksum'], dataset.get('updated_at', time.time())))
+    finally:
+        conn.close()
+
+
+def remove(root, ticker, interval):
+    """Remove the catalog entry of a dataset."""
+    conn = connect(root)
+    try:
+        with conn:
+            conn.execute("DELETE FROM datasets WHERE ticker = ? AND interval = ?", (ticker, interval))
+    finally:
+        conn.close()
+
+
+def lookup(root, ticker, interval):
+    """Return the catalog entry of a dataset, or None if it is not cataloged."""
+    if not os.path.exists(os.path.join(root, CATALOG_FILE)):
+        return None
+    conn = connect(root)
+    try:
+        row = conn.execute(f"{_SELECT} WHERE ticker = ? AND interval = ?", (ticker, interval)).fetchone()
+    finally:
+        conn.close()
+    return _to_dataset(row) if row else None
+
+
+def lookup_many(root, tickers, interval):
+    """Return {ticker: catalog entry} for the cataloged tickers of an interval."""
+    if not os.path.exists(os.path.join(root, CATALOG_FILE)):
+        return {}
+    tickers = list(tickers)
+    datasets = {}
+    conn = connect(root)
+    try:
+        for i in range(0, len(tickers), _QUERY_CHUNK):
+            chunk = tickers[i:i + _QUERY_CHUNK]
+            rows = conn.execute(f"{_SELECT} WHERE interval = ? AND ticker IN ({','.join('?' * len(chunk))})",
+                                [interval] + chunk)
+            for row in rows:
+                datasets[row[0]] = _to_dataset(row)
+    finally:
+        conn.close()
+    return datasets
+
+
+def entries(root, interval=None):
+    """Return all catalog entries, optionally only those of one interval."""
+    if not os.path.exists(os.path.join(root, CATALOG_FILE)):
+        return []
+    conn = connect(root)
+    try:
+        if interval is None:
+            rows = conn.execute(f"{_SELECT} ORDER BY interval, ticker").fetchall()
+        else:
+            rows = conn.execute(f"{_SELECT} WHERE interval = ? ORDER BY ticker", (interval,)).fetchall()
+    finally:
+        conn.close()
+    return [_to_dataset(row) for row in rows]
@@ -0,0 +1,186 @@
+"""Compact the bar cache.
+
+Imports the legacy per-run CSV caches (data/, chart_data/, sector_analysis/sector_data/input and
+sector_analysis/sector_data/data) into the bar store, merging files that hold the same ticker and
+interval, and deletes them. Inside the cache root it drops datasets whose files no longer match
+their catalog checksum, registers dataset folders missing from the catalog, removes catalog
+entries without files and deletes intraday datasets fully covered by the 15m bars they can be
+resampled from.
+
+Usage: python compact_cache.py [--dry-run] [--keep-legacy]
+"""
+import os
+import re
+import glob
+import shutil
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+import catalog
+from bar_store import DEFAULT_CACHE_ROOT, COLUMNS, TIMESTAMP_FILE, bars_path, column_files, dataset_checksum, \
+    load_bars, save_bars, to_epoch_ns
+from resample import can_resample
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Folders the scanners used to write their CSV caches to
+LEGACY_FOLDERS = [
+    'data',
+    'chart_data',
+    os.path.join('sector_analysis', 'sector_data', 'input'),
+    os.path.join('sector_analysis', 'sector_data', 'data'),
+]
+
+# {ticker}_data_{start}_{end}_{interval}.csv, and step1's daily {ticker}_{start}_{end}.csv
+LEGACY_PATTERNS = [
+    re.compile(r'^(?P<ticker>.+)_data_(?P<start>\d{8})_(?P<end>\d{8})_(?P<interval>\w+)\.csv$'),
+    re.compile(r'^(?P<ticker>.+)_(?P<start>\d{8})_(?P<end>\d{8})\.csv$'),
+]
+
+# Intraday datasets that are redundant once the 15m bars cover them
+BASE_INTERVAL = '15m'
+
+
+def find_legacy_files(project_root=PROJECT_ROOT):
+    """Return {(ticker, interval): [(start, path), ...]} for the legacy CSV caches."""
+    files = {}
+    for folder in LEGACY_FOLDERS:
+        for path in glob.glob(os.path.join(project_root, folder, '*.csv')):
+            for pattern in LEGACY_PATTERNS:
+                match = pattern.match(os.path.basename(path))
+                if match:
+                    interval = match.groupdict().get('interval') or '1d'
+                    start = pd.Timestamp(match.group('start'))
+                    files.setdefault((match.group('ticker'), interval), []).append((start, path))
+                    break
+    return files
+
+
+def read_legacy_csv(path):
+    """Read a legacy CSV cache, whatever its index column is called."""
+    tickerData = pd.read_csv(path, index_col=0)
+    tickerData.index = pd.to_datetime(tickerData.index, utc=True)
+    return tickerData[[column for column in COLUMNS if column in tickerData.columns]].dropna(how='all')
+
+
+def import_legacy(ticker, interval, files, dry_run=False, root=DEFAULT_CACHE_ROOT):
+    """Merge the legacy files of a ticker/interval into the store.
+
+    Coverage only extends back to the start of the latest run of overlapping windows, so a gap
+    between two files is downloaded again when it is requested. Where files overlap the later one
+    wins, and bars already in the store win over all of them: a legacy file may have been saved
+    mid-bar.
+    """
+    frames = []
+    windows = []
+    for start, path in sorted(files):
+        tickerData = read_legacy_csv(path)
+        if tickerData.empty:
+            continue
+        frames.append(tickerData)
+        windows.append((int(to_epoch_ns([start])[0]), int(to_epoch_ns([tickerData.index[-1]])[0])))
+
+    # save_bars keeps the last of duplicated bars, so the stored frame goes last
+    existing = catalog.lookup(root, ticker, interval)
+    if existing is not None and existing['rows']:
+        frames.append(load_bars(ticker, interval, root=root))
+        windows.append((existing['start'], existing['end']))
+
+    if not frames:
+        return
+    windows.sort()
+    coverage_start, coverage_end = windows[0]
+    for window_start, window_end in windows[1:]:
+        if window_start > coverage_end:
+            coverage_start = window_start
+        coverage_end = max(coverage_end, window_end)
+
+    merged = pd.concat(frames)
+    logging.info(f"{ticker} {interval}: Merging {len(files)} legacy files into {merged.index.nunique()} bars")
+    if not dry_run:
+        save_bars(ticker, interval, merged, start=coverage_start, end=coverage_end, root=root)
+
+
+def register_folder(folder, ticker, interval, dry_run=False, root=DEFAULT_CACHE_ROOT):
+    """Catalog a dataset folder that has column files but no catalog entry."""
+    columns = [column for column, (name, _) in COLUMNS.items() if os.path.exists(os.path.join(folder, f"{name}.npy"))]
+    timestamps = np.load(os.path.join(folder, f"{TIMESTAMP_FILE}.npy"))
+    first = int(timestamps[0]) if len(timestamps) else None
+    last = int(timestamps[-1]) if len(timestamps) else None
+
+    logging.info(f"{ticker} {interval}: Registering uncataloged dataset")
+    if dry_run:
+        return
+    catalog.upsert(root, {
+        'ticker': ticker, 'interval': interval, 'first': first, 'last': last, 'rows': len(timestamps),
+        'start': first, 'end': last, 'columns': columns, 'path': os.path.relpath(folder, root),
+        'checksum': dataset_checksum(folder, columns),
+    })
+
+
+def drop_dataset(ticker, interval, reason, dry_run=False, root=DEFAULT_CACHE_ROOT):
+    """Delete a dataset and its catalog entry."""
+    logging.info(f"{ticker} {interval}: Deleting dataset ({reason})")
+    if dry_run:
+        return
+    shutil.rmtree(bars_path(ticker, interval, root), ignore_errors=True)
+    catalog.remove(root, ticker, interval)
+
+
+def compact_store(dry_run=False, root=DEFAULT_CACHE_ROOT):
+    """Check the cataloged datasets against their files and drop redundant ones."""
+    datasets = {(dataset['ticker'], dataset['interval']): dataset for dataset in catalog.entries(root)}
+
+    for (ticker, interval), dataset in datasets.items():
+        folder = os.path.join(root, dataset['path'])
+        if not all(os.path.exists(os.path.join(folder, name)) for name in column_files(dataset['columns'])):
+            drop_dataset(ticker, interval, 'files missing', dry_run, root)
+        elif dataset_checksum(folder, dataset['columns']) != dataset['checksum']:
+            drop_dataset(ticker, interval, 'checksum mismatch', dry_run, root)
+        else:
+            base = datasets.get((ticker, BASE_INTERVAL))
+            if (base is not None and interval != BASE_INTERVAL and interval[-1] in ('m', 'h')
+                    and can_resample(BASE_INTERVAL, interval) and base['start'] <= dataset['start']
+                    and base['end'] >= dataset['end']):
+                drop_dataset(ticker, interval, f"covered by {BASE_INTERVAL} bars", dry_run, root)
+
+    for path in glob.glob(os.path.join(root, 'bars', '*', '*', '*.tmp.npy')):
+        logging.info(f"Deleting unfinished write {path}")
+        if not dry_run:
+            os.remove(path)
+
+    for folder in glob.glob(os.path.join(root, 'bars', '*', '*')):
+        interval = os.path.basename(os.path.dirname(folder))
+        ticker = os.path.basename(folder)
+        if (ticker, interval) not in datasets and os.path.exists(os.path.join(folder, f"{TIMESTAMP_FILE}.npy")):
+            register_folder(folder, ticker, interval, dry_run, root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merge the legacy CSV caches into the bar store and compact it.')
+    parser.add_argument('--dry-run', action='store_true', help='only log what would be done')
+    parser.add_argument('--keep-legacy', action='store_true', help='do not delete the imported CSV files')
+    parser.add_argument('--root', default=DEFAULT_CACHE_ROOT, help='cache root')
+    args = parser.parse_args()
+
+    compact_store(args.dry_run, args.root)
+
+    for (ticker, interval), files in find_legacy_files().items():
+        try:
+            import_legacy(ticker, interval, files, args.dry_run, args.root)
+        except Exception as e:
+            logging.error(f"{ticker} {interval}: Could not import legacy files: {e}")
+            continue
+        if not args.dry_run and not args.keep_legacy:
+            for _, path in files:
+                os.remove(path)
+
+    logging.info("Cache compaction completed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+import time
+import random
+import zlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+# yf.download keeps per-call state in module globals, so multi-ticker calls must not overlap
+_download_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing `rate` requests per second with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it."""
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class YFinanceProvider:
+    """Download bars from Yahoo Finance.
+
+    download() returns ({ticker: DataFrame}, {ticker: error message}) for the requested tickers.
+    """
+
+    def download(self, tickers, start, end, interval):
+        if len(tickers) == 1:
+            return self._download_one(tickers[0], start, end, interval)
+
+        with _download_lock:
+            data = yf.download(tickers, start=start, end=end, interval=interval, group_by='ticker', progress=False)
+            errors = {ticker: str(error) for ticker, error in getattr(yf.shared, '_ERRORS', {}).items() if ticker in tickers}
+
+        if not isinstance(data.columns, pd.MultiIndex):
+            return {tickers[0]: data}, errors
+
+        frames = {}
+        available = set(data.columns.get_level_values(0))
+        for ticker in tickers:
+            if ticker in errors:
+                continue
+            frames[ticker] = data[ticker].dropna(how='all') if ticker in available else pd.DataFrame()
+        return frames, errors
+
+    def _download_one(self, ticker, start, end, interval):
+        """Download a single ticker; Ticker.history keeps no shared state so it can run concurrently."""
+        try:
+            data = yf.Ticker(ticker).history(start=start, end=end, interval=interval, auto_adjust=False,
+                                             actions=False, raise_errors=True)
+        except Exception as e:
+            return {}, {ticker: str(e)}
+
+        if interval[-1] not in ('m', 'h') and data.index.tz is not None:
+            # Match yf.download, which returns daily bars with naive dates
+            data.index = data.index.tz_localize(None)
+        return {ticker: data}, {}
+
+
+class StubProvider:
+    """Offline provider serving deterministic synthetic NSE bars, for exercising the fetch engine
+    without network access.
+
+    Args:
+        latency (float): Seconds each download call sleeps.
+        error_rate (float): Probability that a whole call raises ConnectionError.
+        fail_tickers (dict): {ticker: number of calls that report an error for it before it succeeds},
+                             use None as the count to fail it on every call.
+        seed (int): Seed for the injected errors.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, fail_tickers=None, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.fail_tickers = dict(fail_tickers or {})
+        self.random = random.Random(seed)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def download(self, tickers, start, end, interval):
+        time.sleep(self.latency)
+        with self.lock:
+            self.calls.append((list(tickers), start, end, interval))
+            if self.random.random() < self.error_rate:
+                raise ConnectionError("Injected provider error")
+
+            errors = {}
+            for ticker in tickers:
+                if ticker in self.fail_tickers:
+                    remaining = self.fail_tickers[ticker]
+                    if remaining is None or remaining > 0:
+                        errors[ticker] = "Injected ticker error"
+                        if remaining is not None:
+                            self.fail_tickers[ticker] = remaining - 1
+
+        frames = {ticker: self.bars(ticker, start, end, interval) for ticker in tickers if ticker not in errors}
+        return frames, errors
+
+    @staticmethod
+    def bars(ticker, start, end, interval):
+        """Generate bars during NSE sessions (09:15-15:30 IST on weekdays); prices only depend on the
+        ticker and timestamp so overlapping downloads agree."""
+        start = pd.Timestamp(start)
+        end = pd.Timestamp(end)
+        start = start.tz_localize('UTC') if start.tzinfo is None else start.tz_convert('UTC')
+        end = end.tz_localize('UTC') if end.tzinfo is None else end.tz_convert('UTC')
+
+        if interval[-1] in ('m', 'h'):
+            step = pd.Timedelta(interval.replace('m', 'min'))
+            days = pd.date_range(start.tz_convert('Asia/Kolkata').normalize(), end.tz_convert('Asia/Kolkata'), freq='B')
+            bars_per_day = int(np.ceil(pd.Timedelta(hours=6, minutes=15) / step))
+            index = (days.repeat(bars_per_day) + pd.Timedelta(hours=9, minutes=15)
+                     + pd.TimedeltaIndex(np.tile(np.arange(bars_per_day), len(days)) * step))
+            index = index[(index >= start) & (index < end)]
+        else:
+            index = pd.date_range(start.tz_localize(None).normalize(), end.tz_localize(None), freq='B')
+            index = index[(index >= start.tz_localize(None)) & (index < end.tz_localize(None))]
+
+        seconds = pd.DatetimeIndex(index).as_unit('s').asi8 if len(index) else np.array([], dtype=np.int64)
+        seed = zlib.crc32(ticker.encode()) % 1000
+        noise = ((seconds * 2654435761 + seed) % 10007) / 10007.0
+        base = 100 + seed / 10 + 10 * np.sin(seconds / 86400 / 20 + seed)
+        open_ = base + noise - 0.5
+        close = base - noise + 0.5
+        high = np.maximum(open_, close) + noise
+        low = np.minimum(open_, close) - (1 - noise)
+        return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Adj Close': close,
+                             'Volume': (1000 + noise * 100000).astype(np.int64)},
+                            index=pd.DatetimeIndex(index, name='Datetime' if interval[-1] in ('m', 'h') else 'Date'))
+
+
+class FetchReport:
+    """Outcome of a FetchEngine run."""
+
+    def __init__(self):
+        self.succeeded = []
+        self.failures = {}
+        self.requests = 0
+        self.elapsed = 0.0
+
+    def log(self):
+        """Log a summary line and one warning per failed ticker."""
+        logging.info(f"Fetched {len(self.succeeded)} tickers in {self.requests} requests ({self.elapsed:.1f}s), "
+                     f"{len(self.failures)} failed")
+        for ticker, error in self.failures.items():
+            logging.warning(f"{ticker}: Download failed: {error}")
+
+
+class FetchEngine:
+    """Run download requests on a bounded thread pool behind a token-bucket rate limiter, retrying
+    failed tickers with exponential backoff.
+
+    Args:
+        provider: Object with download(tickers, start, end, interval). Defaults to YFinanceProvider.
+        max_workers (int): Number of requests in flight.
+        rate (float): Requests per second allowed by the rate limiter (0 disables it).
+        burst (int): Number of requests that may be sent back to back.
+        retries (int): Retries per ticker after the first attempt.
+        backoff (float): Delay before the first retry; doubled for every further retry.
+        max_backoff (float): Upper bound for the retry delay.
+    """
+
+    def __init__(self, provider=None, max_workers=8, rate=2.0, burst=4, retries=3, backoff=1.0, max_backoff=30.0):
+        self.provider = provider or YFinanceProvider()
+        self.max_workers = max_workers
+        self.rate_limiter = TokenBucket(rate, burst)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def _fetch(self, tickers, start, end, interval):
+        """Download one request, retrying only the tickers that failed."""
+        frames = {}
+        errors = {}
+        pending = list(tickers)
+        requests = 0
+        for attempt in range(self.retries + 1):
+            if attempt:
+                delay = min(self.backoff * 2 ** (attempt - 1), self.max_backoff)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+
+            self.rate_limiter.acquire()
+            requests += 1
+            try:
+                result, errors = self.provider.download(pending, start, end, interval)
+            except Exception as e:
+                result, errors = {}, {ticker: f"{type(e).__name__}: {e}" for ticker in pending}
+
+            frames.update(result)
+            pending = [ticker for ticker in pending if ticker in errors]
+            if not pending:
+                break
+            logging.info(f"Attempt {attempt + 1} failed for {len(pending)} tickers")
+
+        return frames, {ticker: errors[ticker] for ticker in pending}, requests
+
+    def run(self, requests, interval, handle):
+        """Execute (tickers, start, end) requests concurrently.
+
+        handle(ticker, tickerData, start, end) is called from the calling thread for every ticker
+        that was downloaded, so it may write to the bar store without locking.
+
+        Returns:
+            FetchReport: The downloaded and failed tickers.
+        """
+        report = FetchReport()
+        started = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self._fetch, tickers, start, end, interval): (start, end)
+                       for tickers, start, end in requests}
+            for future in as_completed(futures):
+                start, end = futures[future]
+                frames, failures, count = future.result()
+                report.requests += count
+                report.failures.update(failures)
+                for ticker, tickerData in frames.items():
+                    handle(ticker, tickerData, start, end)
+                    report.succeeded.append(ticker)
+
+        report.elapsed = time.monotonic() - started
+        return report
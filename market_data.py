@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+from bar_store import DEFAULT_CACHE_ROOT, index_name, load_arrays, load_meta, load_many_meta, merge_bars, missing_ranges, to_epoch_ns
+from fetch_engine import FetchEngine
+from resample import can_resample, resample_arrays
+
+# Number of tickers requested from yfinance in one call
+DEFAULT_CHUNK_SIZE = 50
+
+# Coarser intervals are built locally from cached bars of this interval instead of being downloaded
+BASE_INTERVAL = '15m'
+
+# Yahoo only serves 15m bars for the last 60 days
+BASE_HISTORY = pd.Timedelta(days=59)
+
+# Timezone of the frames handed to the scanners
+MARKET_TZ = 'Asia/Kolkata'
+
+# Engine shared by all downloads of a process so the rate limit holds across calls
+_default_engine = None
+
+
+def default_engine():
+    """Return the process-wide FetchEngine, creating it on first use."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = FetchEngine()
+    return _default_engine
+
+
+def update_many_bars(tickers, interval, start, end, chunk_size=DEFAULT_CHUNK_SIZE, engine=None, root=DEFAULT_CACHE_ROOT):
+    """Download the bars missing from the bar store for many tickers, chunk_size tickers per request.
+
+    Missing windows are sorted by their start so tickers needing a similar delta share a request;
+    each request covers the union of the windows of its tickers. Tickers that still fail after the
+    engine's retries keep their previous coverage, so the next run asks for them again.
+
+    Returns:
+        FetchReport: The downloaded and failed tickers.
+    """
+    metas = load_many_meta(tickers, interval, root)
+    jobs = []
+    for ticker in tickers:
+        for range_start, range_end in missing_ranges(metas.get(ticker), start, end):
+            jobs.append((range_start, range_end, ticker))
+    jobs.sort()
+
+    requests = []
+    for i in range(0, len(jobs), chunk_size):
+        chunk = jobs[i:i + chunk_size]
+        chunk_start = pd.Timestamp(min(job[0] for job in chunk), tz='UTC')
+        chunk_end = pd.Timestamp(max(job[1] for job in chunk), tz='UTC')
+        requests.append((list(dict.fromkeys(job[2] for job in chunk)), chunk_start, chunk_end))
+
+    def store(ticker, tickerData, range_start, range_end):
+        merge_bars(ticker, interval, tickerData.round(2), range_start, range_end, root=root)
+
+    engine = engine or default_engine()
+    report = engine.run(requests, interval, store)
+    if requests:
+        report.log()
+    return report
+
+
+def update_bars(ticker, interval, start, end, engine=None, root=DEFAULT_CACHE_ROOT):
+    """Download only the bars missing from the bar store for start..end and merge them into it."""
+    return update_many_bars([ticker], interval, start, end, chunk_size=1, engine=engine, root=root)
+
+
+def source_interval(ticker, interval, start, root=DEFAULT_CACHE_ROOT):
+    """Return the interval to download in order to serve `interval` bars from start.
+
+    This is BASE_INTERVAL when the bars can be resampled from it and 15m bars from start are either
+    still served by the provider or already cached; otherwise the interval itself.
+    """
+    if interval == BASE_INTERVAL or not can_resample(BASE_INTERVAL, interval):
+        return interval
+
+    start_ns = to_epoch_ns([start])[0]
+    if start_ns >= (pd.Timestamp.now(tz='UTC') - BASE_HISTORY).value:
+        return BASE_INTERVAL
+
+    meta = load_meta(ticker, BASE_INTERVAL, root)
+    if meta is not None and meta['start'] <= start_ns:
+        return BASE_INTERVAL
+    return interval
+
+
+def market_index(timestamps, interval):
+    """Build the canonical index for UTC epoch-ns bar timestamps: tz-aware in MARKET_TZ.
+
+    Intraday bars keep their instant; daily bars, stored at 00:00 UTC of their trading date, are
+    labelled with midnight of that date in MARKET_TZ.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if interval[-1] in ('m', 'h'):
+        index = pd.DatetimeIndex(timestamps.view('M8[ns]')).tz_localize('UTC').tz_convert(MARKET_TZ)
+    else:
+        index = pd.DatetimeIndex(timestamps.view('M8[ns]')).tz_localize(MARKET_TZ)
+    return index.rename(index_name(interval))
+
+
+def load_window(ticker, interval, source, start, end, root=DEFAULT_CACHE_ROOT, mmap=False):
+    """Load the bars for start <= timestamp < end, resampling them from `source` bars if needed.
+
+    With mmap the column files are memory-mapped, so only the pages of the window are read.
+    """
+    arrays = load_arrays(ticker, source, start, end, root, mmap=mmap)
+    if arrays is None:
+        return pd.DataFrame()
+
+    if source != interval:
+        arrays = resample_arrays(arrays, interval)
+        # A bar that started before the window is only partially covered by the source bars
+        keep = arrays['timestamp'] >= to_epoch_ns([start])[0]
+        arrays = {column: values[keep] for column, values in arrays.items()}
+    data = {column: np.asarray(values) for column, values in arrays.items() if column != 'timestamp'}
+    return pd.DataFrame(data, index=market_index(arrays['timestamp'], interval))
+
+
+def get_bars(ticker, interval, start, end, engine=None, root=DEFAULT_CACHE_ROOT):
+    """Return the bars of a ticker for start <= timestamp < end.
+
+    The bar store is keyed by ticker and interval only, so a run downloads just the bars after the
+    last cached one and slices the requested window locally. Coarser bars such as 30m, 1h and 1d are resampled from
+    the 15m bars when those cover the window. The returned DataFrame is the canonical frame the
+    scanners, utils.py and plot_chart work on: a tz-aware Asia/Kolkata DatetimeIndex (daily bars at
+    local midnight), prices rounded to 2 decimals. It is empty if the provider has no data.
+    """
+    source = source_interval(ticker, interval, start, root)
+    update_bars(ticker, source, start, end, engine=engine, root=root)
+    return load_window(ticker, interval, source, start, end, root)
+
+
+def update_sources(tickers, interval, start, end, chunk_size=DEFAULT_CHUNK_SIZE, engine=None, root=DEFAULT_CACHE_ROOT):
+    """Fetch the missing bars needed to serve `interval` bars for start..end in batched requests.
+
+    Returns:
+        dict: {ticker: source interval}, to pass to load_window.
+    """
+    sources = {ticker: source_interval(ticker, interval, start, root) for ticker in tickers}
+    for source in set(sources.values()):
+        source_tickers = [ticker for ticker in tickers if sources[ticker] == source]
+        update_many_bars(source_tickers, source, start, end, chunk_size=chunk_size, engine=engine, root=root)
+    return sources
+
+
+def get_many_bars(tickers, interval, start, end, chunk_size=DEFAULT_CHUNK_SIZE, engine=None, root=DEFAULT_CACHE_ROOT):
+    """Return {ticker: bars for start <= timestamp < end}, fetching the missing bars in batched requests."""
+    sources = update_sources(tickers, interval, start, end, chunk_size=chunk_size, engine=engine, root=root)
+    return {ticker: load_window(ticker, interval, sources[ticker], start, end, root) for ticker in tickers}
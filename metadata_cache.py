@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import yfinance as yf
+from bar_store import DEFAULT_CACHE_ROOT
+from fetch_engine import FetchEngine
+
+# Seconds a cached field stays fresh; fields not listed here use DEFAULT_TTL
+FIELD_TTL = {
+    'marketCap': 24 * 3600,
+    'sharesOutstanding': 7 * 24 * 3600,
+    'sector': 30 * 24 * 3600,
+    'industry': 30 * 24 * 3600,
+    'longName': 30 * 24 * 3600,
+}
+DEFAULT_TTL = 24 * 3600
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_CHUNK = 500
+
+
+class InfoProvider:
+    """Fetch Ticker.info for the FetchEngine; start, end and interval of the provider contract are unused."""
+
+    def download(self, tickers, start, end, interval):
+        infos = {}
+        errors = {}
+        for ticker in tickers:
+            try:
+                infos[ticker] = yf.Ticker(ticker).info
+            except Exception as e:
+                errors[ticker] = str(e)
+        return infos, errors
+
+
+def metadata_path(root=DEFAULT_CACHE_ROOT):
+    """Return the path of the metadata database."""
+    return os.path.join(root, 'metadata.sqlite')
+
+
+def connect(root=DEFAULT_CACHE_ROOT):
+    """Open the metadata database, creating it if needed."""
+    os.makedirs(root, exist_ok=True)
+    conn = sqlite3.connect(metadata_path(root))
+    conn.execute("CREATE TABLE IF NOT EXISTS fundamentals ("
+                 "ticker TEXT NOT NULL, field TEXT NOT NULL, value TEXT, fetched_at REAL NOT NULL, "
+                 "PRIMARY KEY (ticker, field))")
+    return conn
+
+
+def load_fields(conn, tickers, fields):
+    """Return {ticker: {field: (value, fetched_at)}} for the cached fields of the tickers."""
+    cached = {}
+    field_marks = ','.join('?' * len(fields))
+    for i in range(0, len(tickers), _QUERY_CHUNK):
+        chunk = tickers[i:i + _QUERY_CHUNK]
+        rows = conn.execute(f"SELECT ticker, field, value, fetched_at FROM fundamentals "
+                            f"WHERE ticker IN ({','.join('?' * len(chunk))}) AND field IN ({field_marks})",
+                            list(chunk) + list(fields))
+        for ticker, field, value, fetched_at in rows:
+            cached.setdefault(ticker, {})[field] = (json.loads(value), fetched_at)
+    return cached
+
+
+def refresh_fields(tickers, fields, engine=None, root=DEFAULT_CACHE_ROOT):
+    """Fetch .info for the tickers concurrently and store the requested fields.
+
+    A field missing from .info (or None) never replaces a stored value, since throttled calls return
+    partial .info; it is stored as None only if nothing is known yet. Either way its fetched_at is
+    renewed, so it is not requested again before its TTL expires. Tickers whose fetch fails keep
+    their previously stored values.
+
+    Returns:
+        FetchReport: The refreshed and failed tickers.
+    """
+    engine = engine or FetchEngine(InfoProvider())
+    conn = connect(root)
+
+    def store(ticker, info, start, end):
+        fetched_at = time.time()
+        known = [field for field in fields if info.get(field) is not None]
+        conn.executemany("INSERT OR REPLACE INTO fundamentals (ticker, field, value, fetched_at) VALUES (?, ?, ?, ?)",
+                         [(ticker, field, json.dumps(info[field]), fetched_at) for field in known])
+        missing = [field for field in fields if field not in known]
+        conn.executemany("INSERT OR IGNORE INTO fundamentals (ticker, field, value, fetched_at) VALUES (?, ?, ?, ?)",
+                         [(ticker, field, json.dumps(None), fetched_at) for field in missing])
+        conn.executemany("UPDATE fundamentals SET fetched_at = ? WHERE ticker = ? AND field = ?",
+                         [(fetched_at, ticker, field) for field in missing])
+
+    try:
+        report = engine.run([([ticker], None, None) for ticker in tickers], None, store)
+        conn.commit()
+    finally:
+        conn.close()
+    report.log()
+    return report
+
+
+def get_fields(tickers, fields, ttl=None, engine=None, root=DEFAULT_CACHE_ROOT):
+    """Return {ticker: {field: value}} from the metadata cache, refreshing tickers with stale or missing fields.
+
+    Args:
+        tickers (list): Ticker symbols.
+        fields (list): .info keys, e.g. ['marketCap'].
+        ttl (dict): Optional {field: seconds} overriding FIELD_TTL.
+        engine (FetchEngine): Engine used for the refresh. Defaults to one with an InfoProvider.
+
+    Returns:
+        dict: The freshest known value of every field; if a refresh fails the last known value is
+              kept, and fields that were never fetched are left out.
+    """
+    ttl = {**FIELD_TTL, **(ttl or {})}
+    tickers = list(tickers)
+
+    conn = connect(root)
+    try:
+        cached = load_fields(conn, tickers, fields)
+    finally:
+        conn.close()
+
+    now = time.time()
+    stale = [ticker for ticker in tickers
+             if any(field not in cached.get(ticker, {})
+                    or now - cached[ticker][field][1] > ttl.get(field, DEFAULT_TTL) for field in fields)]
+
+    if stale:
+        logging.info(f"Refreshing metadata for {len(stale)} of {len(tickers)} tickers...")
+        refresh_fields(stale, fields, engine=engine, root=root)
+        conn = connect(root)
+        try:
+            cached = load_fields(conn, tickers, fields)
+        finally:
+            conn.close()
+
+    return {ticker: {field: value for field, (value, _) in cached.get(ticker, {}).items()} for ticker in tickers}
+
+
+def get_market_caps(tickers, engine=None, root=DEFAULT_CACHE_ROOT):
+    """Return {ticker: market cap}, with None where the market cap is unknown."""
+    fields = get_fields(tickers, ['marketCap'], engine=engine, root=root)
+    return {ticker: fields[ticker].get('marketCap') for ticker in tickers}
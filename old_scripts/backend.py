@@ -0,0 +1,44 @@
+import os
+import logging
+import importlib
+
+# Kernel backends for the detectors in utils.py. Both modules implement the same array functions
+# (fvg_flags, pivot_positions, bos_events, zone_candidates, zone_candidate_pivots, candle_flags,
+# suffix_extrema, next_breaks, trend_labels) on float64 arrays.
+#
+# The backend is picked by DETECTION_BACKEND ('numpy', 'numba' or 'auto', the default) or by
+# calling use(). 'auto' and 'numba' fall back to NumPy when Numba is not installed.
+BACKENDS = {
+    'numpy': 'kernels',
+    'numba': 'kernels_numba',
+}
+
+_kernels = None
+name = None
+
+
+def use(backend):
+    """Select the kernel backend by name ('numpy', 'numba' or 'auto') and return its module."""
+    global _kernels, name
+    if backend not in BACKENDS and backend != 'auto':
+        raise ValueError(f"Unknown detection backend {backend!r}, expected one of {sorted(BACKENDS)} or 'auto'")
+
+    if backend in ('numba', 'auto'):
+        try:
+            _kernels = importlib.import_module(BACKENDS['numba'])
+            name = 'numba'
+            return _kernels
+        except ImportError:
+            if backend == 'numba':
+                logging.warning("Numba is not installed; using the NumPy detection backend.")
+
+    _kernels = importlib.import_module(BACKENDS['numpy'])
+    name = 'numpy'
+    return _kernels
+
+
+def kernels():
+    """Return the module of the selected backend, selecting it from DETECTION_BACKEND on first use."""
+    if _kernels is None:
+        use(os.environ.get('DETECTION_BACKEND', 'auto'))
+    return _kernels
@@ -0,0 +1,230 @@
+import numpy as np
+import pandas as pd
+import backend
+from kernels import ZONE_OK
+
+# Backtest of the demand/supply trade-tip rule of step5_trade_tips.py over every historical bar.
+#
+# The scanners decide on the last bar only, from zones found on the whole window. Replaying that
+# naively would use zones the market had not formed yet, so every zone gets the bar from which a
+# scan would have seen it: its pivot has been confirmed (`window` bars later), candles_count
+# candles follow it and its bullish (bearish) signal has closed. It stays in force until the first
+# close through it. With those spans the closest zones and the rule are evaluated for all bars with
+# array operations, and signal[t] equals the scan of the bars up to and including t.
+#
+# A signal at the close of bar t enters long at the open of bar t + 1. The stop is the Low of the
+# demand zone and the target one of the calculate_split_lines levels between the demand zone's High
+# and the supply zone's Low. Only one trade per ticker is open at a time.
+
+TRADE_COLUMNS = ['ticker', 'signal_time', 'entry_time', 'entry_price', 'stop', 'target', 'exit_time',
+                 'exit_price', 'exit_reason', 'bars_held', 'pnl', 'return']
+
+DEFAULT_RULES = {
+    'window': 5,                # identify_major_highs_lows
+    'candles_count': 10,        # identify_demand_zones / identify_supply_zones
+    'demand_proximity': 1.05,   # last Low at most this multiple of the closest demand zone's High
+    'supply_proximity': 0.95,   # last High below this multiple of the closest supply zone's Low
+    'target_line': 1,           # exit at the first (1) or second (2) calculate_split_lines level
+    'max_bars': None,           # exit at the close after this many bars in the trade
+}
+
+
+def _next_flagged(flags):
+    """Return, for every position i (and len(flags)), the first position >= i whose flag is set, or len(flags)."""
+    n = len(flags)
+    positions = np.where(flags, np.arange(n), n)
+    return np.append(np.minimum.accumulate(positions[::-1])[::-1], n)
+
+
+def zone_timeline(arrays, kind, pivots, window, candles_count):
+    """Return the zones of one side with the span in which a scan would report them.
+
+    Args:
+        arrays (dict): The ticker's column arrays and candle flags, see scan_signals.
+        pivots (np.ndarray): Major lows for demand zones, major highs for supply zones.
+
+    Returns:
+        tuple: (positions, known_at, invalidated_at) int64 arrays in the detectors' zone order; a
+               zone is in force for known_at <= t < invalidated_at (len of the data if never).
+    """
+    kernels = backend.kernels()
+    close = arrays['close']
+    n = len(close)
+    if kind == 'demand':
+        move, gap = arrays['exciting'] & arrays['bullish'], arrays['bullish_fvg']
+    else:
+        move, gap = arrays['exciting'] & ~arrays['bullish'], arrays['bearish_fvg']
+
+    checked, status = kernels.zone_candidates(pivots, arrays['boring'], move, gap, arrays['exciting'], candles_count)
+    _, checked_pivots = kernels.zone_candidate_pivots(pivots, n, candles_count)
+    positions, zone_pivots = checked[status == ZONE_OK], checked_pivots[status == ZONE_OK]
+
+    # The signal is seen at the exciting candle itself, or once the third candle of the gap closes
+    next_move = _next_flagged(move)[positions + 1]
+    next_gap = _next_flagged(gap)[positions + 1]
+    signal_at = np.minimum(np.where(next_move <= positions + 5, next_move, n),
+                           np.where(next_gap <= positions + 4, next_gap + 1, n))
+    known_at = np.maximum(np.maximum(zone_pivots + window, positions + candles_count), signal_at)
+
+    next_lower, next_higher = kernels.next_breaks(close)
+    breaks = (next_lower if kind == 'demand' else next_higher)[positions]
+    return positions, known_at, np.where(breaks >= 0, breaks, n)
+
+
+def _closest(positions, prices, known_at, invalidated_at, close):
+    """Return, for every bar, the position of the zone in force whose price is closest to the close, or -1.
+
+    Ties go to the zone listed first, as in find_closest_zones, and bars with a NaN close get -1.
+    The zones in force only change at a known_at or invalidated_at, so the bars are split at those
+    and each run of bars is searched against its zones sorted by price: O((T + Z^2) log Z) time and
+    O(T + Z) memory for T bars and Z zones.
+    """
+    n = len(close)
+    closest = np.full(n, -1, dtype=np.int64)
+    usable = np.flatnonzero((known_at < invalidated_at) & (known_at < n) & ~np.isnan(prices))
+    if len(usable) == 0:
+        return closest
+    bounds = np.unique(np.clip(np.concatenate(([0, n], known_at[usable], invalidated_at[usable])), 0, n))
+    for first, last in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        ranks = usable[(known_at[usable] <= first) & (first < invalidated_at[usable])]
+        if len(ranks) == 0:
+            continue
+        # Sorted by price, then by rank, so the first zone of a price is the one listed first
+        ranks = ranks[np.lexsort((ranks, prices[ranks]))]
+        levels = prices[ranks]
+        values = close[first:last]
+        valid = ~np.isnan(values)
+        above = np.searchsorted(levels, values, side='right')
+        has_below, has_above = above > 0, above < len(levels)
+        below = np.searchsorted(levels, levels[np.maximum(above - 1, 0)], side='left')
+        above = np.minimum(above, len(levels) - 1)
+        below_distance, above_distance = values - levels[below], levels[above] - values
+        take_below = valid & has_below & (~has_above | (below_distance < above_distance)
+                                          | ((below_distance == above_distance) & (ranks[below] < ranks[above])))
+        take_above = valid & has_above & ~take_below
+        closest[first:last] = np.where(take_below, positions[ranks[below]],
+                                       np.where(take_above, positions[ranks[above]], -1))
+    return closest
+
+
+def scan_signals(tickerData, **rules):
+    """Evaluate the trade-tip rule on every bar without lookahead.
+
+    Returns:
+        pd.DataFrame: Indexed like tickerData, with the positions of the 'closest_demand' and
+                      'closest_supply' zones a scan of the bars up to each one would find (-1 for
+                      none), 'demand_met', 'supply_met' and 'signal'.
+    """
+    rules = dict(DEFAULT_RULES, **rules)
+    kernels = backend.kernels()
+    open_, high, low, close = (tickerData[column].to_numpy(dtype=np.float64) for column in ('Open', 'High', 'Low', 'Close'))
+    boring, exciting, bullish = kernels.candle_flags(open_, high, low, close)
+    bullish_fvg, bearish_fvg = kernels.fvg_flags(high, low)
+    arrays = {'close': close, 'boring': boring, 'exciting': exciting, 'bullish': bullish,
+              'bullish_fvg': bullish_fvg, 'bearish_fvg': bearish_fvg}
+    major_highs, major_lows = kernels.pivot_positions(high, low, rules['window'])
+
+    demand, demand_known, demand_invalid = zone_timeline(arrays, 'demand', major_lows, rules['window'], rules['candles_count'])
+    supply, supply_known, supply_invalid = zone_timeline(arrays, 'supply', major_highs, rules['window'], rules['candles_count'])
+    closest_demand = _closest(demand, low[demand], demand_known, demand_invalid, close)
+    closest_supply = _closest(supply, high[supply], supply_known, supply_invalid, close)
+
+    demand_high = np.where(closest_demand >= 0, high[closest_demand], np.nan)
+    supply_low = np.where(closest_supply >= 0, low[closest_supply], np.nan)
+    with np.errstate(invalid='ignore'):
+        demand_met = (low > demand_high) & (low <= demand_high * rules['demand_proximity'])
+        supply_met = high < supply_low * rules['supply_proximity']
+    return pd.DataFrame({'closest_demand': closest_demand, 'closest_supply': closest_supply,
+                         'demand_met': demand_met, 'supply_met': supply_met,
+                         'signal': demand_met & supply_met}, index=tickerData.index)
+
+
+def backtest(tickerData, ticker=None, **rules):
+    """Replay the trade-tip rule on one ticker.
+
+    Returns:
+        pd.DataFrame: One row per trade with its signal, entry and exit times and prices, stop,
+                      target, exit reason ('stop', 'target', 'max_bars' or 'open' for a trade still
+                      running on the last bar), bars held, P&L per share and return.
+    """
+    rules = dict(DEFAULT_RULES, **rules)
+    signals = scan_signals(tickerData, **rules)
+    open_, high, low, close = (tickerData[column].to_numpy(dtype=np.float64) for column in ('Open', 'High', 'Low', 'Close'))
+    n = len(close)
+    closest_demand = signals['closest_demand'].to_numpy()
+    closest_supply = signals['closest_supply'].to_numpy()
+
+    trades = []
+    free_from = 0
+    for t in np.flatnonzero(signals['signal'].to_numpy()[:-1]).tolist():
+        if t < free_from:
+            continue
+        entry = t + 1
+        demand_high, supply_low = high[closest_demand[t]], low[closest_supply[t]]
+        stop = low[closest_demand[t]]
+        target = demand_high + rules['target_line'] * (supply_low - demand_high) / 3
+
+        last = n if rules['max_bars'] is None else min(n, entry + rules['max_bars'])
+        stop_hit = low[entry:last] <= stop
+        target_hit = high[entry:last] >= target
+        hits = np.flatnonzero(stop_hit | target_hit)
+        if len(hits):
+            exit_bar = entry + int(hits[0])
+            # Gaps through a level fill at the open; with both levels inside one bar the stop is assumed first
+            if open_[exit_bar] >= target:
+                reason, exit_price = 'target', open_[exit_bar]
+            elif open_[exit_bar] <= stop:
+                reason, exit_price = 'stop', open_[exit_bar]
+            elif stop_hit[hits[0]]:
+                reason, exit_price = 'stop', stop
+            else:
+                reason, exit_price = 'target', target
+        else:
+            exit_bar = last - 1
+            reason = 'max_bars' if last < n else 'open'
+            exit_price = close[exit_bar]
+
+        entry_price = open_[entry]
+        trades.append({
+            'ticker': ticker,
+            'signal_time': tickerData.index[t],
+            'entry_time': tickerData.index[entry],
+            'entry_price': entry_price,
+            'stop': stop,
+            'target': target,
+            'exit_time': tickerData.index[exit_bar],
+            'exit_price': exit_price,
+            'exit_reason': reason,
+            'bars_held': exit_bar - entry + 1,
+            'pnl': exit_price - entry_price,
+            'return': exit_price / entry_price - 1,
+        })
+        free_from = exit_bar
+
+    return pd.DataFrame(trades, columns=TRADE_COLUMNS)
+
+
+def backtest_many(frames, **rules):
+    """Backtest every ticker of {ticker: bars DataFrame} and return all trades in one table."""
+    results = [backtest(tickerData, ticker, **rules) for ticker, tickerData in frames.items() if len(tickerData) > 1]
+    results = [trades for trades in results if not trades.empty]
+    return pd.concat(results, ignore_index=True) if results else pd.DataFrame(columns=TRADE_COLUMNS)
+
+
+def trade_stats(trades):
+    """Return the number of trades, win rate, average and compounded return and average holding time."""
+    return pd.Series({
+        'trades': len(trades),
+        'win_rate': (trades['return'] > 0).mean(),
+        'average_return': trades['return'].mean(),
+        'total_return': (1 + trades['return']).prod() - 1,
+        'average_bars_held': trades['bars_held'].mean(),
+    })
+
+
+def summarize(trades):
+    """Return trade_stats per ticker and for all tickers ('ALL') of the closed trades of a backtest_many table."""
+    closed = trades[trades['exit_reason'] != 'open']
+    summary = pd.DataFrame({ticker: trade_stats(group) for ticker, group in closed.groupby('ticker')}).T
+    summary.loc['ALL'] = trade_stats(closed)
+    return summary
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+import pandas as pd
+import logging
+import os
+import sys
+from backtest import backtest_many, summarize
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data import get_many_bars
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Rules to replay, see backtest.DEFAULT_RULES <------------------------------------------------------
+rules = {
+    'window': 5,
+    'candles_count': 10,
+    'demand_proximity': 1.05,
+    'supply_proximity': 0.95,
+    'target_line': 1,
+    'max_bars': None,
+}
+
+# Read ticker symbols from NSE200.csv without a header
+tickerSymbols = pd.read_csv('NSE200.csv', header=None)[0].tolist()
+
+endDate = datetime.now()
+startDate = endDate - timedelta(days=5 * 365)
+frames = get_many_bars(tickerSymbols, '1d', startDate, endDate)
+
+trades = backtest_many(frames, **rules)
+if trades.empty:
+    print("No trades in the backtest.")
+    sys.exit()
+
+output_csv_path = 'backtest_nse200_1d.csv'
+trades.to_csv(output_csv_path, index=False)
+print(f"{len(trades)} trades saved to {output_csv_path}")
+print(summarize(trades).sort_values('total_return', ascending=False))
@@ -0,0 +1,196 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+from utils import classify_candles, identify_major_highs_lows, identify_demand_zone_history, identify_supply_zone_history
+from backtest import zone_timeline
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data import get_many_bars
+from resample import interval_to_ns
+
+# Multi-timeframe confluence: zones are detected once per ticker and timeframe, and the zones of a
+# higher timeframe are projected onto the bars of a lower one. A zone is in force from the close of
+# the bar at which a scan would first report it (backtest.zone_timeline: its pivot is confirmed,
+# candles_count candles follow it and its signal has closed) until the close of the candle that
+# invalidated it, so a lower-timeframe bar never sees a zone that had not formed yet. ZoneIntervals
+# indexes those spans with their price bands, so any number of lower-timeframe bars are located in
+# one query.
+
+
+class ZoneIntervals:
+    """Time spans and price bands of zones, sorted by the start of the span.
+
+    Attributes:
+        kind (str): 'demand' or 'supply'.
+        start, end (np.ndarray): int64 UTC epoch ns; a zone is in force for start <= t < end.
+        low, high (np.ndarray): float64 price band of the zone candle.
+        positions (np.ndarray): int64 position of the zone candle in its own timeframe.
+    """
+
+    def __init__(self, kind, start, end, low, high, positions):
+        order = np.argsort(start, kind='stable')
+        self.kind = kind
+        self.start = np.asarray(start, dtype=np.int64)[order]
+        self.end = np.asarray(end, dtype=np.int64)[order]
+        self.low = np.asarray(low, dtype=np.float64)[order]
+        self.high = np.asarray(high, dtype=np.float64)[order]
+        self.positions = np.asarray(positions, dtype=np.int64)[order]
+
+    @classmethod
+    def from_zones(cls, zones, timestamps, interval, known_at):
+        """Build the spans of a zone history (see identify_demand_zone_history) on bars of `interval`.
+
+        Args:
+            zones (Zones): Zones with invalidated_at.
+            timestamps (np.ndarray): int64 UTC epoch ns of the bars the zones were found on.
+            known_at (np.ndarray): Position of the bar at which each zone is first reported, as
+                                   backtest.zone_timeline returns it (len(timestamps) if never).
+        """
+        bar_ns = interval_to_ns(interval)
+        never = np.iinfo(np.int64).max
+        known = known_at < len(timestamps)
+        start = np.full(len(zones), never, dtype=np.int64)
+        start[known] = timestamps[known_at[known]] + bar_ns
+        invalidated = zones.invalidated_at >= 0
+        end = np.full(len(zones), never, dtype=np.int64)
+        end[invalidated] = timestamps[zones.invalidated_at[invalidated]] + bar_ns
+        return cls(zones.kind, start, end, zones.low, zones.high, zones.positions)
+
+    def __len__(self):
+        return len(self.start)
+
+    def locate(self, times, prices):
+        """Find the zone each (time, price) lies in.
+
+        Each zone is checked against the times of its span, a contiguous run of the sorted times, in a
+        Python loop over the zones: O(T log T + Z log T) plus the total length of the spans, which is
+        O(T * Z) in the worst case of zones that stay in force, with O(T) memory for T times and Z zones.
+
+        Returns:
+            np.ndarray: int64 position of the earliest-starting zone in force at each time whose
+                        band contains the price, -1 where there is none.
+        """
+        times = np.asarray(times, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        found = np.full(len(times), -1, dtype=np.int64)
+        order = np.argsort(times, kind='stable')
+        sorted_times = times[order]
+        # Zones are visited by start, so the first to claim a time is the earliest-starting one
+        lo = np.searchsorted(sorted_times, self.start, side='left')
+        hi = np.searchsorted(sorted_times, self.end, side='left')
+        for first, last, low, high, position in zip(lo.tolist(), hi.tolist(), self.low.tolist(),
+                                                    self.high.tolist(), self.positions.tolist()):
+            if first >= last:
+                continue
+            span = order[first:last]
+            span = span[found[span] < 0]
+            found[span[(low <= prices[span]) & (prices[span] <= high)]] = position
+        return found
+
+
+class ConfluenceEngine:
+    """Detects zones once per (ticker, interval) and projects them across timeframes.
+
+    Args:
+        window (int): Pivot window, as in identify_major_highs_lows.
+        candles_count (int): Candles required around a zone, as in identify_demand_zones.
+    """
+
+    def __init__(self, window=5, candles_count=10):
+        self.window = window
+        self.candles_count = candles_count
+        self.frames = {}
+        self._detections = {}
+
+    def add(self, ticker, interval, tickerData):
+        """Register the bars of a ticker on one timeframe; detection runs on first use."""
+        if not tickerData.empty:
+            self.frames[(ticker, interval)] = tickerData
+            self._detections.pop((ticker, interval), None)
+
+    def load(self, tickers, periods, end):
+        """Load and register the bars of every ticker on every timeframe from the bar store.
+
+        Args:
+            periods (dict): {interval: timedelta of history to load before end}.
+        """
+        for interval, period in periods.items():
+            for ticker, tickerData in get_many_bars(tickers, interval, end - period, end).items():
+                self.add(ticker, interval, tickerData)
+
+    def detections(self, ticker, interval):
+        """Return the cached detections of a ticker on one timeframe, computing them once.
+
+        Returns:
+            dict: 'demand' and 'supply' zone histories (Zones with invalidated_at), their
+                  ZoneIntervals under 'demand_intervals' and 'supply_intervals', and the bar
+                  'timestamps'; None if no bars were added.
+        """
+        key = (ticker, interval)
+        if key not in self._detections:
+            tickerData = self.frames.get(key)
+            if tickerData is None:
+                return None
+            timestamps = pd.DatetimeIndex(tickerData.index).as_unit('ns').asi8
+            major_highs, major_lows = identify_major_highs_lows(tickerData, self.window)
+            candles = classify_candles(tickerData)
+            demand = identify_demand_zone_history(tickerData, major_lows, self.candles_count, 1.1, candles=candles)
+            supply = identify_supply_zone_history(tickerData, major_highs, self.candles_count, 1.1, candles=candles)
+            # zone_timeline runs the same candidate checks, so its zones line up with the histories
+            arrays = dict(candles, close=tickerData['Close'].to_numpy(dtype=np.float64))
+            _, demand_known, _ = zone_timeline(arrays, 'demand', major_lows.positions, self.window, self.candles_count)
+            _, supply_known, _ = zone_timeline(arrays, 'supply', major_highs.positions, self.window, self.candles_count)
+            self._detections[key] = {
+                'timestamps': timestamps,
+                'demand': demand,
+                'supply': supply,
+                'demand_intervals': ZoneIntervals.from_zones(demand, timestamps, interval, demand_known),
+                'supply_intervals': ZoneIntervals.from_zones(supply, timestamps, interval, supply_known),
+            }
+        return self._detections[key]
+
+    def project(self, ticker, higher, lower, price='Close'):
+        """Project the zones of the `higher` timeframe onto the bars of the `lower` one.
+
+        Returns:
+            pd.DataFrame: Indexed like the lower-timeframe bars, with 'demand_zone' and
+                          'supply_zone' holding the position of the higher-timeframe zone the bar's
+                          `price` lies in at the bar's time, or -1.
+        """
+        upper, bars = self.detections(ticker, higher), self.frames.get((ticker, lower))
+        if upper is None or bars is None:
+            return None
+        times = pd.DatetimeIndex(bars.index).as_unit('ns').asi8
+        prices = bars[price].to_numpy(dtype=np.float64)
+        return pd.DataFrame({'demand_zone': upper['demand_intervals'].locate(times, prices),
+                             'supply_zone': upper['supply_intervals'].locate(times, prices)}, index=bars.index)
+
+    def entries(self, ticker, lower, higher):
+        """Flag the zones of the `lower` timeframe whose zone candle closes inside a zone of the same
+        kind on the `higher` timeframe that is in force at that time.
+
+        Returns:
+            pd.DataFrame: One row per lower-timeframe zone with its 'kind', 'position', 'time',
+                          'low', 'high', whether it is still 'valid', and the position of the
+                          enclosing higher-timeframe zone under 'higher_zone' (-1 for none).
+        """
+        found, upper = self.detections(ticker, lower), self.detections(ticker, higher)
+        if found is None or upper is None:
+            return None
+        rows = []
+        for kind in ('demand', 'supply'):
+            zones = found[kind]
+            enclosing = upper[f"{kind}_intervals"].locate(zones.timestamps, zones.close)
+            rows.append(pd.DataFrame({
+                'kind': kind,
+                'position': zones.positions,
+                'time': self.frames[(ticker, lower)].index[zones.positions],
+                'low': zones.low,
+                'high': zones.high,
+                'valid': zones.invalidated_at < 0,
+                'higher_zone': enclosing,
+            }))
+        return pd.concat(rows, ignore_index=True)
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+import pandas as pd
+import logging
+from confluence import ConfluenceEngine
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Read ticker symbols from NSE200.csv without a header
+tickerSymbols = pd.read_csv('NSE200.csv', header=None)[0].tolist()
+
+# History loaded per timeframe, as in the 1d, 1h and 15m long scans <-----------------------------
+periods = {
+    '1d': timedelta(days=180),
+    '1h': timedelta(days=30),
+    '15m': timedelta(days=7),
+}
+
+# (lower, higher) timeframes to cross-check; zones are detected once per ticker and timeframe
+pairs = [('15m', '1d'), ('15m', '1h'), ('1h', '1d')]
+
+endDate = datetime.now()
+
+engine = ConfluenceEngine(window=5, candles_count=10)
+engine.load(tickerSymbols, periods, endDate)
+
+flagged = []
+for tickerSymbol in tickerSymbols:
+    for lower, higher in pairs:
+        entries = engine.entries(tickerSymbol, lower, higher)
+        if entries is None:
+            logging.warning(f"{tickerSymbol}: No {lower} or {higher} data available. Skipping...")
+            continue
+
+        # Keep the zones that are still valid and sit inside a higher-timeframe zone of the same kind
+        entries = entries[entries['valid'] & (entries['higher_zone'] >= 0)]
+        if entries.empty:
+            continue
+        logging.info(f"{tickerSymbol}: {len(entries)} {lower} zone(s) inside {higher} zones.")
+        flagged.append(entries.assign(Ticker=tickerSymbol, Lower=lower, Higher=higher))
+
+output_csv_path = 'confluence_nse200.csv'
+if flagged:
+    pd.concat(flagged, ignore_index=True).to_csv(output_csv_path, index=False)
+    print(f"Confluence entries saved to {output_csv_path}")
+else:
+    print("No confluence entries found.")
@@ -0,0 +1,239 @@
+import os
+import sys
+import time
+import json
+import sqlite3
+import hashlib
+import logging
+import zipfile
+import numpy as np
+import zone_trace
+from detections import Zones, Pivots, FVGs
+from utils import classify_candles, identify_fvg, identify_major_highs_lows, identify_demand_zones, identify_supply_zones
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bar_store import DEFAULT_CACHE_ROOT
+
+# Content-addressed cache of detection results. A result is keyed by the SHA-1 of the bars it was
+# computed from (their OHLC columns), the detector parameters and CODE_VERSION, so any scanner
+# that analyses the same bars with the same settings reuses it. Only positions are stored: they
+# depend on nothing else, and prices and times are read back from the frame on a hit. Entries live
+# under <root>/detections next to the bar store and are indexed in <root>/detections.sqlite, which
+# also records their size and last use for LRU eviction.
+
+DETECTIONS_FOLDER = 'detections'
+INDEX_FILE = 'detections.sqlite'
+
+# Total size of the stored results above which the least recently used ones are evicted
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Files under the detections folder that the index does not know are deleted once they are this
+# many seconds old; younger ones may belong to a store() still between its write and its index row
+ORPHAN_GRACE = 60 * 60
+
+# Roots whose orphan files were already reclaimed by this process
+_reclaimed_roots = set()
+
+# Modules whose code determines the results; editing any of them invalidates every entry
+_SOURCES = ['utils.py', 'kernels.py', 'kernels_numba.py', 'detections.py']
+
+
+def _code_version():
+    digest = hashlib.sha1()
+    folder = os.path.dirname(os.path.abspath(__file__))
+    for name in _SOURCES:
+        with open(os.path.join(folder, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+CODE_VERSION = _code_version()
+
+
+def detection_key(tickerData, **parameters):
+    """Return the cache key of the detections of tickerData with the given detector parameters."""
+    digest = hashlib.sha1(CODE_VERSION.encode())
+    digest.update(json.dumps(parameters, sort_keys=True).encode())
+    for column in ('Open', 'High', 'Low', 'Close'):
+        digest.update(tickerData[column].to_numpy(dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def entry_path(key, root=DEFAULT_CACHE_ROOT):
+    """Return the file holding the detections of a key."""
+    return os.path.join(root, DETECTIONS_FOLDER, key[:2], f"{key}.npz")
+
+
+def connect(root=DEFAULT_CACHE_ROOT):
+    """Open the index of the detection cache, creating it if needed."""
+    os.makedirs(root, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(root, INDEX_FILE), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # Losing the last uses of a cache index in a crash is harmless; skip the fsync of every commit
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS entries ("
+                 "key TEXT PRIMARY KEY, size INTEGER NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)")
+    return conn
+
+
+def load(key, root=DEFAULT_CACHE_ROOT):
+    """Return the stored arrays of a key and mark it as used, or None if it is not cached."""
+    path = entry_path(key, root)
+    try:
+        with np.load(path) as stored:
+            arrays = {name: stored[name] for name in stored.files}
+    except (FileNotFoundError, OSError, zipfile.BadZipFile):
+        # Missing, evicted by another process since, or left truncated by a crash: a miss
+        return None
+    conn = connect(root)
+    try:
+        with conn:
+            conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+    finally:
+        conn.close()
+    return arrays
+
+
+def store(key, arrays, max_bytes=DEFAULT_MAX_BYTES, root=DEFAULT_CACHE_ROOT):
+    """Write the arrays of a key atomically, index them and evict down to max_bytes."""
+    path = entry_path(key, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path[:-len('.npz')]}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+    now = time.time()
+    conn = connect(root)
+    try:
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", (key, os.path.getsize(path), now, now))
+    finally:
+        conn.close()
+    evict(max_bytes, root)
+
+
+def reclaim_orphans(root=DEFAULT_CACHE_ROOT, grace=ORPHAN_GRACE):
+    """Delete result files the index does not know and index rows whose file is gone.
+
+    Orphan files are left by a crash between writing a result and indexing it, by an interrupted
+    write, or by a deleted index; they are only removed once they are `grace` seconds old.
+
+    Returns:
+        int: The number of files deleted.
+    """
+    folder = os.path.join(root, DETECTIONS_FOLDER)
+    conn = connect(root)
+    try:
+        indexed = {key for key, in conn.execute("SELECT key FROM entries")}
+        on_disk = set()
+        reclaimed = 0
+        cutoff = time.time() - grace
+        for dirpath, _, filenames in os.walk(folder):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                # Temporary files of store(), <key>.<pid>.tmp.npz, never match a key
+                key = os.path.splitext(filename)[0]
+                if key in indexed:
+                    on_disk.add(key)
+                    continue
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        reclaimed += 1
+                except FileNotFoundError:
+                    pass
+        with conn:
+            conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in indexed - on_disk])
+    finally:
+        conn.close()
+    if reclaimed:
+        logging.info(f"Reclaimed {reclaimed} orphan files from the detection cache")
+    return reclaimed
+
+
+def evict(max_bytes=DEFAULT_MAX_BYTES, root=DEFAULT_CACHE_ROOT):
+    """Delete the least recently used results until the stored ones take at most max_bytes.
+
+    The first eviction of a process also reclaims orphan files (see reclaim_orphans), so files
+    that fell out of the index do not accumulate outside the size limit.
+
+    Returns:
+        int: The number of results evicted.
+    """
+    if root not in _reclaimed_roots:
+        reclaim_orphans(root)
+        _reclaimed_roots.add(root)
+    conn = connect(root)
+    try:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= max_bytes:
+            return 0
+        evicted = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_used"):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(entry_path(key, root))
+            except FileNotFoundError:
+                pass
+            evicted.append((key,))
+            total -= size
+        with conn:
+            conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+    finally:
+        conn.close()
+    logging.info(f"Evicted {len(evicted)} detection results from the cache")
+    return len(evicted)
+
+
+def _compute(tickerData, window, candles_count):
+    candles = classify_candles(tickerData)
+    fvgs = identify_fvg(tickerData, candles)
+    major_highs, major_lows = identify_major_highs_lows(tickerData, window)
+    demand_zones = identify_demand_zones(tickerData, major_lows, candles_count, 1.1, candles=candles)
+    supply_zones = identify_supply_zones(tickerData, major_highs, candles_count, 1.1, candles=candles)
+    return {
+        'fvgs': fvgs,
+        'major_highs': major_highs,
+        'major_lows': major_lows,
+        'demand_zones': demand_zones,
+        'supply_zones': supply_zones,
+    }
+
+
+def detect(tickerData, window=5, candles_count=10, max_bytes=DEFAULT_MAX_BYTES, root=DEFAULT_CACHE_ROOT):
+    """Return the FVGs, major highs and lows and demand and supply zones of tickerData, from the
+    cache when the same bars were analysed with the same settings before.
+
+    The cache is bypassed while zone_trace is active, so traced runs still emit their events.
+
+    Returns:
+        dict: 'fvgs' (FVGs), 'major_highs', 'major_lows' (Pivots), 'demand_zones' and
+              'supply_zones' (Zones), as utils computes them.
+    """
+    if zone_trace.active or tickerData.empty:
+        return _compute(tickerData, window, candles_count)
+
+    key = detection_key(tickerData, window=window, candles_count=candles_count)
+    arrays = load(key, root)
+    if arrays is None:
+        detections = _compute(tickerData, window, candles_count)
+        store(key, {
+            'fvg_start': detections['fvgs'].start,
+            'fvg_direction': detections['fvgs'].direction,
+            'major_highs': detections['major_highs'].positions,
+            'major_lows': detections['major_lows'].positions,
+            'demand_zones': detections['demand_zones'].positions,
+            'supply_zones': detections['supply_zones'].positions,
+        }, max_bytes, root)
+        return detections
+
+    return {
+        'fvgs': FVGs.from_starts(tickerData, arrays['fvg_start'], arrays['fvg_direction']),
+        'major_highs': Pivots.from_positions('high', tickerData, arrays['major_highs']),
+        'major_lows': Pivots.from_positions('low', tickerData, arrays['major_lows']),
+        'demand_zones': Zones.from_positions('demand', tickerData, arrays['demand_zones']),
+        'supply_zones': Zones.from_positions('supply', tickerData, arrays['supply_zones']),
+    }
@@ -0,0 +1,206 @@
+import numpy as np
+import pandas as pd
+
+# Array-backed detection results. Each container holds one NumPy array per field instead of a list
+# of row positions, so consumers read prices and times without going back to the DataFrame.
+# Iterating a container still yields what the detectors used to return (positions, or FVG tuples),
+# so existing callers keep working.
+
+
+def _timestamps(tickerData, positions):
+    """Return the UTC epoch-ns timestamps of the candles at positions, or None without a DatetimeIndex."""
+    if not isinstance(tickerData.index, pd.DatetimeIndex):
+        return None
+    return tickerData.index.as_unit('ns').asi8[positions]
+
+
+def _column(tickerData, column, positions):
+    return tickerData[column].to_numpy(dtype=np.float64)[positions]
+
+
+class _Positions:
+    """Sequence behaviour shared by the position-based containers: they act like the old lists."""
+
+    __slots__ = ()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __iter__(self):
+        return iter(self.positions.tolist())
+
+    def __getitem__(self, i):
+        return self.positions[i].tolist() if isinstance(i, slice) else int(self.positions[i])
+
+    def __array__(self, dtype=None, copy=None):
+        return self.positions if dtype is None else self.positions.astype(dtype)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.kind!r}, positions={self.positions.tolist()})"
+
+
+class Zone:
+    """One demand or supply zone: the zone candle's position, time and prices."""
+
+    __slots__ = ('kind', 'position', 'timestamp', 'low', 'high', 'close', 'invalidated_at')
+
+    def __init__(self, kind, position, timestamp, low, high, close, invalidated_at):
+        self.kind = kind
+        self.position = position
+        self.timestamp = timestamp
+        self.low = low
+        self.high = high
+        self.close = close
+        self.invalidated_at = invalidated_at
+
+    def __repr__(self):
+        return (f"Zone({self.kind!r}, position={self.position}, low={self.low}, high={self.high}, "
+                f"invalidated_at={self.invalidated_at})")
+
+
+class Zones(_Positions):
+    """Demand or supply zones of one frame.
+
+    Attributes:
+        kind (str): 'demand' or 'supply'.
+        positions (np.ndarray): int64 positions of the zone candles.
+        timestamps (np.ndarray): int64 UTC epoch ns of the zone candles, or None.
+        low, high, close (np.ndarray): float64 prices of the zone candles.
+        invalidated_at (np.ndarray): int64 position of the first candle that closed through the
+                                     zone, -1 while the zone is valid.
+    """
+
+    __slots__ = ('kind', 'positions', 'timestamps', 'low', 'high', 'close', 'invalidated_at')
+
+    def __init__(self, kind, positions, timestamps, low, high, close, invalidated_at):
+        self.kind = kind
+        self.positions = positions
+        self.timestamps = timestamps
+        self.low = low
+        self.high = high
+        self.close = close
+        self.invalidated_at = invalidated_at
+
+    @classmethod
+    def from_positions(cls, kind, tickerData, positions, invalidated_at=None):
+        positions = np.asarray(positions, dtype=np.int64)
+        if invalidated_at is None:
+            invalidated_at = np.full(len(positions), -1, dtype=np.int64)
+        return cls(kind, positions, _timestamps(tickerData, positions), _column(tickerData, 'Low', positions),
+                   _column(tickerData, 'High', positions), _column(tickerData, 'Close', positions),
+                   np.asarray(invalidated_at, dtype=np.int64))
+
+    @classmethod
+    def coerce(cls, kind, tickerData, zones):
+        """Return zones as a Zones container, building it from a plain list of positions if needed."""
+        return zones if isinstance(zones, cls) else cls.from_positions(kind, tickerData, list(zones))
+
+    def record(self, i):
+        """Return zone i as a Zone."""
+        timestamp = int(self.timestamps[i]) if self.timestamps is not None else None
+        return Zone(self.kind, int(self.positions[i]), timestamp, float(self.low[i]), float(self.high[i]),
+                    float(self.close[i]), int(self.invalidated_at[i]))
+
+    def records(self):
+        """Return all zones as Zone records."""
+        return [self.record(i) for i in range(len(self))]
+
+    def select(self, mask):
+        """Return the zones where mask is True."""
+        timestamps = self.timestamps[mask] if self.timestamps is not None else None
+        return Zones(self.kind, self.positions[mask], timestamps, self.low[mask], self.high[mask],
+                     self.close[mask], self.invalidated_at[mask])
+
+    def valid(self):
+        """Return the zones that have not been invalidated."""
+        return self.select(self.invalidated_at < 0)
+
+
+class Pivots(_Positions):
+    """Major highs or lows of one frame: int64 positions, timestamps and the High (Low) price of each."""
+
+    __slots__ = ('kind', 'positions', 'timestamps', 'price')
+
+    def __init__(self, kind, positions, timestamps, price):
+        self.kind = kind
+        self.positions = positions
+        self.timestamps = timestamps
+        self.price = price
+
+    @classmethod
+    def from_positions(cls, kind, tickerData, positions):
+        positions = np.asarray(positions, dtype=np.int64)
+        return cls(kind, positions, _timestamps(tickerData, positions),
+                   _column(tickerData, 'High' if kind == 'high' else 'Low', positions))
+
+    @classmethod
+    def coerce(cls, kind, tickerData, pivots):
+        """Return pivots as a Pivots container, building it from a plain list of positions if needed."""
+        return pivots if isinstance(pivots, cls) else cls.from_positions(kind, tickerData, list(pivots))
+
+
+class FVGs:
+    """Fair Value Gaps of one frame.
+
+    Attributes:
+        start (np.ndarray): int64 position of the first candle; the gap ends at start + 2.
+        direction (np.ndarray): int8, 1 for bullish and -1 for bearish gaps.
+        bottom, top (np.ndarray): float64 price bounds of the gap.
+        timestamps (np.ndarray): int64 UTC epoch ns of the first candle, or None.
+    """
+
+    __slots__ = ('start', 'direction', 'bottom', 'top', 'timestamps')
+
+    def __init__(self, start, direction, bottom, top, timestamps):
+        self.start = start
+        self.direction = direction
+        self.bottom = bottom
+        self.top = top
+        self.timestamps = timestamps
+
+    @classmethod
+    def from_starts(cls, tickerData, start, direction):
+        """Build the gaps from their first candles and directions, reading the bounds from tickerData."""
+        start = np.asarray(start, dtype=np.int64)
+        direction = np.asarray(direction, dtype=np.int8)
+        high = tickerData['High'].to_numpy(dtype=np.float64)
+        low = tickerData['Low'].to_numpy(dtype=np.float64)
+        # A bullish gap spans the first High to the third Low, a bearish one the third High to the first Low
+        bottom = np.where(direction > 0, high[start], high[start + 2])
+        top = np.where(direction > 0, low[start + 2], low[start])
+        return cls(start, direction, bottom, top, _timestamps(tickerData, start))
+
+    @classmethod
+    def from_flags(cls, tickerData, bullish, bearish):
+        """Build the gaps from per-candle flags on their middle candle (see kernels.fvg_flags)."""
+        middle = np.flatnonzero(bullish | bearish)
+        return cls.from_starts(tickerData, middle - 1, np.where(bullish[middle], 1, -1))
+
+    @classmethod
+    def coerce(cls, tickerData, fvgs):
+        """Return fvgs as an FVGs container, building it from (start, end, type) tuples if needed."""
+        if isinstance(fvgs, cls):
+            return fvgs
+        fvgs = list(fvgs)
+        return cls.from_starts(tickerData, [fvg[0] for fvg in fvgs],
+                               [1 if fvg[2] == 'Bullish' else -1 for fvg in fvgs])
+
+    @property
+    def end(self):
+        return self.start + 2
+
+    def __len__(self):
+        return len(self.start)
+
+    def __iter__(self):
+        for start, direction in zip(self.start.tolist(), self.direction.tolist()):
+            yield start, start + 2, 'Bullish' if direction > 0 else 'Bearish'
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(self)[i]
+        start = int(self.start[i])
+        return start, start + 2, 'Bullish' if self.direction[i] > 0 else 'Bearish'
+
+    def __repr__(self):
+        return f"FVGs({list(self)})"
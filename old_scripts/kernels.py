@@ -0,0 +1,266 @@
+import bisect
+import numpy as np
+
+# Array kernels behind the detectors in utils.py. They take the OHLCV columns as NumPy arrays and
+# return positions, so a scan converts its DataFrame once instead of looking up rows per candle.
+
+
+def fvg_flags(high, low):
+    """Flag the middle candle of every three-candle Fair Value Gap.
+
+    bullish[i] is set when High[i - 1] < Low[i + 1], bearish[i] when Low[i - 1] > High[i + 1].
+    The first and last candles are never flagged. 2D input is treated as one series per row.
+
+    Returns:
+        tuple: (bullish, bearish) boolean arrays shaped like the input.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    bullish = np.zeros(high.shape, dtype=bool)
+    bearish = np.zeros(high.shape, dtype=bool)
+    if high.shape[-1] >= 3:
+        with np.errstate(invalid='ignore'):
+            bullish[..., 1:-1] = high[..., :-2] < low[..., 2:]
+            bearish[..., 1:-1] = low[..., :-2] > high[..., 2:]
+    return bullish, bearish
+
+
+def rolling_extremum(values, window, op):
+    """Return op (np.fmax or np.fmin, which ignore NaN like pandas .max()/.min()) over values[..., j:j + window]
+    for every j, along the last axis.
+
+    Spans are doubled with O(log window) whole-array passes instead of reducing every window.
+    """
+    result = values
+    span = 1
+    while span * 2 <= window:
+        result = op(result[..., :-span], result[..., span:])
+        span *= 2
+    if span < window:
+        result = op(result[..., :result.shape[-1] - (window - span)], result[..., window - span:])
+    return result
+
+
+def pivot_positions(high, low, window=5):
+    """Find swing highs and lows: bars whose High (Low) is strictly above (below) the `window`
+    bars on each side.
+
+    Only bars with a full window on both sides, window <= i < n - window, can be pivots; a pivot
+    with an all-NaN side does not count.
+
+    Returns:
+        tuple: (major_highs, major_lows) as sorted int64 position arrays.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    n = len(high)
+    if window < 1 or n < 2 * window + 1:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    # Window j covers bars j..j + window - 1: bar i is preceded by window i - window and followed by window i + 1
+    high_max = rolling_extremum(high, window, np.fmax)
+    low_min = rolling_extremum(low, window, np.fmin)
+    center = slice(window, n - window)
+    with np.errstate(invalid='ignore'):
+        is_high = (high[center] > high_max[:n - 2 * window]) & (high[center] > high_max[window + 1:])
+        is_low = (low[center] < low_min[:n - 2 * window]) & (low[center] < low_min[window + 1:])
+    return np.flatnonzero(is_high) + window, np.flatnonzero(is_low) + window
+
+
+def _active_levels(prices, pivots):
+    """Return (activation position, level, rank) for the pivots with a valid price, in activation order.
+
+    rank is the pivot's place in the caller's list, which decides which pivot is reported when
+    several are broken by the same candle.
+    """
+    levels = [(int(pos) + 1, float(prices[pos]), rank) for rank, pos in enumerate(pivots)]
+    return sorted(level for level in levels if not np.isnan(level[1]))
+
+
+def _first_broken(active, lower, upper):
+    """Return the lowest rank among the active (level, rank) entries strictly between lower and upper, or None."""
+    ranks = [rank for _, rank in active[bisect.bisect_right(active, (lower, np.inf)):
+                                        bisect.bisect_left(active, (upper, -np.inf))]]
+    return min(ranks) if ranks else None
+
+
+def bos_events(open_, close, high, low, major_highs, major_lows):
+    """Find breaks of structure in one pass over the candles.
+
+    A candle at position i is a bullish break when it opens below and closes above the High of a
+    major high before i, and a bearish break when it opens above and closes below the Low of a
+    major low before i. Pivot levels enter a sorted list as the sweep passes them, so each candle
+    costs a bisect instead of a scan over all pivots. When several pivots are broken at once the
+    first one in major_highs / major_lows is reported.
+
+    Returns:
+        tuple: (positions, directions, pivots) arrays ordered by position, bullish before bearish
+               on the same candle; direction is 1 for bullish and -1 for bearish breaks.
+    """
+    open_ = np.asarray(open_, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    sides = [
+        (1, _active_levels(np.asarray(high, dtype=np.float64), major_highs), open_, close, list(major_highs)),
+        (-1, _active_levels(np.asarray(low, dtype=np.float64), major_lows), close, open_, list(major_lows)),
+    ]
+    active = ([], [])
+    next_level = [0, 0]
+    positions, directions, pivots = [], [], []
+
+    for i in range(1, len(open_)):
+        for side, (direction, levels, lower, upper, pivot_list) in enumerate(sides):
+            while next_level[side] < len(levels) and levels[next_level[side]][0] <= i:
+                _, price, rank = levels[next_level[side]]
+                bisect.insort(active[side], (price, rank))
+                next_level[side] += 1
+            if not active[side] or not lower[i] < upper[i]:
+                continue
+            broken = _first_broken(active[side], lower[i], upper[i])
+            if broken is not None:
+                positions.append(i)
+                directions.append(direction)
+                pivots.append(pivot_list[broken])
+
+    return (np.asarray(positions, dtype=np.int64), np.asarray(directions, dtype=np.int8),
+            np.asarray(pivots, dtype=np.int64))
+
+
+def suffix_extrema(values):
+    """Return (suffix_min, suffix_max) where entry i is the NaN-ignoring min/max of values[i:].
+
+    Both arrays have one extra trailing NaN entry for the empty suffix, so values[i + 1:] can be
+    checked for every position i, including the last one. 2D input is treated as one series per row.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    empty = np.full(values.shape[:-1] + (1,), np.nan)
+    suffix_min = np.concatenate([np.fmin.accumulate(values[..., ::-1], axis=-1)[..., ::-1], empty], axis=-1)
+    suffix_max = np.concatenate([np.fmax.accumulate(values[..., ::-1], axis=-1)[..., ::-1], empty], axis=-1)
+    return suffix_min, suffix_max
+
+
+def next_breaks(values):
+    """For every position find the first later position with a strictly lower and a strictly higher value.
+
+    Uses one monotonic stack per direction, so all positions are resolved in a single O(n) pass.
+    NaN values never break and are never broken.
+
+    Returns:
+        tuple: (next_lower, next_higher) int64 arrays, -1 where no later value breaks.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    next_lower = np.full(len(values), -1, dtype=np.int64)
+    next_higher = np.full(len(values), -1, dtype=np.int64)
+    rising = []   # positions waiting for a lower value, values non-decreasing from bottom to top
+    falling = []  # positions waiting for a higher value, values non-increasing from bottom to top
+    prices = values.tolist()
+    for j, value in enumerate(prices):
+        if value != value:
+            continue
+        while rising and prices[rising[-1]] > value:
+            next_lower[rising.pop()] = j
+        while falling and prices[falling[-1]] < value:
+            next_higher[falling.pop()] = j
+        rising.append(j)
+        falling.append(j)
+    return next_lower, next_higher
+
+
+def candle_flags(open_, high, low, close):
+    """Classify every candle at once.
+
+    A candle is boring when its body is at most half its High-Low range and exciting when it is at
+    least half; a candle with a body of exactly half the range is both. Candles with NaN prices
+    are neither. Works elementwise, so 2D panels are classified the same way.
+
+    Returns:
+        tuple: (boring, exciting, bullish) boolean arrays; bullish means Close > Open.
+    """
+    open_ = np.asarray(open_, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    body = np.abs(open_ - close)
+    half_range = 0.5 * np.abs(np.asarray(high, dtype=np.float64) - np.asarray(low, dtype=np.float64))
+    with np.errstate(invalid='ignore'):
+        return body <= half_range, body >= half_range, close > open_
+
+
+def trend_labels(close, major_highs, major_lows):
+    """Label every candle with the trend of the pivot segment it belongs to.
+
+    Candles from a major low up to the next major high are up (1), from a major high to the next
+    major low down (-1) and between two pivots of the same kind sideways (0). From the last pivot
+    on, a candle is up or down when it closes above or below the pivot's close. Candles before the
+    first pivot are sideways.
+
+    Returns:
+        np.ndarray: int8 trend per candle.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    trends = np.zeros(n, dtype=np.int8)
+    is_high = np.zeros(n, dtype=bool)
+    is_low = np.zeros(n, dtype=bool)
+    is_high[np.asarray(major_highs, dtype=np.int64)] = True
+    is_low[np.asarray(major_lows, dtype=np.int64)] = True
+    points = np.flatnonzero(is_high | is_low)
+    if len(points) == 0:
+        return trends
+
+    starts, ends = points[:-1], points[1:]
+    segment_trends = np.where(is_low[starts] & is_high[ends], 1, np.where(is_high[starts] & is_low[ends], -1, 0))
+    trends[points[0]:points[-1]] = np.repeat(segment_trends.astype(np.int8), ends - starts)
+
+    last_point = points[-1]
+    with np.errstate(invalid='ignore'):
+        tail = close[last_point:]
+        trends[last_point:] = (tail > close[last_point]).astype(np.int8) - (tail < close[last_point])
+    return trends
+
+
+# zone_candidates status codes, in the order the checks are made
+ZONE_OK, ZONE_NOT_BORING, ZONE_NO_SIGNAL, ZONE_OUT_OF_BOUNDS = 0, 1, 2, 3
+
+
+def _window_any(counts, start, stop):
+    """Check whether flags[start:stop] has a set flag, given counts = cumulative flag counts with a leading 0."""
+    n = len(counts) - 1
+    return counts[np.clip(stop, 0, n)] - counts[np.clip(start, 0, n)] > 0
+
+
+def zone_candidate_pivots(pivots, n, candles_count):
+    """Return (checked, pivot) position arrays: the candles zone_candidates checks, in its order,
+    and the pivot each one was checked for."""
+    pivots = np.asarray(pivots, dtype=np.int64)
+    pivots = pivots[(pivots > candles_count - 1) & (pivots < n - candles_count)]
+    checked = (pivots[:, None] + np.arange(3)).ravel()
+    pivots = np.repeat(pivots, 3)
+    inside = checked < n
+    return checked[inside], pivots[inside]
+
+
+def zone_candidates(pivots, boring, move, gap, exciting, candles_count):
+    """Check the candles at and just after each pivot for a demand/supply zone.
+
+    For every pivot with candles_count candles on both sides, the pivot and the next 2 candles are
+    checked in order. A checked candle is a candidate when it is boring, one of the 5 candles
+    after it is an exciting candle in the zone's direction (`move`) or one of the next gaps in that
+    direction (`gap`, flagged on the gap's middle candle) starts within 4 candles, one of the 2
+    candles before it is exciting, and candles_count candles follow it.
+
+    Returns:
+        tuple: (checked, status) arrays in check order; status is ZONE_OK for candidates or the
+               code of the first check that failed.
+    """
+    n = len(boring)
+    checked, _ = zone_candidate_pivots(pivots, n, candles_count)
+
+    move_counts = np.r_[0, np.cumsum(move)]
+    gap_counts = np.r_[0, np.cumsum(gap)]
+    exciting_counts = np.r_[0, np.cumsum(exciting)]
+    signal = _window_any(move_counts, checked + 1, checked + 6) | _window_any(gap_counts, checked + 1, checked + 5)
+    left = _window_any(exciting_counts, checked - 2, checked)
+
+    status = np.full(len(checked), ZONE_OK, dtype=np.int8)
+    status[checked + candles_count >= n] = ZONE_OUT_OF_BOUNDS
+    status[~(signal & left)] = ZONE_NO_SIGNAL
+    status[~boring[checked]] = ZONE_NOT_BORING
+    return checked, status
@@ -0,0 +1,207 @@
+import numpy as np
+from numba import njit
+from kernels import ZONE_OK, ZONE_NOT_BORING, ZONE_NO_SIGNAL, ZONE_OUT_OF_BOUNDS, suffix_extrema, trend_labels
+from kernels import zone_candidate_pivots
+
+# Numba-compiled versions of the kernels in kernels.py, with the same signatures and results. The
+# sequential rules (pivot windows, the BoS scan, the forward/left zone searches, the monotonic
+# stacks) run as plain loops here. suffix_extrema, trend_labels and zone_candidate_pivots are
+# already whole-array NumPy operations and are shared with kernels.py. Select this module through
+# backend.py.
+
+
+def _floats(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+@njit(cache=True)
+def _fvg_flags(high, low):
+    n = len(high)
+    bullish = np.zeros(n, dtype=np.bool_)
+    bearish = np.zeros(n, dtype=np.bool_)
+    for i in range(1, n - 1):
+        bullish[i] = high[i - 1] < low[i + 1]
+        bearish[i] = low[i - 1] > high[i + 1]
+    return bullish, bearish
+
+
+def fvg_flags(high, low):
+    """See kernels.fvg_flags."""
+    return _fvg_flags(_floats(high), _floats(low))
+
+
+@njit(cache=True)
+def _window_extremum(values, start, stop, sign):
+    """Return sign * the NaN-ignoring max of sign * values[start:stop] and whether any value was seen."""
+    best = 0.0
+    seen = False
+    for j in range(start, stop):
+        value = sign * values[j]
+        if value == value and (not seen or value > best):
+            best = value
+            seen = True
+    return best, seen
+
+
+@njit(cache=True)
+def _pivot_positions(high, low, window):
+    n = len(high)
+    highs = np.empty(n, dtype=np.int64)
+    lows = np.empty(n, dtype=np.int64)
+    high_count = 0
+    low_count = 0
+    for i in range(window, n - window):
+        before, seen_before = _window_extremum(high, i - window, i, 1.0)
+        after, seen_after = _window_extremum(high, i + 1, i + 1 + window, 1.0)
+        if seen_before and seen_after and high[i] > before and high[i] > after:
+            highs[high_count] = i
+            high_count += 1
+        before, seen_before = _window_extremum(low, i - window, i, -1.0)
+        after, seen_after = _window_extremum(low, i + 1, i + 1 + window, -1.0)
+        if seen_before and seen_after and -low[i] > before and -low[i] > after:
+            lows[low_count] = i
+            low_count += 1
+    return highs[:high_count].copy(), lows[:low_count].copy()
+
+
+def pivot_positions(high, low, window=5):
+    """See kernels.pivot_positions."""
+    if window < 1:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return _pivot_positions(_floats(high), _floats(low), window)
+
+
+@njit(cache=True)
+def _bos_events(open_, close, high, low, major_highs, major_lows):
+    n = len(open_)
+    positions = np.empty(2 * n, dtype=np.int64)
+    directions = np.empty(2 * n, dtype=np.int8)
+    pivots = np.empty(2 * n, dtype=np.int64)
+    count = 0
+    for i in range(1, n):
+        # The first listed pivot before i whose level the candle's body crosses is reported
+        for k in range(len(major_highs)):
+            pivot = major_highs[k]
+            if i > pivot and open_[i] < high[pivot] and close[i] > high[pivot]:
+                positions[count] = i
+                directions[count] = 1
+                pivots[count] = pivot
+                count += 1
+                break
+        for k in range(len(major_lows)):
+            pivot = major_lows[k]
+            if i > pivot and open_[i] > low[pivot] and close[i] < low[pivot]:
+                positions[count] = i
+                directions[count] = -1
+                pivots[count] = pivot
+                count += 1
+                break
+    return positions[:count].copy(), directions[:count].copy(), pivots[:count].copy()
+
+
+def bos_events(open_, close, high, low, major_highs, major_lows):
+    """See kernels.bos_events."""
+    return _bos_events(_floats(open_), _floats(close), _floats(high), _floats(low),
+                       np.asarray(major_highs, dtype=np.int64), np.asarray(major_lows, dtype=np.int64))
+
+
+@njit(cache=True)
+def _zone_candidates(pivots, boring, move, gap, exciting, candles_count):
+    n = len(boring)
+    checked = np.empty(3 * len(pivots), dtype=np.int64)
+    status = np.empty(3 * len(pivots), dtype=np.int8)
+    count = 0
+    for pivot in pivots:
+        if pivot <= candles_count - 1 or pivot >= n - candles_count:
+            continue
+        for offset in range(3):
+            pos = pivot + offset
+            if pos >= n:
+                break
+            checked[count] = pos
+            count += 1
+            if not boring[pos]:
+                status[count - 1] = ZONE_NOT_BORING
+                continue
+
+            signal = False
+            for i in range(pos + 1, min(pos + 6, n)):
+                if move[i]:
+                    signal = True
+                    break
+            if not signal:
+                for i in range(pos + 1, min(pos + 5, n)):
+                    if gap[i]:
+                        signal = True
+                        break
+            left = False
+            for i in range(max(pos - 2, 0), pos):
+                if exciting[i]:
+                    left = True
+                    break
+
+            if not signal or not left:
+                status[count - 1] = ZONE_NO_SIGNAL
+            elif pos + candles_count >= n:
+                status[count - 1] = ZONE_OUT_OF_BOUNDS
+            else:
+                status[count - 1] = ZONE_OK
+    return checked[:count].copy(), status[:count].copy()
+
+
+def zone_candidates(pivots, boring, move, gap, exciting, candles_count):
+    """See kernels.zone_candidates."""
+    return _zone_candidates(np.asarray(pivots, dtype=np.int64), np.asarray(boring, dtype=np.bool_),
+                            np.asarray(move, dtype=np.bool_), np.asarray(gap, dtype=np.bool_),
+                            np.asarray(exciting, dtype=np.bool_), candles_count)
+
+
+@njit(cache=True)
+def _next_breaks(values):
+    n = len(values)
+    next_lower = np.full(n, -1, dtype=np.int64)
+    next_higher = np.full(n, -1, dtype=np.int64)
+    rising = np.empty(n, dtype=np.int64)
+    falling = np.empty(n, dtype=np.int64)
+    rising_top = 0
+    falling_top = 0
+    for j in range(n):
+        value = values[j]
+        if value != value:
+            continue
+        while rising_top > 0 and values[rising[rising_top - 1]] > value:
+            rising_top -= 1
+            next_lower[rising[rising_top]] = j
+        while falling_top > 0 and values[falling[falling_top - 1]] < value:
+            falling_top -= 1
+            next_higher[falling[falling_top]] = j
+        rising[rising_top] = j
+        rising_top += 1
+        falling[falling_top] = j
+        falling_top += 1
+    return next_lower, next_higher
+
+
+def next_breaks(values):
+    """See kernels.next_breaks."""
+    return _next_breaks(_floats(values))
+
+
+@njit(cache=True)
+def _candle_flags(open_, high, low, close):
+    n = len(open_)
+    boring = np.zeros(n, dtype=np.bool_)
+    exciting = np.zeros(n, dtype=np.bool_)
+    bullish = np.zeros(n, dtype=np.bool_)
+    for i in range(n):
+        body = abs(open_[i] - close[i])
+        half_range = 0.5 * abs(high[i] - low[i])
+        boring[i] = body <= half_range
+        exciting[i] = body >= half_range
+        bullish[i] = close[i] > open_[i]
+    return boring, exciting, bullish
+
+
+def candle_flags(open_, high, low, close):
+    """See kernels.candle_flags."""
+    return _candle_flags(_floats(open_), _floats(high), _floats(low), _floats(close))
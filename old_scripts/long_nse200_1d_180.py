@@ -1,16 +1,18 @@
 from datetime import datetime, timedelta
 from plot_chart import plot_chart
-import yfinance as yf
 import pandas as pd
-from utils import calculate_body_and_shadow, identify_fvg, identify_major_highs_lows, identify_bos, identify_demand_zones, identify_supply_zones, find_closest_zones
+from utils import calculate_body_and_shadow, identify_bos, find_closest_zones
+from panel import build_panel, detect_panel
+import zone_trace
 import os
 import logging
 import sys
 
-
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from market_data import get_many_bars
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -27,71 +29,31 @@ endDate = datetime.now()
 # Get the data for the desired period <-----------------------------------------
 startDate = endDate - timedelta(days=180)  # change to your desired period
 
-# Before reading the CSV file, determine the correct index column name
-if interval == '1d':
-    index_col_name = 'Date'
-else:
-    index_col_name = 'Datetime'
+# Load the bars of the whole universe from the bar store, downloading only what is not cached
+panel = build_panel(get_many_bars(tickerSymbols, interval, startDate, endDate))
 
-# Define the file name for storing the data, ensuring it's saved in the 'data' folder
-data_folder = 'data'
-if not os.path.exists(data_folder):
-    os.makedirs(data_folder)  # Create the data folder if it doesn't exist
+# Identify FVGs, major highs and lows and demand and supply zones for all tickers at once
+detections = detect_panel(panel, window=5, candles_count=10)  # Adjust parameters as needed
 
 for tickerSymbol in tickerSymbols:
-    fileName = f"{data_folder}/{tickerSymbol}_data_{startDate.strftime('%Y%m%d')}_{endDate.strftime('%Y%m%d')}_{interval}.csv"
-
-    # Check if data is already downloaded
-    if os.path.exists(fileName):
-        # Load data from CSV file
-        tickerData = pd.read_csv(fileName, parse_dates=True, index_col=index_col_name)
-        # Convert index to UTC datetime objects if they are timezone-aware
-        if tickerData.index.tz is not None:
-            tickerData.index = tickerData.index.tz_convert('UTC')
-        else:
-            tickerData.index = pd.to_datetime(tickerData.index)
-    else:
-        # Download data if not already downloaded
-        tickerData = yf.download(tickerSymbol, start=startDate, end=endDate, interval=interval)
-        tickerData = tickerData.round(2)
-        # Ensure the index is in datetime format and convert to UTC if timezone-aware
-        tickerData.index = pd.to_datetime(tickerData.index, utc=True)
-        # Save data to CSV file
-        tickerData.to_csv(fileName)
-    # Ensure the index is in datetime format
-    tickerData.index = pd.to_datetime(tickerData.index)
-
-    # Convert the dates into string format without time
-    tickerData['Date'] = tickerData.index.strftime('%Y-%m-%d %H:%M:%S' if interval != '1d' else '%Y-%m-%d')
+    tickerData = panel.frame(tickerSymbol)
+    zone_trace.set_ticker(tickerSymbol)
+
+    if tickerData.empty:
+        logging.warning(f"No data available for {tickerSymbol}. Skipping...")
+        continue
 
     # Calculate body and shadow
     tickerData = calculate_body_and_shadow(tickerData)
 
-    # Identify FVGs
-    fvg_list = identify_fvg(tickerData)
-
-    # Identify major highs and lows
-    major_highs, major_lows = identify_major_highs_lows(tickerData)
+    found = detections[tickerSymbol]
+    fvg_list = found['fvgs']
+    major_highs, major_lows = found['major_highs'], found['major_lows']
+    demand_zones, supply_zones = found['demand_zones'], found['supply_zones']
 
     # Identify break of structure (BoS)
     bos_list = identify_bos(tickerData, major_highs, major_lows)
 
-    # Convert the index to integers for pattern detection
-    tickerData.reset_index(drop=True, inplace=True)
-
-    # Set 'Date' as the index
-    tickerData.set_index('Date', inplace=True)
-
-    # Ensure the index is a DatetimeIndex and localize or convert timezone if necessary
-    if not isinstance(tickerData.index, pd.DatetimeIndex):
-        tickerData.index = pd.to_datetime(tickerData.index)
-
-    # Identify demand zones
-    demand_zones = identify_demand_zones(tickerData, major_lows, 10, 1.1)
-
-    # Identify supply zones
-    supply_zones = identify_supply_zones(tickerData, major_highs, 10, 1.1)  # Adjust parameters as needed
-
         # Find the closest demand and supply zones
     closest_demand, closest_supply = find_closest_zones(tickerData, demand_zones, supply_zones)
 
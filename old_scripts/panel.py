@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+from kernels import ZONE_OK, ZONE_NOT_BORING, ZONE_NO_SIGNAL, ZONE_OUT_OF_BOUNDS
+from kernels import fvg_flags, rolling_extremum, candle_flags, suffix_extrema
+from detections import Zones, Pivots, FVGs
+
+# Panel mode: the detectors of utils.py run once over a whole universe instead of ticker by ticker.
+# The bars of all tickers are packed into (tickers x bars) arrays, and FVGs, pivots, candle classes,
+# suffix extrema and the zone checks are computed for every ticker with the same whole-array
+# operations. Only splitting the results into per-ticker containers loops over the tickers. The
+# containers are the ones the per-ticker detectors return, with positions relative to each ticker.
+
+PANEL_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+class Panel:
+    """OHLCV bars of many tickers as aligned (tickers x bars) float64 arrays.
+
+    Rows are right-aligned by position, not by timestamp: the last column holds every ticker's last
+    bar and shorter histories are padded with NaN on the left. A column is a session only for
+    tickers with the same bars; a ticker missing a bar is shifted against the others before it, so
+    read the time of a bar from `timestamps`. The detectors only look along rows, so each ticker
+    gets the results of its own bars. Bar k of the ticker in row r is column start[r] + k.
+
+    Attributes:
+        tickers (list): The ticker of each row.
+        timestamps (np.ndarray): int64 UTC epoch ns of each bar, 0 in the padding.
+        open, high, low, close, volume (np.ndarray): float64 bars, NaN in the padding.
+        valid (np.ndarray): True where the ticker has a bar.
+        start (np.ndarray): int64 column of each ticker's first bar; the width of the panel for a
+                            ticker without bars.
+    """
+
+    def __init__(self, tickers, timestamps, columns, start, tz=None, index_name=None):
+        self.tickers = list(tickers)
+        self.rows = {ticker: row for row, ticker in enumerate(self.tickers)}
+        self.timestamps = timestamps
+        self.open, self.high, self.low, self.close, self.volume = (columns[column] for column in PANEL_COLUMNS)
+        self.start = start
+        self.valid = np.arange(timestamps.shape[1]) >= start[:, None]
+        self.tz = tz
+        self.index_name = index_name
+
+    @property
+    def bars(self):
+        return self.timestamps.shape[1]
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def frame(self, ticker):
+        """Return the bars of ticker as the DataFrame the per-ticker detectors take."""
+        row = self.rows[ticker]
+        bars = slice(int(self.start[row]), self.bars)
+        index = pd.DatetimeIndex(self.timestamps[row, bars].view('M8[ns]'), name=self.index_name).tz_localize('UTC')
+        index = index.tz_convert(self.tz) if self.tz is not None else index.tz_localize(None)
+        data = {column: getattr(self, column.lower())[row, bars] for column in PANEL_COLUMNS}
+        return pd.DataFrame(data, index=index)
+
+
+def build_panel(frames):
+    """Pack {ticker: bars DataFrame} (as returned by market_data.get_many_bars) into a Panel.
+
+    Tickers with no bars get an all-padding row.
+    """
+    tickers = list(frames)
+    lengths = np.array([len(frames[ticker]) for ticker in tickers], dtype=np.int64)
+    width = int(lengths.max()) if len(lengths) else 0
+    start = width - lengths
+
+    timestamps = np.zeros((len(tickers), width), dtype=np.int64)
+    columns = {column: np.full((len(tickers), width), np.nan) for column in PANEL_COLUMNS}
+    tz, index_name = None, None
+    for row, ticker in enumerate(tickers):
+        tickerData = frames[ticker]
+        if tickerData.empty:
+            continue
+        index = pd.DatetimeIndex(tickerData.index)
+        tz, index_name = index.tz, index.name
+        timestamps[row, start[row]:] = index.as_unit('ns').asi8
+        for column in PANEL_COLUMNS:
+            columns[column][row, start[row]:] = tickerData[column].to_numpy(dtype=np.float64)
+    return Panel(tickers, timestamps, columns, start, tz, index_name)
+
+
+def pivot_flags(panel, window=5):
+    """Flag the swing highs and lows of every ticker, as identify_major_highs_lows does per ticker.
+
+    Returns:
+        tuple: (is_high, is_low) boolean (tickers x bars) arrays.
+    """
+    n = panel.bars
+    is_high = np.zeros((len(panel), n), dtype=bool)
+    is_low = np.zeros((len(panel), n), dtype=bool)
+    if window < 1 or n < 2 * window + 1:
+        return is_high, is_low
+
+    high_max = rolling_extremum(panel.high, window, np.fmax)
+    low_min = rolling_extremum(panel.low, window, np.fmin)
+    center = slice(window, n - window)
+    with np.errstate(invalid='ignore'):
+        is_high[:, center] = (panel.high[:, center] > high_max[:, :n - 2 * window]) & (panel.high[:, center] > high_max[:, window + 1:])
+        is_low[:, center] = (panel.low[:, center] < low_min[:, :n - 2 * window]) & (panel.low[:, center] < low_min[:, window + 1:])
+    # The window before a pivot must lie within the ticker's own bars, not the padding
+    enough_bars = np.arange(n) >= panel.start[:, None] + window
+    return is_high & enough_bars, is_low & enough_bars
+
+
+def _counts(flags):
+    """Return the cumulative count of set flags along each row, with a leading 0 column."""
+    return np.concatenate([np.zeros((len(flags), 1), dtype=np.int64), np.cumsum(flags, axis=1)], axis=1)
+
+
+def _window_any(counts, rows, start, stop):
+    """Check whether flags[rows, start:stop] has a set flag, given per-row cumulative counts with a leading 0."""
+    n = counts.shape[1] - 1
+    return counts[rows, np.clip(stop, 0, n)] - counts[rows, np.clip(start, 0, n)] > 0
+
+
+def zone_checks(panel, rows, columns, boring, move, gap, exciting, candles_count):
+    """Run the checks of kernels.zone_candidates for the pivots of all tickers at once.
+
+    Args:
+        rows, columns (np.ndarray): Panel coordinates of the pivots, grouped by row.
+        boring, move, gap, exciting (np.ndarray): (tickers x bars) flags as in zone_candidates.
+
+    Returns:
+        tuple: (rows, columns, status) of the checked candles, in the order each ticker checks them.
+    """
+    n = panel.bars
+    keep = (columns > panel.start[rows] + candles_count - 1) & (columns < n - candles_count)
+    checked = (columns[keep, None] + np.arange(3)).ravel()
+    rows = np.repeat(rows[keep], 3)
+    inside = checked < n
+    checked, rows = checked[inside], rows[inside]
+
+    move_counts, gap_counts, exciting_counts = _counts(move), _counts(gap), _counts(exciting)
+    signal = (_window_any(move_counts, rows, checked + 1, checked + 6)
+              | _window_any(gap_counts, rows, checked + 1, checked + 5))
+    left = _window_any(exciting_counts, rows, checked - 2, checked)
+
+    status = np.full(len(checked), ZONE_OK, dtype=np.int8)
+    status[checked + candles_count >= n] = ZONE_OUT_OF_BOUNDS
+    status[~(signal & left)] = ZONE_NO_SIGNAL
+    status[~boring[rows, checked]] = ZONE_NOT_BORING
+    return rows, checked, status
+
+
+def _by_row(panel, rows, *arrays):
+    """Split arrays whose entries are grouped by row into one list of arrays per row."""
+    bounds = np.cumsum(np.bincount(rows, minlength=len(panel)))[:-1]
+    return [np.split(values, bounds) for values in arrays]
+
+
+def _zones(panel, kind, pivots, move, gap, candles, suffix, candles_count):
+    """Return the zones of every row as (rows, columns), keeping those no later candle has closed through."""
+    rows, columns, status = zone_checks(panel, *pivots, candles['boring'], move, gap, candles['exciting'],
+                                        candles_count)
+    rows, columns = rows[status == ZONE_OK], columns[status == ZONE_OK]
+    close = panel.close[rows, columns]
+    later = suffix[rows, columns + 1]
+    with np.errstate(invalid='ignore'):
+        closed_through = later < close if kind == 'demand' else later > close
+    return rows[~closed_through], columns[~closed_through]
+
+
+def _split_pivots(panel, kind, coordinates, price):
+    """Split the pivots of all rows, given as (rows, columns), into one Pivots per row."""
+    rows, columns = coordinates
+    return [Pivots(kind, c - panel.start[row], panel.timestamps[row, c], p)
+            for row, (c, p) in enumerate(zip(*_by_row(panel, rows, columns, price[rows, columns])))]
+
+
+def _split_zones(panel, kind, coordinates):
+    """Split the zones of all rows, given as (rows, columns), into one Zones per row."""
+    rows, columns = coordinates
+    return [Zones(kind, c - panel.start[row], panel.timestamps[row, c], panel.low[row, c], panel.high[row, c],
+                  panel.close[row, c], np.full(len(c), -1, dtype=np.int64))
+            for row, (c,) in enumerate(zip(*_by_row(panel, rows, columns)))]
+
+
+def _split_fvgs(panel, bullish_fvg, bearish_fvg):
+    """Build one FVGs per row from the gap flags on their middle candles."""
+    rows, middle = np.nonzero(bullish_fvg | bearish_fvg)
+    start = middle - 1
+    direction = np.where(bullish_fvg[rows, middle], 1, -1).astype(np.int8)
+    bottom = np.where(direction > 0, panel.high[rows, start], panel.high[rows, start + 2])
+    top = np.where(direction > 0, panel.low[rows, start + 2], panel.low[rows, start])
+    return [FVGs(s - panel.start[row], d, b, t, panel.timestamps[row, s])
+            for row, (s, d, b, t) in enumerate(zip(*_by_row(panel, rows, start, direction, bottom, top)))]
+
+
+def detect_panel(panel, window=5, candles_count=10):
+    """Detect FVGs, major highs and lows and demand and supply zones for every ticker of the panel.
+
+    Args:
+        window (int): Pivot window, as in identify_major_highs_lows.
+        candles_count (int): Candles required around a zone, as in identify_demand_zones.
+
+    Returns:
+        dict: {ticker: {'fvgs': FVGs, 'major_highs': Pivots, 'major_lows': Pivots,
+               'demand_zones': Zones, 'supply_zones': Zones}}, the same results the per-ticker
+              detectors give for panel.frame(ticker).
+    """
+    bullish_fvg, bearish_fvg = fvg_flags(panel.high, panel.low)
+    is_high, is_low = pivot_flags(panel, window)
+    boring, exciting, bullish = candle_flags(panel.open, panel.high, panel.low, panel.close)
+    candles = {'boring': boring, 'exciting': exciting}
+    suffix_min, suffix_max = suffix_extrema(panel.close)
+
+    highs, lows = np.nonzero(is_high), np.nonzero(is_low)
+    demand = _zones(panel, 'demand', lows, exciting & bullish, bullish_fvg, candles, suffix_min, candles_count)
+    supply = _zones(panel, 'supply', highs, exciting & ~bullish, bearish_fvg, candles, suffix_max, candles_count)
+
+    found = zip(_split_fvgs(panel, bullish_fvg, bearish_fvg), _split_pivots(panel, 'high', highs, panel.high),
+                _split_pivots(panel, 'low', lows, panel.low), _split_zones(panel, 'demand', demand),
+                _split_zones(panel, 'supply', supply))
+    keys = ('fvgs', 'major_highs', 'major_lows', 'demand_zones', 'supply_zones')
+    return {ticker: dict(zip(keys, results)) for ticker, results in zip(panel.tickers, found)}
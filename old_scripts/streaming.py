@@ -0,0 +1,269 @@
+import bisect
+from collections import deque
+import numpy as np
+import pandas as pd
+from detections import Zones, Pivots, FVGs
+
+# Incremental version of the detectors in utils.py for live scanning: feed one closed bar at a time
+# and the FVGs, major highs and lows, demand/supply zones and zone invalidations are updated from
+# the new bar alone instead of rerunning the pipeline over the whole window.
+#
+#   detector = StreamingDetector.from_frame(tickerData)
+#   for event, kind, position in detector.update(timestamp, open_, high, low, close, volume):
+#       ...
+#
+# After every update the results equal those of the full detectors on all bars received so far.
+# Some results settle late, exactly as they would in a full recompute: a pivot is confirmed
+# `window` bars after it, an FVG once its third candle closes and a zone once candles_count
+# candles follow it and its bullish (bearish) signal has been seen.
+
+
+class _WindowExtremum:
+    """Maximum (sign=1) or minimum (sign=-1) of a sliding window of bars, ignoring NaN like np.fmax."""
+
+    def __init__(self, sign):
+        self.sign = sign
+        self.items = deque()  # (position, sign * value), values decreasing from left to right
+
+    def push(self, position, value):
+        if value != value:
+            return
+        value *= self.sign
+        while self.items and self.items[-1][1] <= value:
+            self.items.pop()
+        self.items.append((position, value))
+
+    def drop_before(self, position):
+        while self.items and self.items[0][0] < position:
+            self.items.popleft()
+
+    def beaten_by(self, value):
+        """Check whether value is strictly beyond every value in the window; False for an empty window."""
+        return bool(self.items) and self.sign * value > self.items[0][1]
+
+
+class _ZoneCheck:
+    """A zone candle waiting for the bars that decide whether it is a zone."""
+
+    __slots__ = ('kind', 'pivot', 'offset', 'position')
+
+    def __init__(self, kind, pivot, offset):
+        self.kind = kind
+        self.pivot = pivot
+        self.offset = offset
+        self.position = pivot + offset
+
+
+class StreamingDetector:
+    """Per-ticker detector updated one bar at a time; each update costs O(1) amortized.
+
+    Args:
+        window (int): Pivot window, as in identify_major_highs_lows.
+        candles_count (int): Candles required around a zone, as in identify_demand_zones.
+    """
+
+    def __init__(self, window=5, candles_count=10):
+        self.window = window
+        self.candles_count = candles_count
+        self.timestamps, self.open, self.high, self.low, self.close, self.volume = [], [], [], [], [], []
+        self.boring, self.exciting, self.bullish = [], [], []
+        self.bullish_fvg, self.bearish_fvg = [], []
+        self.fvg_starts, self.fvg_directions = [], []
+        self.major_highs, self.major_lows = [], []
+        self._high_before, self._high_after = _WindowExtremum(1), _WindowExtremum(1)
+        self._low_before, self._low_after = _WindowExtremum(-1), _WindowExtremum(-1)
+        # Bars waiting for a later close below (rising) or above (falling) theirs, as in next_breaks
+        self._rising, self._falling = [], []
+        self.next_lower, self.next_higher = [], []
+        self._pending = []
+        # (pivot, offset, position) of every zone candidate in the order the full detectors list them
+        self._zones = {'demand': [], 'supply': []}
+        self._zone_positions = {'demand': set(), 'supply': set()}
+
+    @classmethod
+    def from_frame(cls, tickerData, window=5, candles_count=10):
+        """Create a detector primed with the bars of tickerData."""
+        detector = cls(window, candles_count)
+        detector.extend(tickerData)
+        return detector
+
+    def __len__(self):
+        return len(self.close)
+
+    def extend(self, tickerData):
+        """Feed the bars of tickerData in order and return the events of all of them."""
+        timestamps = pd.DatetimeIndex(tickerData.index).as_unit('ns').asi8
+        columns = (tickerData[column].to_numpy(dtype=np.float64) for column in ('Open', 'High', 'Low', 'Close', 'Volume'))
+        events = []
+        for bar in zip(timestamps.tolist(), *(values.tolist() for values in columns)):
+            events.extend(self.update(*bar))
+        return events
+
+    def update(self, timestamp, open_, high, low, close, volume=np.nan):
+        """Add the next closed bar.
+
+        Args:
+            timestamp: The bar's time, as a datetime or UTC epoch ns.
+
+        Returns:
+            list: (event, kind, position) for what this bar settled: ('fvg', 'bullish'|'bearish', start),
+                  ('pivot', 'high'|'low', position), ('zone', 'demand'|'supply', position) for a new
+                  valid zone and ('invalidated', 'demand'|'supply', position) for a zone closed through.
+        """
+        if not isinstance(timestamp, int):
+            timestamp = pd.Timestamp(timestamp).as_unit('ns').value
+        j = len(self.close)
+        self.timestamps.append(timestamp)
+        self.open.append(float(open_))
+        self.high.append(float(high))
+        self.low.append(float(low))
+        self.close.append(float(close))
+        self.volume.append(float(volume))
+
+        body = abs(open_ - close)
+        half_range = 0.5 * abs(high - low)
+        self.boring.append(body <= half_range)
+        self.exciting.append(body >= half_range)
+        self.bullish.append(close > open_)
+
+        events = []
+        self._update_fvgs(j, events)
+        self._update_breaks(j, events)
+        self._update_pivots(j, events)
+        self._update_zones(j + 1, events)
+        return events
+
+    def _update_fvgs(self, j, events):
+        """Settle the gap whose third candle is bar j; its middle candle is flagged."""
+        self.bullish_fvg.append(False)
+        self.bearish_fvg.append(False)
+        if j < 2:
+            return
+        middle = j - 1
+        self.bullish_fvg[middle] = self.high[j - 2] < self.low[j]
+        self.bearish_fvg[middle] = self.low[j - 2] > self.high[j]
+        if self.bullish_fvg[middle] or self.bearish_fvg[middle]:
+            direction = 1 if self.bullish_fvg[middle] else -1
+            self.fvg_starts.append(middle - 1)
+            self.fvg_directions.append(direction)
+            events.append(('fvg', 'bullish' if direction > 0 else 'bearish', middle - 1))
+
+    def _update_breaks(self, j, events):
+        """Resolve the earlier bars whose close bar j breaks, invalidating the zones on them."""
+        self.next_lower.append(-1)
+        self.next_higher.append(-1)
+        value = self.close[j]
+        if value != value:
+            return
+        while self._rising and self.close[self._rising[-1]] > value:
+            position = self._rising.pop()
+            self.next_lower[position] = j
+            if position in self._zone_positions['demand']:
+                events.append(('invalidated', 'demand', position))
+        while self._falling and self.close[self._falling[-1]] < value:
+            position = self._falling.pop()
+            self.next_higher[position] = j
+            if position in self._zone_positions['supply']:
+                events.append(('invalidated', 'supply', position))
+        self._rising.append(j)
+        self._falling.append(j)
+
+    def _update_pivots(self, j, events):
+        """Confirm or reject the pivot candidate `window` bars before bar j."""
+        window = self.window
+        self._high_after.push(j, self.high[j])
+        self._low_after.push(j, self.low[j])
+        i = j - window
+        if window < 1 or i < 0:
+            return
+        self._high_after.drop_before(i + 1)
+        self._low_after.drop_before(i + 1)
+        if i >= 1:
+            self._high_before.push(i - 1, self.high[i - 1])
+            self._low_before.push(i - 1, self.low[i - 1])
+        self._high_before.drop_before(i - window)
+        self._low_before.drop_before(i - window)
+        if i < window:
+            return
+
+        high, low = self.high[i], self.low[i]
+        if self._high_before.beaten_by(high) and self._high_after.beaten_by(high):
+            self.major_highs.append(i)
+            events.append(('pivot', 'high', i))
+            self._add_zone_checks('supply', i)
+        if self._low_before.beaten_by(low) and self._low_after.beaten_by(low):
+            self.major_lows.append(i)
+            events.append(('pivot', 'low', i))
+            self._add_zone_checks('demand', i)
+
+    def _add_zone_checks(self, kind, pivot):
+        # A pivot needs candles_count candles before it; the ones after it are awaited in _update_zones
+        if pivot > self.candles_count - 1:
+            self._pending.extend(_ZoneCheck(kind, pivot, offset) for offset in range(3))
+
+    def _zone_status(self, check, n):
+        """Return True for a zone, False for a rejected candle and None while bars are missing."""
+        position = check.position
+        if position >= n:
+            return None
+        if not self.boring[position] or not any(self.exciting[max(position - 2, 0):position]):
+            return False
+
+        if check.kind == 'demand':
+            move = any(self.exciting[i] and self.bullish[i] for i in range(position + 1, min(position + 6, n)))
+            gap = any(self.bullish_fvg[position + 1:min(position + 5, n)])
+        else:
+            move = any(self.exciting[i] and not self.bullish[i] for i in range(position + 1, min(position + 6, n)))
+            gap = any(self.bearish_fvg[position + 1:min(position + 5, n)])
+        if move or gap:
+            return True if position + self.candles_count < n else None
+        # The signal window is complete once bar position + 5 has closed
+        return False if n >= position + 6 else None
+
+    def _update_zones(self, n, events):
+        """Settle the pending zone candles that the first n bars decide."""
+        pending = []
+        for check in self._pending:
+            status = self._zone_status(check, n)
+            if status is None:
+                pending.append(check)
+            elif status:
+                bisect.insort(self._zones[check.kind], (check.pivot, check.offset, check.position))
+                self._zone_positions[check.kind].add(check.position)
+                if self._invalidated_at(check.kind, check.position) < 0:
+                    events.append(('zone', check.kind, check.position))
+        self._pending = pending
+
+    def _invalidated_at(self, kind, position):
+        return self.next_lower[position] if kind == 'demand' else self.next_higher[position]
+
+    def _zone_positions_array(self, kind):
+        return np.array([position for _, _, position in self._zones[kind]], dtype=np.int64)
+
+    def fvgs(self):
+        """Return the FVGs settled so far, as identify_fvg returns them."""
+        start = np.array(self.fvg_starts, dtype=np.int64)
+        direction = np.array(self.fvg_directions, dtype=np.int8)
+        high, low = np.array(self.high), np.array(self.low)
+        return FVGs(start, direction, np.where(direction > 0, high[start], high[start + 2]),
+                    np.where(direction > 0, low[start + 2], low[start]), np.array(self.timestamps, dtype=np.int64)[start])
+
+    def pivots(self):
+        """Return (major_highs, major_lows) confirmed so far, as identify_major_highs_lows returns them."""
+        timestamps = np.array(self.timestamps, dtype=np.int64)
+        highs = np.array(self.major_highs, dtype=np.int64)
+        lows = np.array(self.major_lows, dtype=np.int64)
+        return (Pivots('high', highs, timestamps[highs], np.array(self.high)[highs]),
+                Pivots('low', lows, timestamps[lows], np.array(self.low)[lows]))
+
+    def zone_history(self, kind):
+        """Return every zone found so far with the bar that invalidated it, as identify_*_zone_history does."""
+        positions = self._zone_positions_array(kind)
+        breaks = np.array(self.next_lower if kind == 'demand' else self.next_higher, dtype=np.int64)
+        return Zones(kind, positions, np.array(self.timestamps, dtype=np.int64)[positions],
+                     np.array(self.low)[positions], np.array(self.high)[positions],
+                     np.array(self.close)[positions], breaks[positions])
+
+    def zones(self, kind):
+        """Return the zones that are still valid, as identify_demand_zones / identify_supply_zones do."""
+        return self.zone_history(kind).valid()
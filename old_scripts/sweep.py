@@ -0,0 +1,150 @@
+import os
+import itertools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import backend
+from kernels import ZONE_OK
+from zone_index import ZoneIndex
+
+# Parameter sweeps for the zone scan. Every grid cell runs the same checks as long_nse200_1d_180.py
+# (pivots, demand/supply zones, closest zones, the proximity conditions on the last candle) with its
+# own settings. Everything that does not depend on the settings - candle bodies and ranges, FVG
+# flags, suffix extrema - is computed once per ticker and shared by all cells, and the pivots once
+# per window. Tickers (and, for small universes, slices of the grid) run in a process pool.
+
+# Settings of the scanners today; a grid overrides any of them
+DEFAULT_PARAMETERS = {
+    'window': 5,              # identify_major_highs_lows
+    'candles_count': 10,      # identify_demand_zones / identify_supply_zones
+    'boring_ratio': 0.5,      # boring: body <= ratio * (High - Low)
+    'exciting_ratio': 0.5,    # exciting: body >= ratio * (High - Low)
+    'demand_proximity': 1.025,  # last Low at most this multiple of the closest demand zone's High
+    'supply_proximity': 0.95,   # last High below this multiple of the closest supply zone's Low
+}
+
+
+def parameter_grid(**values):
+    """Return every combination of the given parameter values, completed with DEFAULT_PARAMETERS.
+
+    Example: parameter_grid(window=[3, 5, 8], candles_count=[5, 10]) gives 6 settings.
+    """
+    unknown = set(values) - set(DEFAULT_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    names = list(values)
+    return [dict(DEFAULT_PARAMETERS, **dict(zip(names, combination)))
+            for combination in itertools.product(*(values[name] for name in names))]
+
+
+def precompute(tickerData):
+    """Compute the arrays every grid cell of a ticker shares."""
+    kernels = backend.kernels()
+    open_, high, low, close = (tickerData[column].to_numpy(dtype=np.float64) for column in ('Open', 'High', 'Low', 'Close'))
+    bullish_fvg, bearish_fvg = kernels.fvg_flags(high, low)
+    suffix_min, suffix_max = kernels.suffix_extrema(close)
+    with np.errstate(invalid='ignore'):
+        bullish = close > open_
+    return {
+        'high': high, 'low': low, 'close': close,
+        'body': np.abs(open_ - close), 'range': np.abs(high - low), 'bullish': bullish,
+        'bullish_fvg': bullish_fvg, 'bearish_fvg': bearish_fvg,
+        'suffix_min': suffix_min, 'suffix_max': suffix_max,
+    }
+
+
+def _zones(shared, pivots, boring, move, gap, exciting, candles_count, kind):
+    """Return the positions of the valid zones, as identify_demand_zones / identify_supply_zones do."""
+    checked, status = backend.kernels().zone_candidates(pivots, boring, move, gap, exciting, candles_count)
+    positions = checked[status == ZONE_OK]
+    close = shared['close'][positions]
+    with np.errstate(invalid='ignore'):
+        if kind == 'demand':
+            closed_through = shared['suffix_min'][positions + 1] < close
+        else:
+            closed_through = shared['suffix_max'][positions + 1] > close
+    return positions[~closed_through]
+
+
+def evaluate(shared, pivots, parameters):
+    """Run the scan of one grid cell on a ticker's shared arrays and (major_highs, major_lows)."""
+    body, candle_range, bullish = shared['body'], shared['range'], shared['bullish']
+    with np.errstate(invalid='ignore'):
+        # As kernels.candle_flags, with the ratios of the cell instead of 0.5
+        boring = body <= parameters['boring_ratio'] * candle_range
+        exciting = body >= parameters['exciting_ratio'] * candle_range
+    major_highs, major_lows = pivots
+    candles_count = parameters['candles_count']
+    demand = _zones(shared, major_lows, boring, exciting & bullish, shared['bullish_fvg'], exciting,
+                    candles_count, 'demand')
+    supply = _zones(shared, major_highs, boring, exciting & ~bullish, shared['bearish_fvg'], exciting,
+                    candles_count, 'supply')
+
+    high, low, close = shared['high'], shared['low'], shared['close']
+    closest_demand = ZoneIndex(low[demand], demand).nearest(close[-1])
+    closest_supply = ZoneIndex(high[supply], supply).nearest(close[-1])
+    demand_met = (closest_demand is not None
+                  and high[closest_demand] < low[-1] <= high[closest_demand] * parameters['demand_proximity'])
+    supply_met = (closest_supply is not None
+                  and high[-1] < low[closest_supply] * parameters['supply_proximity'])
+    return {
+        'major_highs': len(major_highs),
+        'major_lows': len(major_lows),
+        'demand_zones': len(demand),
+        'supply_zones': len(supply),
+        'closest_demand': -1 if closest_demand is None else closest_demand,
+        'closest_supply': -1 if closest_supply is None else closest_supply,
+        'demand_met': bool(demand_met),
+        'supply_met': bool(supply_met),
+        'signal': bool(demand_met and supply_met),
+    }
+
+
+def sweep_ticker(ticker, tickerData, grid):
+    """Evaluate every grid cell on one ticker and return one result row per cell."""
+    if tickerData.empty:
+        return []
+    shared = precompute(tickerData)
+    pivots = {}
+    rows = []
+    for parameters in grid:
+        window = parameters['window']
+        if window not in pivots:
+            pivots[window] = backend.kernels().pivot_positions(shared['high'], shared['low'], window)
+        rows.append(dict(ticker=ticker, **parameters, **evaluate(shared, pivots[window], parameters)))
+    return rows
+
+
+def _sweep_job(job):
+    ticker, tickerData, grid = job
+    return sweep_ticker(ticker, tickerData, grid)
+
+
+def sweep(frames, grid, processes=None):
+    """Run a parameter sweep over a universe.
+
+    Args:
+        frames (dict): {ticker: bars DataFrame}, as returned by market_data.get_many_bars.
+        grid (list): Parameter settings, see parameter_grid.
+        processes (int): Worker processes; defaults to the CPU count, 1 runs in this process.
+
+    Returns:
+        pd.DataFrame: One row per (ticker, setting) with the settings and the scan's results.
+    """
+    frames = {ticker: tickerData[['Open', 'High', 'Low', 'Close']] for ticker, tickerData in frames.items()
+              if not tickerData.empty}
+    if processes == 1 or len(frames) * len(grid) <= 1:
+        rows = [row for ticker, tickerData in frames.items() for row in sweep_ticker(ticker, tickerData, grid)]
+        return pd.DataFrame(rows)
+
+    # One job per ticker; with fewer tickers than workers the grid is split too
+    workers = processes or os.cpu_count() or 1
+    slices = min(len(grid), max(1, -(-workers // len(frames))))
+    size = -(-len(grid) // slices)
+    jobs = [(ticker, tickerData, grid[first:first + size])
+            for ticker, tickerData in frames.items() for first in range(0, len(grid), size)]
+    logging.info(f"Sweeping {len(grid)} settings over {len(frames)} tickers in {len(jobs)} jobs")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rows = [row for result in pool.map(_sweep_job, jobs) for row in result]
+    return pd.DataFrame(rows)
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+import pandas as pd
+import logging
+import os
+import sys
+from sweep import parameter_grid, sweep
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from market_data import get_many_bars
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Settings to compare <----------------------------------------------------------------------------
+grid = parameter_grid(
+    window=[3, 5, 8],
+    candles_count=[5, 10, 15],
+    boring_ratio=[0.4, 0.5],
+    exciting_ratio=[0.5, 0.6],
+    demand_proximity=[1.025, 1.05],
+    supply_proximity=[0.95, 0.9],
+)
+
+# The process pool re-imports this script in its workers on some platforms
+if __name__ == '__main__':
+    # Read ticker symbols from NSE200.csv without a header
+    tickerSymbols = pd.read_csv('NSE200.csv', header=None)[0].tolist()
+
+    endDate = datetime.now()
+    startDate = endDate - timedelta(days=180)
+    frames = get_many_bars(tickerSymbols, '1d', startDate, endDate)
+
+    results = sweep(frames, grid)
+    if results.empty:
+        print("No data available for the sweep.")
+        sys.exit()
+
+    output_csv_path = 'sweep_nse200_1d.csv'
+    results.to_csv(output_csv_path, index=False)
+    print(f"{len(results)} results saved to {output_csv_path}")
+
+    # Signals per setting, most first
+    summary = results.groupby(list(grid[0]))['signal'].sum().sort_values(ascending=False)
+    print(summary.head(20))
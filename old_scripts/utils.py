@@ -1,6 +1,13 @@
 import numpy as np
-import pandas as pd
 import logging
+import zone_trace
+from zone_index import ZoneIndex
+from detections import Zones, Pivots, FVGs
+import backend
+from kernels import ZONE_OK, ZONE_NOT_BORING, ZONE_NO_SIGNAL
+
+# Trend values returned by identify_trend
+TREND_DOWN, TREND_SIDE, TREND_UP = -1, 0, 1
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -12,234 +19,173 @@ def calculate_body_and_shadow(tickerData):
     tickerData['Upper Shadow'] = tickerData['High'] - tickerData[['Open', 'Close']].max(axis=1)
     return tickerData
 
-def identify_fvg(tickerData):
-    """Identify Fair Value Gaps (FVG) in the data."""
-    fvg_list = []
-    for i in range(1, len(tickerData) - 1):
-        first_candle = tickerData.iloc[i - 1]
-        third_candle = tickerData.iloc[i + 1]
-        
-        if first_candle['High'] < third_candle['Low']:
-            fvg_list.append((i - 1, i + 1, 'Bullish'))
-            
-        if first_candle['Low'] > third_candle['High']:
-            fvg_list.append((i - 1, i + 1, 'Bearish'))
-    
-    return fvg_list
+def identify_fvg(tickerData, candles=None):
+    """Identify Fair Value Gaps (FVG) in the data.
+
+    Args:
+        candles (dict): Optional classify_candles result for tickerData, to reuse its FVG flags.
+
+    Returns:
+        FVGs: The gaps with their bounds; iterating yields (start, end, 'Bullish'|'Bearish') position tuples.
+    """
+    if candles is None:
+        return FVGs.from_flags(tickerData, *identify_fvg_flags(tickerData))
+    return FVGs.from_flags(tickerData, candles['bullish_fvg'], candles['bearish_fvg'])
+
+
+def identify_fvg_flags(tickerData):
+    """Return (bullish, bearish) boolean arrays flagging the middle candle of each FVG."""
+    return backend.kernels().fvg_flags(tickerData['High'].to_numpy(dtype=np.float64),
+                                       tickerData['Low'].to_numpy(dtype=np.float64))
+
+
+def classify_candles(tickerData):
+    """Classify all candles once for the zone detectors and charts.
+
+    Pass the result as `candles` to identify_fvg, the zone detectors and plot_chart so a frame is
+    classified only once.
+
+    Returns:
+        dict: 'boring', 'exciting' and 'bullish' boolean arrays, the vectorized equivalents of
+              is_boring_candle, is_exciting_candle and its 'Bullish' type, and the
+              'bullish_fvg' and 'bearish_fvg' flags of identify_fvg_flags.
+    """
+    columns = (tickerData[column].to_numpy(dtype=np.float64) for column in ('Open', 'High', 'Low', 'Close'))
+    boring, exciting, bullish = backend.kernels().candle_flags(*columns)
+    bullish_fvg, bearish_fvg = identify_fvg_flags(tickerData)
+    return {'boring': boring, 'exciting': exciting, 'bullish': bullish,
+            'bullish_fvg': bullish_fvg, 'bearish_fvg': bearish_fvg}
 
 
 def identify_major_highs_lows(tickerData, window=5):
-    major_highs = []
-    major_lows = []
+    """Identify swing highs and lows: candles whose High (Low) is strictly above (below) the High (Low)
+    of the `window` candles on either side.
 
-    for i in range(window, len(tickerData) - window):
-        current_high = tickerData.iloc[i]['High']
-        current_low = tickerData.iloc[i]['Low']
-        
-        preceding_highs = tickerData.iloc[i - window:i]['High']
-        following_highs = tickerData.iloc[i + 1:i + 1 + window]['High']
-        preceding_lows = tickerData.iloc[i - window:i]['Low']
-        following_lows = tickerData.iloc[i + 1:i + 1 + window]['Low']
-        
-        if current_high > preceding_highs.max() and current_high > following_highs.max():
-            major_highs.append(i)
-        
-        if current_low < preceding_lows.min() and current_low < following_lows.min():
-            major_lows.append(i)
-    
-    return major_highs, major_lows
+    Returns:
+        tuple: (major_highs, major_lows) as Pivots, which iterate and convert to NumPy like position arrays.
+    """
+    highs, lows = backend.kernels().pivot_positions(tickerData['High'].to_numpy(dtype=np.float64),
+                                                    tickerData['Low'].to_numpy(dtype=np.float64), window)
+    return Pivots.from_positions('high', tickerData, highs), Pivots.from_positions('low', tickerData, lows)
 
 def identify_bos(tickerData, major_highs, major_lows):
-    bos_list = []
-
-    for i in range(1, len(tickerData)):
-        current_candle = tickerData.iloc[i]
-
-        for high_index in major_highs:
-            if i > high_index:
-                major_high_value = tickerData.iloc[high_index]['High']
-                if current_candle['Open'] < major_high_value and current_candle['Close'] > major_high_value:
-                    bos_list.append((i, 'Bullish'))
-                    break
-
-        for low_index in major_lows:
-            if i > low_index:
-                major_low_value = tickerData.iloc[low_index]['Low']
-                if current_candle['Open'] > major_low_value and current_candle['Close'] < major_low_value:
-                    bos_list.append((i, 'Bearish'))
-                    break
-    
-    return bos_list
+    """Identify breaks of structure as (position, 'Bullish'|'Bearish') tuples; see identify_bos_arrays."""
+    positions, directions, _ = identify_bos_arrays(tickerData, major_highs, major_lows)
+    return [(i, 'Bullish' if direction > 0 else 'Bearish') for i, direction in zip(positions.tolist(), directions.tolist())]
+
 
+def identify_bos_arrays(tickerData, major_highs, major_lows):
+    """Identify breaks of structure: candles that open below and close above an earlier major high
+    (bullish) or open above and close below an earlier major low (bearish).
 
-def identify_demand_zones(tickerData, major_lows, candles_count, comparison_multiplier):
+    Returns:
+        tuple: (positions, directions, pivots) NumPy arrays; direction is 1 for bullish and -1 for
+               bearish, pivot is the first listed major high/low the candle broke.
+    """
+    return backend.kernels().bos_events(tickerData['Open'].to_numpy(dtype=np.float64),
+                                        tickerData['Close'].to_numpy(dtype=np.float64),
+                                        tickerData['High'].to_numpy(dtype=np.float64),
+                                        tickerData['Low'].to_numpy(dtype=np.float64), major_highs, major_lows)
+
+
+def _zone_candidates(tickerData, pivots, candles_count, side, candles=None):
+    """Run the zone candidate checks of the selected kernel backend for one side ('demand' or 'supply')."""
+    # Classify all candles for the boring and exciting candle checks unless the caller already did
+    if candles is None:
+        candles = classify_candles(tickerData)
+    if side == 'demand':
+        move, gap = candles['exciting'] & candles['bullish'], candles['bullish_fvg']
+    else:
+        move, gap = candles['exciting'] & ~candles['bullish'], candles['bearish_fvg']
+
+    checked, status = backend.kernels().zone_candidates(np.asarray(pivots, dtype=np.int64), candles['boring'],
+                                                        move, gap, candles['exciting'], candles_count)
+    if zone_trace.active:
+        for current_pos, code in zip(checked.tolist(), status.tolist()):
+            if code == ZONE_NOT_BORING:
+                zone_trace.emit('zone_skip', side=side, pos=current_pos, reason='not boring',
+                                candle=tickerData.iloc[current_pos].to_dict())
+            elif code == ZONE_NO_SIGNAL:
+                zone_trace.emit('zone_skip', side=side, pos=current_pos, reason='no valid signal',
+                                signal_right=bool(move[current_pos + 1:current_pos + 6].any()
+                                                  or gap[current_pos + 1:current_pos + 5].any()),
+                                exciting_left=bool(candles['exciting'][max(current_pos - 2, 0):current_pos].any()))
+
+    return checked[status == ZONE_OK].tolist()
+
+def find_demand_zone_candidates(tickerData, major_lows, candles_count, candles=None):
+    """Return the positions of boring candles at or just after a major low that have a bullish exciting
+    candle or bullish FVG after them and an exciting candle to their left, whether or not price has
+    since closed below them."""
+    return _zone_candidates(tickerData, major_lows, candles_count, 'demand', candles)
+
+def identify_demand_zones(tickerData, major_lows, candles_count, comparison_multiplier, candles=None):
     """Identify demand zones based on major lows and absolute differences, with customizable parameters for analysis,
-    ensuring no candle to the right has a low lower than the high of the demand zone candle."""
+    ensuring no candle to the right closes lower than the close of the demand zone candle."""
     demand_zones = []
-
-    # Calculate average body size and volume for boring candle detection
-    average_body_size = calculate_average_body_size(tickerData)
-    average_volume = calculate_average_volume(tickerData)
-
-    for low_pos in major_lows:
-        # Ensure there are enough candles before and after the major low
-        if low_pos > candles_count - 1 and low_pos < len(tickerData) - candles_count:
-            for offset in range(3):  # Check the major low and the next 2 candles
-                current_pos = low_pos + offset
-                if current_pos >= len(tickerData):
-                    break
-
-                candle = tickerData.iloc[current_pos]
-                logging.debug(f"Checking major low at position {current_pos}: {candle.to_dict()}")
-                # Check if the major low is not a boring candle
-                if not is_boring_candle(candle, average_body_size, average_volume):
-                    logging.info(f"Skipping non-boring candle at position {current_pos}: {candle.to_dict()}")
-                    continue  # Skip this major low if it is not a boring candle
-
-                has_bullish_signal = False
-
-                # Check if at least one of the next few candles is a bullish exciting candle or a bullish FVG
-                for i in range(1, 6):
-                    if current_pos + i < len(tickerData):
-                        next_candle = tickerData.iloc[current_pos + i]
-                        is_exciting, candle_type = is_exciting_candle(next_candle, average_body_size, average_volume)
-                        if is_exciting and candle_type == 'Bullish':
-                            has_bullish_signal = True
-                            break
-
-                # Check for bullish FVG in the next few candles
-                if not has_bullish_signal:
-                    fvg_list = identify_fvg(tickerData.iloc[current_pos:current_pos + 6])
-                    for fvg in fvg_list:
-                        if fvg[2] == 'Bullish':
-                            has_bullish_signal = True
-                            break
-
-                # Compulsory check for an exciting candle in the couple of candles to the immediate left
-                has_exciting_left = False
-                for i in range(1, 3):
-                    if current_pos - i >= 0:
-                        prev_candle = tickerData.iloc[current_pos - i]
-                        is_exciting, _ = is_exciting_candle(prev_candle, average_body_size, average_volume)
-                        if is_exciting:
-                            has_exciting_left = True
-                            break
-
-                if not has_bullish_signal or not has_exciting_left:
-                    logging.info(f"No valid signal found around position {current_pos}")
-                    continue  # Skip this major low if no valid signal is found
-
-                logging.debug(f"Processing major low at position {current_pos}: {candle.to_dict()}")
-                # Get the 'Low' of the candle 'candles_count' positions before the major low
-                pre_low = tickerData.iloc[current_pos - candles_count]['Low']
-                # Ensure the 'Low' of the candle 'candles_count' positions after the major low is within bounds
-                if current_pos + candles_count < len(tickerData):
-                    post_low = tickerData.iloc[current_pos + candles_count]['Low']
-                else:
-                    continue  # Skip if out of bounds
-                # Get the 'High' of the demand zone candle (major low candle)
-                demand_zone_high = candle['High']
-
-                # Check for any candle to the right with a close lower than the close of the demand zone candle
-                invalid_zone = False
-                for i in range(current_pos + 1, len(tickerData)):
-                    if tickerData.iloc[i]['Close'] < candle['Close']:
-                        invalid_zone = True
-                        break
-
-                if not invalid_zone:
-                    demand_zones.append(current_pos)
-                    logging.info(f"Demand zone identified at position {current_pos}: {candle.to_dict()}, "
-                                 f"Average body size: {average_body_size}, Average volume: {average_volume}, "
-                                 f"Body size: {abs(candle['Open'] - candle['Close'])}, Volume: {candle['Volume']}")
+    close = tickerData['Close'].to_numpy(dtype=np.float64)
+    suffix_min, _ = backend.kernels().suffix_extrema(close)
+
+    for current_pos in find_demand_zone_candidates(tickerData, major_lows, candles_count, candles):
+        # The zone is invalid once any candle to the right closes lower than the demand zone candle
+        if not suffix_min[current_pos + 1] < close[current_pos]:
+            demand_zones.append(current_pos)
+            if zone_trace.active:
+                zone_trace.emit('zone', side='demand', pos=current_pos, candle=tickerData.iloc[current_pos].to_dict())
+        elif zone_trace.active:
+            zone_trace.emit('zone_skip', side='demand', pos=current_pos, reason='closed below since')
 
     if not demand_zones:
         logging.info("No demand zones were identified.")
-    return demand_zones
+    return Zones.from_positions('demand', tickerData, demand_zones)
+
+def identify_demand_zone_history(tickerData, major_lows, candles_count, comparison_multiplier, candles=None):
+    """Return every demand zone candidate with the candle that invalidated it.
+
+    Returns:
+        Zones: All candidates; invalidated_at is the first later candle closing below the zone
+               candle's close, or -1 for zones that are still valid.
+    """
+    positions = np.asarray(find_demand_zone_candidates(tickerData, major_lows, candles_count, candles), dtype=np.int64)
+    next_lower, _ = backend.kernels().next_breaks(tickerData['Close'].to_numpy(dtype=np.float64))
+    return Zones.from_positions('demand', tickerData, positions, next_lower[positions])
 
-def identify_supply_zones(tickerData, major_highs, candles_count, comparison_multiplier):
+def find_supply_zone_candidates(tickerData, major_highs, candles_count, candles=None):
+    """Return the positions of boring candles at or just after a major high that have a bearish exciting
+    candle or bearish FVG after them and an exciting candle to their left, whether or not price has
+    since closed above them."""
+    return _zone_candidates(tickerData, major_highs, candles_count, 'supply', candles)
+
+def identify_supply_zones(tickerData, major_highs, candles_count, comparison_multiplier, candles=None):
     """Identify supply zones based on major highs and absolute differences, with customizable parameters for analysis,
-    ensuring no candle to the right has a high higher than the low of the supply zone candle."""
+    ensuring no candle to the right closes higher than the close of the supply zone candle."""
     supply_zones = []
-
-    # Calculate average body size and volume for boring candle detection
-    average_body_size = calculate_average_body_size(tickerData)
-    average_volume = calculate_average_volume(tickerData)
-
-    for high_pos in major_highs:
-        # Ensure there are enough candles before and after the major high
-        if high_pos > candles_count - 1 and high_pos < len(tickerData) - candles_count:
-            for offset in range(3):  # Check the major high and the next 2 candles
-                current_pos = high_pos + offset
-                if current_pos >= len(tickerData):
-                    break
-
-                candle = tickerData.iloc[current_pos]
-                logging.debug(f"Checking major high at position {current_pos}: {candle.to_dict()}")
-                # Check if the major high is not a boring candle
-                if not is_boring_candle(candle, average_body_size, average_volume):
-                    logging.info(f"Skipping non-boring candle at position {current_pos}: {candle.to_dict()}")
-                    continue  # Skip this major high if it is not a boring candle
-
-                has_bearish_signal = False
-
-                # Check if at least one of the next few candles is a bearish exciting candle or a bearish FVG
-                for i in range(1, 6):
-                    if current_pos + i < len(tickerData):
-                        next_candle = tickerData.iloc[current_pos + i]
-                        is_exciting, candle_type = is_exciting_candle(next_candle, average_body_size, average_volume)
-                        if is_exciting and candle_type == 'Bearish':
-                            has_bearish_signal = True
-                            break
-
-                # Check for bearish FVG in the next few candles
-                if not has_bearish_signal:
-                    fvg_list = identify_fvg(tickerData.iloc[current_pos:current_pos + 6])
-                    for fvg in fvg_list:
-                        if fvg[2] == 'Bearish':
-                            has_bearish_signal = True
-                            break
-
-                # Compulsory check for an exciting candle in the couple of candles to the immediate left
-                has_exciting_left = False
-                for i in range(1, 3):
-                    if current_pos - i >= 0:
-                        prev_candle = tickerData.iloc[current_pos - i]
-                        is_exciting, _ = is_exciting_candle(prev_candle, average_body_size, average_volume)
-                        if is_exciting:
-                            has_exciting_left = True
-                            break
-
-                if not has_bearish_signal or not has_exciting_left:
-                    logging.info(f"No valid signal found around position {current_pos}")
-                    continue  # Skip this major high if no valid signal is found
-
-                logging.debug(f"Processing major high at position {current_pos}: {candle.to_dict()}")
-                # Get the 'High' of the candle 'candles_count' positions before the major high
-                pre_high = tickerData.iloc[current_pos - candles_count]['High']
-                # Ensure the 'High' of the candle 'candles_count' positions after the major high is within bounds
-                if current_pos + candles_count < len(tickerData):
-                    post_high = tickerData.iloc[current_pos + candles_count]['High']
-                else:
-                    continue  # Skip if out of bounds
-                # Get the 'Low' of the supply zone candle (major high candle)
-                supply_zone_low = candle['Low']
-
-                # Check for any candle to the right with a close higher than the high of the supply zone candle
-                invalid_zone = False
-                for i in range(current_pos + 1, len(tickerData)):
-                    if tickerData.iloc[i]['Close'] > candle['Close']:
-                        invalid_zone = True
-                        break
-
-                if not invalid_zone:
-                    supply_zones.append(current_pos)
-                    logging.info(f"Supply zone identified at position {current_pos}: {candle.to_dict()}, "
-                                 f"Body size: {abs(candle['Open'] - candle['Close'])}, Volume: {candle['Volume']}")
+    close = tickerData['Close'].to_numpy(dtype=np.float64)
+    _, suffix_max = backend.kernels().suffix_extrema(close)
+
+    for current_pos in find_supply_zone_candidates(tickerData, major_highs, candles_count, candles):
+        # The zone is invalid once any candle to the right closes higher than the supply zone candle
+        if not suffix_max[current_pos + 1] > close[current_pos]:
+            supply_zones.append(current_pos)
+            if zone_trace.active:
+                zone_trace.emit('zone', side='supply', pos=current_pos, candle=tickerData.iloc[current_pos].to_dict())
+        elif zone_trace.active:
+            zone_trace.emit('zone_skip', side='supply', pos=current_pos, reason='closed above since')
 
     if not supply_zones:
         logging.info("No supply zones were identified.")
-    return supply_zones
+    return Zones.from_positions('supply', tickerData, supply_zones)
+
+def identify_supply_zone_history(tickerData, major_highs, candles_count, comparison_multiplier, candles=None):
+    """Return every supply zone candidate with the candle that invalidated it.
+
+    Returns:
+        Zones: All candidates; invalidated_at is the first later candle closing above the zone
+               candle's close, or -1 for zones that are still valid.
+    """
+    positions = np.asarray(find_supply_zone_candidates(tickerData, major_highs, candles_count, candles), dtype=np.int64)
+    _, next_higher = backend.kernels().next_breaks(tickerData['Close'].to_numpy(dtype=np.float64))
+    return Zones.from_positions('supply', tickerData, positions, next_higher[positions])
 
 def calculate_average_body_size(tickerData):
     """Calculate the average body size of the candles (absolute of open minus close)."""
@@ -271,10 +217,10 @@ def is_boring_candle(candle, average_body_size, average_volume):
     
     is_boring = (body_size <= 0.5 * high_low_diff)
 
-    logging.info(f"Checking candle at position: {candle.name}, Body size: {body_size}, "
-                 f"High-Low difference: {high_low_diff}, "
-                 f"Average body size: {average_body_size}, Average volume: {average_volume}, "
-                 f"Volume: {candle['Volume']}, Is boring: {is_boring}")
+    if zone_trace.active:
+        zone_trace.emit('boring_check', at=candle.name, body=body_size, range=high_low_diff,
+                        average_body=average_body_size, average_volume=average_volume,
+                        volume=candle['Volume'], boring=is_boring)
 
     return is_boring
 
@@ -312,12 +258,11 @@ def is_exciting_candle(candle, average_body_size, average_volume):
     else:
         candle_type = 'None'
 
-    logging.info(f"Checking candle at position: {candle.name}, Body size: {body_size}, "
-                 f"High-Low difference: {high_low_diff}, "
-                 f"Average body size: {average_body_size}, Average volume: {average_volume}, "
-                 f"Volume: {candle['Volume']}, Is volume exciting: {is_volume_exciting}, "
-                 f"Is body size exciting: {is_body_size_exciting}, Is body size greater than half of high-low difference: {is_body_size_greater_than_half_diff}, "
-                 f"Is exciting: {is_exciting}, Type: {candle_type}")
+    if zone_trace.active:
+        zone_trace.emit('exciting_check', at=candle.name, body=body_size, range=high_low_diff,
+                        average_body=average_body_size, average_volume=average_volume, volume=candle['Volume'],
+                        volume_exciting=is_volume_exciting, body_exciting=is_body_size_exciting,
+                        body_over_half_range=is_body_size_greater_than_half_diff, exciting=is_exciting, type=candle_type)
 
     return is_exciting, candle_type
 
@@ -326,55 +271,32 @@ def identify_trend(tickerData, major_highs, major_lows):
     
     Args:
         tickerData (pd.DataFrame): The ticker data.
-        major_highs (list): List of indices of major highs.
-        major_lows (list): List of indices of major lows.
+        major_highs (array-like): Positions of major highs.
+        major_lows (array-like): Positions of major lows.
         
     Returns:
-        list: A list of trends ('up', 'down', 'side') for each candle.
+        np.ndarray: int8 trend per candle, TREND_UP, TREND_DOWN or TREND_SIDE.
     """
-    trends = ['side'] * len(tickerData)  # Initialize all trends as 'side'
-    all_points = sorted(major_highs + major_lows)  # Combine and sort major highs and lows
-
-    for i in range(1, len(all_points)):
-        start = all_points[i - 1]
-        end = all_points[i]
-        if start in major_lows and end in major_highs:
-            trend = 'up'
-        elif start in major_highs and end in major_lows:
-            trend = 'down'
-        else:
-            trend = 'side'
-        
-        for j in range(start, end):
-            trends[j] = trend
+    return backend.kernels().trend_labels(tickerData['Close'].to_numpy(dtype=np.float64), major_highs, major_lows)
 
-    # Handle the segment from the last major high or low to the latest candle
-    if all_points:
-        last_point = all_points[-1]
-        for i in range(last_point, len(tickerData)):
-            if tickerData.iloc[i]['Close'] > tickerData.iloc[last_point]['Close']:
-                trends[i] = 'up'
-            elif tickerData.iloc[i]['Close'] < tickerData.iloc[last_point]['Close']:
-                trends[i] = 'down'
-            else:
-                trends[i] = 'side'
 
-    return trends
+def find_closest_zones(tickerData, demand_zones, supply_zones):
+    """Find the closest demand and supply zones to the last candle's close price.
 
+    Demand zones are compared by their Low and supply zones by their High; on a tie the zone listed
+    first wins. Build a ZoneIndex directly to query many prices against the same zones.
 
-def find_closest_zones(tickerData, demand_zones, supply_zones):
-    """Find the closest demand and supply zones to the last candle's close price."""
+    Returns:
+        tuple: The positions of the closest demand and supply zones, None where there are no zones
+               or the last close is NaN.
+    """
     last_close = tickerData.iloc[-1]['Close']
-    
-    closest_demand = None
-    closest_supply = None
-    
-    if demand_zones:
-        closest_demand = min(demand_zones, key=lambda pos: abs(tickerData.iloc[pos]['Low'] - last_close))
-    
-    if supply_zones:
-        closest_supply = min(supply_zones, key=lambda pos: abs(tickerData.iloc[pos]['High'] - last_close))
-    
+
+    demand_zones = Zones.coerce('demand', tickerData, demand_zones)
+    supply_zones = Zones.coerce('supply', tickerData, supply_zones)
+    closest_demand = ZoneIndex.from_zones(demand_zones).nearest(last_close)
+    closest_supply = ZoneIndex.from_zones(supply_zones).nearest(last_close)
+
     return closest_demand, closest_supply
 
 def calculate_split_lines(tickerData, demand_pos, supply_pos):
@@ -0,0 +1,174 @@
+import os
+import sys
+import itertools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from backtest import DEFAULT_RULES, TRADE_COLUMNS, backtest, trade_stats
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bar_store import DEFAULT_CACHE_ROOT, load_many_meta
+from market_data import load_window, update_sources
+
+# Walk-forward validation of the trade-tip rule. The history is cut into rolling folds of a train
+# window followed by a test window. On each fold and ticker the rules of a grid are backtested on
+# the train window, the best ones by `metric` are kept, and their trades with a signal inside the
+# test window are the fold's out-of-sample result. The test backtest runs on train + test bars so
+# its zones have history; the backtester never looks ahead, so the train bars cannot leak into it.
+#
+# Every (ticker, fold) is one job in a process pool. A job only carries the ticker and the fold's
+# dates: workers memory-map the columns of the shared bar store and read just the bars of their
+# window, so no bar data is pickled between processes.
+
+
+def rule_grid(**values):
+    """Return every combination of the given rule values, completed with backtest.DEFAULT_RULES.
+
+    Example: rule_grid(window=[3, 5], target_line=[1, 2]) gives 4 rule sets.
+    """
+    unknown = set(values) - set(DEFAULT_RULES)
+    if unknown:
+        raise ValueError(f"Unknown backtest rules: {sorted(unknown)}")
+    names = list(values)
+    return [dict(DEFAULT_RULES, **dict(zip(names, combination)))
+            for combination in itertools.product(*(values[name] for name in names))]
+
+
+def make_folds(start, end, train, test, step=None):
+    """Cut start..end into rolling walk-forward folds.
+
+    Args:
+        train, test (pd.Timedelta): Length of the train and test windows.
+        step (pd.Timedelta): Shift between consecutive folds; defaults to `test`, so the test
+                             windows follow each other without overlap.
+
+    Returns:
+        list: (train_start, test_start, test_end) per fold; the last test window ends at or before end.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    train, test = pd.Timedelta(train), pd.Timedelta(test)
+    step = test if step is None else pd.Timedelta(step)
+    folds = []
+    train_start = start
+    while train_start + train + test <= end:
+        folds.append((train_start, train_start + train, train_start + train + test))
+        train_start += step
+    return folds
+
+
+def _select(tickerData, grid, metric, min_trades):
+    """Return the rules of the grid with the best train `metric` and their train statistics, or (None, None)."""
+    best, best_stats = None, None
+    for rules in grid:
+        trades = backtest(tickerData, **rules)
+        closed = trades[trades['exit_reason'] != 'open']
+        if len(closed) < min_trades:
+            continue
+        stats = trade_stats(closed)
+        if best_stats is None or stats[metric] > best_stats[metric]:
+            best, best_stats = rules, stats
+    return best, best_stats
+
+
+def evaluate_fold(ticker, interval, source, fold, dates, grid, metric='total_return', min_trades=1,
+                  root=DEFAULT_CACHE_ROOT):
+    """Train and test the rules of one ticker on one fold, reading the bars from the bar store.
+
+    Returns:
+        tuple: (row, trades); row holds the fold's dates, the selected rules and the train and test
+               statistics, trades the test trades with a 'fold' column.
+    """
+    train_start, test_start, test_end = dates
+    row = {'ticker': ticker, 'fold': fold, 'train_start': train_start, 'test_start': test_start, 'test_end': test_end}
+    trainData = load_window(ticker, interval, source, train_start, test_start, root, mmap=True)
+    tickerData = load_window(ticker, interval, source, train_start, test_end, root, mmap=True)
+    if len(tickerData) <= len(trainData) or len(trainData) < 2:
+        return dict(row, selected=False), None
+
+    rules, train_stats = _select(trainData, grid, metric, min_trades)
+    if rules is None:
+        return dict(row, selected=False), None
+
+    trades = backtest(tickerData, ticker, **rules)
+    trades = trades[trades['signal_time'] >= tickerData.index[len(trainData)]]
+    closed = trades[trades['exit_reason'] != 'open']
+    row = dict(row, selected=True, **rules,
+               **{f"train_{name}": value for name, value in train_stats.items()},
+               **{f"test_{name}": value for name, value in trade_stats(closed).items()})
+    return row, trades.assign(fold=fold)
+
+
+def _fold_job(job):
+    return evaluate_fold(*job)
+
+
+def walk_forward(tickers, interval, start, end, train, test, step=None, grid=None, metric='total_return',
+                 min_trades=1, processes=None, root=DEFAULT_CACHE_ROOT):
+    """Run a walk-forward evaluation over a universe.
+
+    Args:
+        tickers (list): Ticker symbols; their missing bars are fetched into the bar store first.
+        interval (str): The bar interval, e.g. '1d'.
+        train, test, step: Fold layout, see make_folds.
+        grid (list): Rule sets to choose from on each train window, see rule_grid; defaults to
+                     [DEFAULT_RULES], which only measures the default rules out of sample.
+        metric (str): trade_stats column the train windows maximise.
+        min_trades (int): Closed train trades a rule set needs to be selected.
+        processes (int): Worker processes; defaults to the CPU count, 1 runs in this process.
+
+    Returns:
+        tuple: (results, trades); one results row per (ticker, fold), see evaluate_fold, and the
+               test trades of all of them.
+    """
+    grid = grid or [dict(DEFAULT_RULES)]
+    folds = make_folds(start, end, train, test, step)
+    sources = update_sources(tickers, interval, start, end, root=root)
+    stored = {}
+    for source in set(sources.values()):
+        stored.update({ticker: source for ticker in load_many_meta([t for t in tickers if sources[t] == source], source, root)})
+    for ticker in tickers:
+        if ticker not in stored:
+            logging.warning(f"{ticker}: No {interval} data available. Skipping...")
+
+    jobs = [(ticker, interval, source, fold, dates, grid, metric, min_trades, root)
+            for ticker, source in stored.items() for fold, dates in enumerate(folds)]
+    workers = processes or os.cpu_count() or 1
+    logging.info(f"Walking {len(folds)} folds x {len(stored)} tickers with {len(grid)} rule sets in {len(jobs)} jobs")
+    if workers == 1 or len(jobs) <= 1:
+        outcomes = [evaluate_fold(*job) for job in jobs]
+    else:
+        # Several jobs per task keep the pool's round trips small against the work of a job
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(_fold_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+    results = pd.DataFrame([row for row, _ in outcomes])
+    trades = [fold_trades for _, fold_trades in outcomes if fold_trades is not None and not fold_trades.empty]
+    trades = pd.concat(trades, ignore_index=True) if trades else pd.DataFrame(columns=TRADE_COLUMNS + ['fold'])
+    return results, trades
+
+
+def report(results, trades):
+    """Aggregate a walk-forward run per fold and overall ('ALL').
+
+    Returns:
+        pd.DataFrame: Per fold the test window, the tickers evaluated and selected, and trade_stats
+                      of the closed test trades of all tickers.
+    """
+    closed = trades[trades['exit_reason'] != 'open']
+    rows = {}
+    for fold, fold_results in results.groupby('fold'):
+        rows[fold] = pd.concat([pd.Series({
+            'test_start': fold_results['test_start'].iloc[0],
+            'test_end': fold_results['test_end'].iloc[0],
+            'tickers': len(fold_results),
+            'selected': int(fold_results['selected'].sum()),
+        }), trade_stats(closed[closed['fold'] == fold])])
+    rows['ALL'] = pd.concat([pd.Series({
+        'test_start': results['test_start'].min() if len(results) else None,
+        'test_end': results['test_end'].max() if len(results) else None,
+        'tickers': results['ticker'].nunique() if len(results) else 0,
+        'selected': int(results['selected'].sum()) if len(results) else 0,
+    }), trade_stats(closed)])
+    return pd.DataFrame(rows).T
@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+import pandas as pd
+import logging
+import sys
+from walk_forward import report, rule_grid, walk_forward
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Rule sets each train window chooses from, see backtest.DEFAULT_RULES <-----------------------------
+grid = rule_grid(
+    window=[3, 5, 8],
+    candles_count=[5, 10],
+    demand_proximity=[1.025, 1.05],
+    target_line=[1, 2],
+)
+
+# Fold layout: one year of training, then a quarter out of sample, rolled by a quarter
+train = timedelta(days=365)
+test = timedelta(days=90)
+
+# The process pool re-imports this script in its workers on some platforms
+if __name__ == '__main__':
+    # Read ticker symbols from NSE200.csv without a header
+    tickerSymbols = pd.read_csv('NSE200.csv', header=None)[0].tolist()
+
+    endDate = datetime.now()
+    startDate = endDate - timedelta(days=5 * 365)
+    results, trades = walk_forward(tickerSymbols, '1d', startDate, endDate, train, test, grid=grid)
+    if results.empty:
+        print("No data available for the walk-forward evaluation.")
+        sys.exit()
+
+    results.to_csv('walk_forward_nse200_1d.csv', index=False)
+    trades.to_csv('walk_forward_nse200_1d_trades.csv', index=False)
+    print(f"{len(results)} fold results and {len(trades)} test trades saved")
+    print(report(results, trades))
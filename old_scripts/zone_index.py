@@ -0,0 +1,66 @@
+import bisect
+
+
+class ZoneIndex:
+    """Zones sorted by a reference price for nearest and proximity queries in O(log n).
+
+    Each zone is stored as (price, rank, position), where rank is its place in the list the index
+    was built from. Among zones at the same distance the one listed first wins, as with min() over
+    the list. A NaN query price matches no zone.
+    """
+
+    def __init__(self, prices, positions):
+        entries = [(float(price), rank, int(position))
+                   for rank, (price, position) in enumerate(zip(prices, positions)) if price == price]
+        entries.sort()
+        self.prices = [entry[0] for entry in entries]
+        self.entries = entries
+
+    @classmethod
+    def from_zones(cls, zones):
+        """Index a detections.Zones container by Low for demand zones and by High for supply zones."""
+        return cls(zones.low if zones.kind == 'demand' else zones.high, zones.positions)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _first_at(self, k):
+        """Return the entry with the lowest rank among those sharing the price of entry k."""
+        return self.entries[bisect.bisect_left(self.prices, self.prices[k])]
+
+    def nearest_below(self, price):
+        """Return the position of the zone with the highest price <= price, or None."""
+        if price != price:
+            return None
+        k = bisect.bisect_right(self.prices, price)
+        return self._first_at(k - 1)[2] if k > 0 else None
+
+    def nearest_above(self, price):
+        """Return the position of the zone with the lowest price >= price, or None."""
+        if price != price:
+            return None
+        k = bisect.bisect_left(self.prices, price)
+        return self._first_at(k)[2] if k < len(self.prices) else None
+
+    def nearest(self, price):
+        """Return the position of the zone whose price is closest to price, or None."""
+        if price != price:
+            return None
+        candidates = []
+        k = bisect.bisect_right(self.prices, price)
+        if k > 0:
+            candidates.append(self._first_at(k - 1))
+        if k < len(self.prices):
+            candidates.append(self._first_at(k))
+        if not candidates:
+            return None
+        return min(candidates, key=lambda entry: (abs(entry[0] - price), entry[1]))[2]
+
+    def within(self, price, pct):
+        """Return the positions of all zones priced within pct percent of price, ordered by price."""
+        if price != price:
+            return []
+        tolerance = abs(price) * pct / 100
+        lo = bisect.bisect_left(self.prices, price - tolerance)
+        hi = bisect.bisect_right(self.prices, price + tolerance)
+        return [entry[2] for entry in self.entries[lo:hi]]
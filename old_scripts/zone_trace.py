@@ -0,0 +1,108 @@
+import os
+import json
+import zlib
+import atexit
+import threading
+
+# Opt-in trace of the detectors' per-candle decisions, written as JSON lines.
+#
+# Tracing is off unless enable() is called or ZONE_TRACE names an output file; while it is off the
+# detectors only test the module-level `active` flag, so no event is built or formatted. The path
+# may contain '{ticker}' to write one file per ticker. ZONE_TRACE_TICKERS (comma separated)
+# restricts the trace to some tickers and ZONE_TRACE_SAMPLE (0-1) keeps a stable fraction of them.
+#
+#   ZONE_TRACE='traces/{ticker}.jsonl' ZONE_TRACE_TICKERS=RELIANCE.NS python long_nse200_15m_7d.py
+
+active = False
+
+_path = None
+_tickers = None
+_sample = 1.0
+_ticker = None
+_files = {}
+_lock = threading.Lock()
+
+
+def enable(path, tickers=None, sample=1.0):
+    """Start tracing to path ('{ticker}' in it gives one file per ticker).
+
+    Args:
+        tickers (list): Only trace these tickers. Defaults to all.
+        sample (float): Fraction of tickers to trace, chosen by a hash of the symbol so a ticker
+                        is either traced completely or not at all.
+    """
+    global active, _path, _tickers, _sample
+    disable()
+    _path = path
+    _tickers = set(tickers) if tickers else None
+    _sample = sample
+    active = _selected(_ticker)
+
+
+def disable():
+    """Stop tracing and close the trace files."""
+    global active, _path
+    active = False
+    _path = None
+    _close_files()
+
+
+def _close_files():
+    with _lock:
+        for f in _files.values():
+            f.close()
+        _files.clear()
+
+
+def set_ticker(ticker):
+    """Attribute the following events to ticker; tracing is active only if the ticker is selected.
+
+    With one file per ticker the previous ticker's file is closed, so a universe run keeps at most
+    one trace file open.
+    """
+    global active, _ticker
+    if _path is not None and '{ticker}' in _path and ticker != _ticker:
+        _close_files()
+    _ticker = ticker
+    active = _path is not None and _selected(ticker)
+
+
+def _selected(ticker):
+    if _tickers is not None and ticker not in _tickers:
+        return False
+    if _sample >= 1.0:
+        return True
+    return zlib.crc32(str(ticker).encode()) % 10000 < _sample * 10000
+
+
+def emit(event, **fields):
+    """Write one trace event. Callers check `zone_trace.active` first so disabled tracing costs nothing."""
+    if not active:
+        return
+    path = _path.format(ticker=_ticker) if '{ticker}' in _path else _path
+    record = {'ticker': _ticker, 'event': event, **fields}
+    line = json.dumps(record, default=_to_json) + '\n'
+    with _lock:
+        f = _files.get(path)
+        if f is None:
+            folder = os.path.dirname(path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            f = _files[path] = open(path, 'a')
+        f.write(line)
+
+
+atexit.register(disable)
+
+
+def _to_json(value):
+    """Serialize NumPy scalars and timestamps in trace events."""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+if os.environ.get('ZONE_TRACE'):
+    enable(os.environ['ZONE_TRACE'],
+           tickers=[ticker for ticker in os.environ.get('ZONE_TRACE_TICKERS', '').split(',') if ticker],
+           sample=float(os.environ.get('ZONE_TRACE_SAMPLE', '1')))
@@ -1,8 +1,8 @@
 import plotly.graph_objects as go
 import logging
-import pandas as pd
 import numpy as np  # Ensure NumPy is imported
-from utils import is_boring_candle, is_exciting_candle, calculate_average_body_size, calculate_average_volume, identify_trend, find_closest_zones, calculate_split_lines
+from utils import classify_candles, identify_trend, find_closest_zones, calculate_split_lines
+from detections import Zones, Pivots, FVGs
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -19,16 +19,14 @@ def find_nearest_date(index, target):
     # Calculate the absolute difference between the target and each datetime in the index, then find the index of the minimum difference
     nearest_index = np.abs(index - target).argmin()
     return index[nearest_index]
-from utils import is_boring_candle, is_exciting_candle, calculate_average_body_size, calculate_average_volume, identify_trend
-from utils import is_boring_candle, is_exciting_candle, calculate_average_body_size, calculate_average_volume, identify_trend
 
-def plot_chart(tickerData, fvg_list, demand_zones, supply_zones, major_highs, major_lows, tickerSymbol):
+def plot_chart(tickerData, fvg_list, demand_zones, supply_zones, major_highs, major_lows, tickerSymbol, candles=None):
     """Create a candlestick chart with colored candles, FVGs, major highs/lows, volume, and trend arrows."""
     fig = go.Figure()
 
-    # Calculate average body size and volume for boring and exciting candle detection
-    average_body_size = calculate_average_body_size(tickerData)
-    average_volume = calculate_average_volume(tickerData)
+    # Classify all candles for the candle colours unless the scanner already did
+    if candles is None:
+        candles = classify_candles(tickerData)
 
     # Add volume data as a bar chart on a secondary y-axis
     max_volume = tickerData['Volume'].max()
@@ -43,8 +41,9 @@ def plot_chart(tickerData, fvg_list, demand_zones, supply_zones, major_highs, ma
     # Add candlestick data with custom colors
     for i in range(len(tickerData)):
         candle = tickerData.iloc[i]
-        is_boring = is_boring_candle(candle, average_body_size, average_volume)
-        is_exciting, candle_type = is_exciting_candle(candle, average_body_size, average_volume)
+        is_boring = candles['boring'][i]
+        is_exciting = candles['exciting'][i]
+        candle_type = 'Bullish' if candles['bullish'][i] else 'Bearish'
 
         pattern_shape = None  # Initialize pattern_shape
 
@@ -94,41 +93,42 @@ def plot_chart(tickerData, fvg_list, demand_zones, supply_zones, major_highs, ma
 
     # Identify trends based on major highs and lows
     trends = identify_trend(tickerData, major_highs, major_lows)
-    for i, trend in enumerate(trends):
-        arrow_symbol = 'triangle-up' if trend == 'up' else 'triangle-down' if trend == 'down' else 'triangle-right'
-        fig.add_trace(go.Scatter(
-            x=[tickerData.index[i]],
-            y=[tickerData['Low'].min() * 0.95],  # Position the arrow slightly below the lowest low
-            mode='markers',
-            marker=dict(
-                symbol=arrow_symbol,
-                size=10,
-                color='blue'
-            ),
-            name='Trend',
-            showlegend=False,
-            hoverinfo='skip'
-        ))
+    # One marker trace for all arrows; trends are -1/0/1 so trends + 1 indexes the symbols
+    arrow_symbols = np.array(['triangle-down', 'triangle-right', 'triangle-up'])[trends + 1]
+    fig.add_trace(go.Scatter(
+        x=tickerData.index,
+        y=np.full(len(tickerData), tickerData['Low'].min() * 0.95),  # Position the arrows slightly below the lowest low
+        mode='markers',
+        marker=dict(
+            symbol=arrow_symbols,
+            size=10,
+            color='blue'
+        ),
+        name='Trend',
+        showlegend=False,
+        hoverinfo='skip'
+    ))
 
     # Modify FVGs to the chart based on position
-    for fvg in fvg_list:
-        start_pos, end_pos, fvg_type = fvg  # Use positions instead of dates
-        color = 'yellow' if fvg_type == 'Bullish' else 'orange'
-        y0 = tickerData.iloc[start_pos]['High'] if fvg_type == 'Bullish' else tickerData.iloc[start_pos]['Low']
-        y1 = tickerData.iloc[end_pos]['Low'] if fvg_type == 'Bullish' else tickerData.iloc[end_pos]['High']
-        
+    fvgs = FVGs.coerce(tickerData, fvg_list)
+    for start_pos, direction, bottom, top in zip(fvgs.start.tolist(), fvgs.direction.tolist(),
+                                                 fvgs.bottom.tolist(), fvgs.top.tolist()):
+        color = 'yellow' if direction > 0 else 'orange'
+
         fig.add_shape(type="rect",
-                      x0=tickerData.index[start_pos], x1=tickerData.index[end_pos],
-                      y0=y0, y1=y1,
+                      x0=tickerData.index[start_pos], x1=tickerData.index[start_pos + 2],
+                      y0=bottom, y1=top,
                       fillcolor=color, opacity=0.3, line_width=2)
 
+    last_close = tickerData['Close'].iat[-1]
+
     # Add demand zones to the chart
-    for zone_pos in demand_zones:
-        if tickerData.iloc[-1]['Close'] > tickerData.iloc[zone_pos]['Low']:  # Check if the latest close price is above the major low
-            x0 = tickerData.index[zone_pos]  # Left side of the rectangle
+    for zone in Zones.coerce('demand', tickerData, demand_zones).records():
+        if last_close > zone.low:  # Check if the latest close price is above the major low
+            x0 = tickerData.index[zone.position]  # Left side of the rectangle
             x1 = tickerData.index[-1]  # Right side of the rectangle extends to the end
-            y0 = tickerData.iloc[zone_pos]['Low']  # Bottom of the rectangle
-            y1 = tickerData.iloc[zone_pos]['High']  # Top of the rectangle, changed from y0 to represent the high of the candle
+            y0 = zone.low  # Bottom of the rectangle
+            y1 = zone.high  # Top of the rectangle, changed from y0 to represent the high of the candle
 
             fig.add_shape(type="rect",
                         x0=x0, x1=x1,
@@ -136,12 +136,12 @@ def plot_chart(tickerData, fvg_list, demand_zones, supply_zones, major_highs, ma
                              fillcolor="blue", opacity=0.3, line_width=0)
 
     # Add supply zones to the chart
-    for zone_pos in supply_zones:
-        if tickerData.iloc[-1]['Close'] < tickerData.iloc[zone_pos]['High']:  # Check if the latest close price is below the major high
-            x0 = tickerData.index[zone_pos]  # Left side of the rectangle
+    for zone in Zones.coerce('supply', tickerData, supply_zones).records():
+        if last_close < zone.high:  # Check if the latest close price is below the major high
+            x0 = tickerData.index[zone.position]  # Left side of the rectangle
             x1 = tickerData.index[-1]  # Right side of the rectangle extends to the end
-            y0 = tickerData.iloc[zone_pos]['Low']  # Bottom of the rectangle
-            y1 = tickerData.iloc[zone_pos]['High']  # Top of the rectangle
+            y0 = zone.low  # Bottom of the rectangle
+            y1 = zone.high  # Top of the rectangle
 
             fig.add_shape(type="rect",
                         x0=x0, x1=x1,
@@ -149,17 +149,19 @@ def plot_chart(tickerData, fvg_list, demand_zones, supply_zones, major_highs, ma
                         fillcolor="black", opacity=0.3, line_width=0)
             
     # Add horizontal dashed lines for major highs and lows
-    for high in major_highs:
+    highs = Pivots.coerce('high', tickerData, major_highs)
+    for high, price in zip(highs.positions.tolist(), highs.price.tolist()):
         fig.add_shape(type="line",
                       x0=tickerData.index[high], x1=tickerData.index[-1],
-                      y0=tickerData.iloc[high]['High'], y1=tickerData.iloc[high]['High'],
+                      y0=price, y1=price,
                       line=dict(color="blue", width=2, dash="dash"),
                       opacity=0.1)
 
-    for low in major_lows:
+    lows = Pivots.coerce('low', tickerData, major_lows)
+    for low, price in zip(lows.positions.tolist(), lows.price.tolist()):
         fig.add_shape(type="line",
                       x0=tickerData.index[low], x1=tickerData.index[-1],
-                      y0=tickerData.iloc[low]['Low'], y1=tickerData.iloc[low]['Low'],
+                      y0=price, y1=price,
                       line=dict(color="black", width=2, dash="dash"),
                       opacity=0.1)
 
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+# NSE trades 09:15-15:30 IST; intraday bars are aligned to the session open of each day
+IST_OFFSET = pd.Timedelta(hours=5, minutes=30).value
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=15).value
+DAY = pd.Timedelta(days=1).value
+
+# Seconds per unit of an interval string such as '15m', '1h' or '1d'
+_UNIT_SECONDS = {'m': 60, 'h': 3600, 'd': 86400}
+
+
+def interval_to_ns(interval):
+    """Return the length of an interval string in nanoseconds."""
+    return int(interval[:-1]) * _UNIT_SECONDS[interval[-1]] * 10**9
+
+
+def can_resample(source_interval, interval):
+    """Check whether bars of `interval` can be built from bars of `source_interval`."""
+    if source_interval[-1] not in _UNIT_SECONDS or interval[-1] not in _UNIT_SECONDS:
+        return False
+    if interval == '1d':
+        return source_interval[-1] in ('m', 'h')
+    if interval[-1] == 'd':
+        return False
+    source_ns, target_ns = interval_to_ns(source_interval), interval_to_ns(interval)
+    return target_ns > source_ns and target_ns % source_ns == 0
+
+
+def bar_labels(timestamps, interval):
+    """Return the UTC epoch-ns label of the bar each timestamp falls into.
+
+    Intraday bars start at 09:15 IST plus a whole number of intervals. Daily bars are labelled
+    with the IST trading date at 00:00 UTC, the way daily bars are kept in the bar store.
+    """
+    local = np.asarray(timestamps, dtype=np.int64) + IST_OFFSET
+    day = local // DAY
+    if interval == '1d':
+        return day * DAY
+    step = interval_to_ns(interval)
+    slot = (local - day * DAY - SESSION_OPEN) // step
+    return day * DAY + SESSION_OPEN + slot * step - IST_OFFSET
+
+
+def resample_arrays(arrays, interval):
+    """Aggregate sorted bar arrays (as returned by bar_store.load_arrays) into coarser bars.
+
+    Open is the first open, High/Low the extremes ignoring NaN, Close and Adj Close the last value
+    and Volume the sum of each group. Daily bars built this way close at the last traded price,
+    not NSE's official closing price.
+    """
+    timestamps = np.asarray(arrays['timestamp'], dtype=np.int64)
+    if len(timestamps) == 0:
+        return {column: np.asarray(values)[:0] for column, values in arrays.items()}
+
+    labels = bar_labels(timestamps, interval)
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    ends = np.r_[starts[1:], len(labels)] - 1
+
+    resampled = {'timestamp': labels[starts]}
+    for column, values in arrays.items():
+        values = np.asarray(values)
+        if column == 'Open':
+            resampled[column] = values[starts]
+        elif column == 'High':
+            resampled[column] = np.fmax.reduceat(values, starts)
+        elif column == 'Low':
+            resampled[column] = np.fmin.reduceat(values, starts)
+        elif column == 'Volume':
+            resampled[column] = np.add.reduceat(values, starts)
+        elif column != 'timestamp':
+            resampled[column] = values[ends]
+    return resampled
+
@@ -1,7 +1,13 @@
 import pandas as pd
-import yfinance as yf
 from datetime import datetime, timedelta
 import os
+import sys
+
+# Add the project root to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from market_data import get_many_bars
+from metadata_cache import get_market_caps
 
 # Read ticker symbols from NSE200.csv
 tickerSymbols = pd.read_csv('NSE200.csv', header=None)[0].tolist()
@@ -24,27 +30,21 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 
 # Define the folder structure
 base_folder = os.path.join(script_dir, 'sector_data')
-input_folder = os.path.join(base_folder, 'input')
 output_folder = os.path.join(base_folder, 'output')
 
 # Create folders if they don't exist
-os.makedirs(input_folder, exist_ok=True)
 os.makedirs(output_folder, exist_ok=True)
 
-# Fetch price data and calculate performance for each ticker
+# Load the daily bars of all tickers from the bar store, downloading the missing ones in batches
+price_data = get_many_bars(tickerSymbols, '1d', startDate, endDate)
+
+# Get the market caps from the metadata cache, refreshing only the stale ones
+market_caps = get_market_caps(tickerSymbols)
+
+# Calculate performance for each ticker
 for ticker in tickerSymbols:
     try:
-        # Define the cache file name
-        cache_file = f"{input_folder}/{ticker}_{startDate.strftime('%Y%m%d')}_{endDate.strftime('%Y%m%d')}.csv"
-        
-        # Check if data is already cached
-        if os.path.exists(cache_file):
-            data = pd.read_csv(cache_file, index_col='Date', parse_dates=True)
-        else:
-            # Download data
-            data = yf.download(ticker, start=startDate, end=endDate)
-            if not data.empty:
-                data.to_csv(cache_file)
+        data = price_data[ticker]
         
         if not data.empty:
             # Calculate performance as percentage change
@@ -56,8 +56,9 @@ for ticker in tickerSymbols:
             sector = sector_info[sector_info['Symbol'] == ticker]['Industry'].values[0]
 
             # Get market cap
-            ticker_obj = yf.Ticker(ticker)
-            market_cap = ticker_obj.info.get('marketCap', 'N/A')
+            market_cap = market_caps[ticker]
+            if market_cap is None:
+                market_cap = 'N/A'
 
             # Store the performance data
             if sector not in performance_data:
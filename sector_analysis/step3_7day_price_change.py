@@ -1,9 +1,14 @@
 import pandas as pd
 import os
-import yfinance as yf
+import sys
 from datetime import datetime, timedelta
 import logging
 
+# Add the project root to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from market_data import get_many_bars
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -14,10 +19,6 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 base_folder = os.path.join(script_dir, 'sector_data')
 input_folder = os.path.join(base_folder, 'output')
 output_folder = os.path.join(base_folder, 'output')
-data_folder = os.path.join(base_folder, 'data')
-
-# Create data folder if it doesn't exist
-os.makedirs(data_folder, exist_ok=True)
 
 # Read the sector companies data
 sector_companies_file = os.path.join(input_folder, 'step2_sector_companies.csv')
@@ -32,6 +33,9 @@ def calc_avg_performance(data):
     daily_returns = data['Close'].pct_change()
     return daily_returns.mean()
 
+# Load the daily bars of all tickers from the bar store, downloading the missing ones in batches
+price_data = get_many_bars(sector_companies['Ticker'].tolist(), '1d', start_date, end_date)
+
 # Initialize results list
 results = []
 
@@ -42,22 +46,7 @@ for _, row in sector_companies.iterrows():
     
     logging.info(f"Processing {ticker}...")
     
-    # Define the file name for storing the data
-    file_name = f"{data_folder}/{ticker}_data_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}_1d.csv"
-    
-    # Check if data is already downloaded
-    if os.path.exists(file_name):
-        # Load data from CSV file
-        stock_data = pd.read_csv(file_name, parse_dates=True, index_col='Date')
-    else:
-        # Download data if not already downloaded
-        stock_data = yf.download(ticker, start=start_date, end=end_date, interval='1d')
-        stock_data = stock_data.round(2)
-        # Save data to CSV file
-        stock_data.to_csv(file_name)
-    
-    # Ensure the index is in datetime format
-    stock_data.index = pd.to_datetime(stock_data.index)
+    stock_data = price_data[ticker]
     
     if len(stock_data) < 14:
         logging.warning(f"Insufficient data for {ticker}. Skipping...")
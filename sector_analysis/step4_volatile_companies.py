@@ -1,9 +1,14 @@
 import pandas as pd
-import yfinance as yf
 from datetime import datetime, timedelta
 import os
+import sys
 import logging
 
+# Add the project root to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from market_data import get_many_bars
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -31,7 +36,11 @@ def is_trending(data):
     return (higher_highs and higher_lows) or (lower_highs and lower_lows)
 
 
-# Fetch data and calculate volatility
+# Load the daily bars of the positive performers, downloading the missing ones in batches
+positive_tickers = candidates_df[candidates_df['Change in Daily Average %'] > 0]['Ticker'].tolist()
+price_data = get_many_bars(positive_tickers, '1d', startDate, endDate)
+
+# Calculate volatility
 for _, row in candidates_df.iterrows():
     ticker = row['Ticker']
     sector = row['Sector']
@@ -40,7 +49,7 @@ for _, row in candidates_df.iterrows():
     if performance <= 0:
         continue
 
-    data = yf.download(ticker, start=startDate, end=endDate)
+    data = price_data[ticker].copy()
     if data.empty:
         continue
 
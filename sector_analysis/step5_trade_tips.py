@@ -1,5 +1,4 @@
 from datetime import datetime, timedelta
-import yfinance as yf
 import pandas as pd
 import os
 import logging
@@ -16,7 +15,10 @@ sys.path.append(project_root)
 # Import modules from the project root
 from plot_chart_v2 import plot_chart_v2  # Import the new function
 
-from utils import calculate_body_and_shadow, identify_fvg, identify_major_highs_lows, identify_bos, identify_demand_zones, identify_supply_zones, find_closest_zones
+from utils import calculate_body_and_shadow, identify_bos, find_closest_zones
+from detection_cache import detect
+import zone_trace
+from market_data import get_bars
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -35,43 +37,21 @@ endDate = datetime.now(pytz.timezone('Asia/Kolkata')).replace(hour=0, minute=0,
 # Get the data for the desired period (last 7 days)
 startDate = endDate - timedelta(days=7)
 
-# Define the file name for storing the data
-data_folder = 'sector_analysis/sector_data/input'
-if not os.path.exists(data_folder):
-    os.makedirs(data_folder)
-
 # List to store tickers that meet the criteria
 identified_tickers = []
 
 for tickerSymbol in tickerSymbols:
-    fileName = f"{data_folder}/{tickerSymbol}_data_{startDate.strftime('%Y%m%d')}_{endDate.strftime('%Y%m%d')}_{interval}.csv"
-
     try:
-        if os.path.exists(fileName):
-            tickerData = pd.read_csv(fileName, parse_dates=['Datetime'], index_col='Datetime')
-            logging.info(f"Loaded existing data for {tickerSymbol}")
-        else:
-            logging.info(f"Downloading data for {tickerSymbol}")
-            tickerData = yf.download(tickerSymbol, start=startDate, end=endDate, interval=interval)
-            if tickerData.empty:
-                logging.warning(f"No data available for {tickerSymbol}. Skipping...")
-                continue
-            tickerData = tickerData.round(2)
-            tickerData.to_csv(fileName)
-            logging.info(f"Data saved for {tickerSymbol}")
+        # Load the bars from the bar store, downloading them only if they are not cached
+        tickerData = get_bars(tickerSymbol, interval, startDate, endDate)
+        zone_trace.set_ticker(tickerSymbol)
 
         if tickerData.empty:
-            logging.warning(f"No data available for {tickerSymbol} after processing. Skipping...")
+            logging.warning(f"No data available for {tickerSymbol}. Skipping...")
             continue
 
         logging.info(f"Processing {tickerSymbol}")
         
-        # Ensure the index is in datetime format and convert to Asia/Kolkata timezone
-        tickerData.index = pd.to_datetime(tickerData.index, utc=True).tz_convert('Asia/Kolkata')
-        
-        # Convert the dates into string format
-        tickerData['Date'] = tickerData.index.strftime('%Y-%m-%d %H:%M:%S')
-        
         try:
             tickerData = calculate_body_and_shadow(tickerData)
         except Exception as e:
@@ -80,18 +60,15 @@ for tickerSymbol in tickerSymbols:
             continue
 
         try:
-            fvg_list = identify_fvg(tickerData)
-        except Exception as e:
-            logging.error(f"Error in identify_fvg for {tickerSymbol}: {str(e)}")
-            logging.error(traceback.format_exc())
-            fvg_list = []
-
-        try:
-            major_highs, major_lows = identify_major_highs_lows(tickerData)
+            # Reuses the results of any scanner that analysed the same bars with the same settings
+            detections = detect(tickerData, window=5, candles_count=10)
+            fvg_list = detections['fvgs']
+            major_highs, major_lows = detections['major_highs'], detections['major_lows']
+            demand_zones, supply_zones = detections['demand_zones'], detections['supply_zones']
         except Exception as e:
-            logging.error(f"Error in identify_major_highs_lows for {tickerSymbol}: {str(e)}")
+            logging.error(f"Error in detect for {tickerSymbol}: {str(e)}")
             logging.error(traceback.format_exc())
-            major_highs, major_lows = [], []
+            fvg_list, major_highs, major_lows, demand_zones, supply_zones = [], [], [], [], []
 
         try:
             bos_list = identify_bos(tickerData, major_highs, major_lows)
@@ -99,24 +76,6 @@ for tickerSymbol in tickerSymbols:
             logging.error(f"Error in identify_bos for {tickerSymbol}: {str(e)}")
             logging.error(traceback.format_exc())
             bos_list = []
-        
-        # Reset the index and set 'Date' as the new index
-        tickerData.reset_index(drop=True, inplace=True)
-        tickerData.set_index('Date', inplace=True)
-
-        try:
-            demand_zones = identify_demand_zones(tickerData, major_lows, 10, 1.1)
-        except Exception as e:
-            logging.error(f"Error in identify_demand_zones for {tickerSymbol}: {str(e)}")
-            logging.error(traceback.format_exc())
-            demand_zones = []
-
-        try:
-            supply_zones = identify_supply_zones(tickerData, major_highs, 10, 1.1)
-        except Exception as e:
-            logging.error(f"Error in identify_supply_zones for {tickerSymbol}: {str(e)}")
-            logging.error(traceback.format_exc())
-            supply_zones = []
 
         try:
             closest_demand, closest_supply = find_closest_zones(tickerData, demand_zones, supply_zones)
@@ -1,9 +1,14 @@
 import pandas as pd
-import yfinance as yf
 from datetime import datetime, timedelta
 import os
+import sys
 import logging
 
+# Add the project root to the system path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from market_data import get_many_bars
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -28,9 +33,12 @@ def is_trending(data):
     lower_lows = all(data['Low'].iloc[i] < data['Low'].iloc[i-1] for i in range(1, len(data)))
     return (higher_highs and higher_lows) or (lower_highs and lower_lows)
 
-# Fetch data and calculate volatility
+# Load the daily bars of all candidates, downloading the missing ones in batches
+price_data = get_many_bars(candidates_df['Ticker'].tolist(), '1d', startDate, endDate)
+
+# Calculate volatility
 for ticker in candidates_df['Ticker']:
-    data = yf.download(ticker, start=startDate, end=endDate)
+    data = price_data[ticker].copy()
     if data.empty:
         continue
 
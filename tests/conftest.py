@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The modules live in the project root and old_scripts/, which are not packages
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'old_scripts')]
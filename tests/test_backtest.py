@@ -0,0 +1,106 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import backtest
+import utils
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def frame(rows):
+    """Bars from (open, high, low, close) rows."""
+    return pd.DataFrame(rows, columns=['Open', 'High', 'Low', 'Close'],
+                        index=pd.date_range('2024-01-01', periods=len(rows), freq='D', tz='UTC'))
+
+
+@pytest.fixture
+def signal_at(monkeypatch):
+    """Replace the rule with a signal on the given bars, with bar 0 as the demand zone and bar 1 as the
+    supply zone: stop at the Low of bar 0 and levels between the High of bar 0 and the Low of bar 1."""
+    def install(tickerData, bars):
+        n = len(tickerData)
+        signal = np.zeros(n, dtype=bool)
+        signal[list(bars)] = True
+        monkeypatch.setattr(backtest, 'scan_signals', lambda data, **rules: pd.DataFrame({
+            'closest_demand': np.zeros(n, dtype=np.int64), 'closest_supply': np.ones(n, dtype=np.int64),
+            'demand_met': signal, 'supply_met': signal, 'signal': signal}, index=data.index))
+    return install
+
+
+# Demand zone 95-100 (stop 95), supply zone Low 130: target 110 (line 1) or 120 (line 2)
+ZONES = [(97, 100, 95, 98), (132, 135, 130, 133)]
+
+
+def test_entry_at_next_open_and_target_exit(signal_at):
+    tickerData = frame(ZONES + [(104, 106, 102, 105), (105, 107, 103, 106), (106, 112, 105, 111)])
+    signal_at(tickerData, [2])
+    trades = backtest.backtest(tickerData, 'AAA.NS')
+    assert len(trades) == 1
+    trade = trades.iloc[0]
+    assert trade['signal_time'] == tickerData.index[2] and trade['entry_time'] == tickerData.index[3]
+    assert (trade['entry_price'], trade['stop'], trade['target']) == (105, 95, 110)
+    assert (trade['exit_time'], trade['exit_price'], trade['exit_reason']) == (tickerData.index[4], 110, 'target')
+    assert trade['bars_held'] == 2 and trade['pnl'] == 5 and trade['return'] == pytest.approx(110 / 105 - 1)
+
+
+def test_second_split_line_target(signal_at):
+    tickerData = frame(ZONES + [(104, 106, 102, 105), (105, 115, 104, 114), (114, 121, 113, 120)])
+    signal_at(tickerData, [2])
+    trade = backtest.backtest(tickerData, target_line=2).iloc[0]
+    assert (trade['target'], trade['exit_time'], trade['exit_price']) == (120, tickerData.index[4], 120)
+
+
+def test_stop_exit(signal_at):
+    tickerData = frame(ZONES + [(104, 106, 102, 105), (105, 106, 96, 97), (97, 98, 94, 95)])
+    signal_at(tickerData, [2])
+    trade = backtest.backtest(tickerData).iloc[0]
+    assert (trade['exit_time'], trade['exit_price'], trade['exit_reason']) == (tickerData.index[4], 95, 'stop')
+    assert trade['pnl'] == -10
+
+
+@pytest.mark.parametrize('gap_open, reason', [(113, 'target'), (92, 'stop')])
+def test_gap_through_a_level_fills_at_the_open(signal_at, gap_open, reason):
+    tickerData = frame(ZONES + [(104, 106, 102, 105), (105, 107, 103, 106),
+                                (gap_open, gap_open + 1, gap_open - 1, gap_open)])
+    signal_at(tickerData, [2])
+    trade = backtest.backtest(tickerData).iloc[0]
+    assert (trade['exit_price'], trade['exit_reason']) == (gap_open, reason)
+
+
+def test_stop_is_assumed_first_when_both_levels_are_in_one_bar(signal_at):
+    tickerData = frame(ZONES + [(104, 106, 102, 105), (105, 112, 94, 100)])
+    signal_at(tickerData, [2])
+    trade = backtest.backtest(tickerData).iloc[0]
+    assert (trade['exit_price'], trade['exit_reason']) == (95, 'stop')
+
+
+def test_max_bars_open_trades_and_one_trade_at_a_time(signal_at):
+    tickerData = frame(ZONES + [(104, 106, 102, 105)] * 6)
+    signal_at(tickerData, [2, 3, 4, 6])
+    # Signals while a trade is open are skipped; a trade can start on the bar the last one exited
+    trades = backtest.backtest(tickerData, max_bars=2)
+    assert trades['entry_time'].tolist() == [tickerData.index[3], tickerData.index[5], tickerData.index[7]]
+    assert trades['exit_reason'].tolist() == ['max_bars', 'max_bars', 'open']
+    assert trades['exit_time'].tolist() == [tickerData.index[4], tickerData.index[6], tickerData.index[7]]
+    assert trades['exit_price'].tolist() == [105, 105, 105]
+    # A signal on the last bar has no next open to enter at
+    signal_at(tickerData, [7])
+    assert backtest.backtest(tickerData).empty
+
+
+def test_signals_match_a_scan_of_each_prefix():
+    bars = pd.read_csv(os.path.join(DATA, 'detector_bars.csv'))
+    tickerData = bars[bars['case'] == 'walk'].drop(columns='case').reset_index(drop=True).iloc[:600]
+    signals = backtest.scan_signals(tickerData, window=2, candles_count=3)
+    assert (signals['closest_demand'] >= 0).any() and (signals['closest_supply'] >= 0).any()
+    for t in range(30, len(tickerData), 7):
+        prefix = tickerData.iloc[:t + 1]
+        major_highs, major_lows = utils.identify_major_highs_lows(prefix, 2)
+        demand = utils.identify_demand_zones(prefix, major_lows, 3, 1.1)
+        supply = utils.identify_supply_zones(prefix, major_highs, 3, 1.1)
+        closest_demand, closest_supply = utils.find_closest_zones(prefix, demand, supply)
+        assert signals['closest_demand'].iat[t] == (-1 if closest_demand is None else closest_demand)
+        assert signals['closest_supply'].iat[t] == (-1 if closest_supply is None else closest_supply)
+        # Later bars never change an earlier signal
+        assert backtest.scan_signals(prefix, window=2, candles_count=3).iloc[-1].equals(signals.iloc[t])
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+from bar_store import missing_ranges, to_epoch_ns
+from fetch_engine import FetchEngine, StubProvider
+from market_data import get_bars, source_interval
+
+
+def days_ago(days):
+    return pd.Timestamp.now().normalize() - pd.Timedelta(days=days)
+
+
+@pytest.fixture
+def provider():
+    return StubProvider()
+
+
+@pytest.fixture
+def engine(provider):
+    return FetchEngine(provider, rate=0, retries=0)
+
+
+def expected_bars(ticker, start, end):
+    return StubProvider.bars(ticker, start, end, '1d')
+
+
+def test_missing_ranges_without_cache():
+    start, end = days_ago(10), days_ago(5)
+    assert missing_ranges(None, start, end) == [tuple(to_epoch_ns([start, end]))]
+
+
+def test_missing_ranges_join_the_coverage():
+    meta = {'start': to_epoch_ns([days_ago(400)])[0], 'end': to_epoch_ns([days_ago(393)])[0],
+            'last': to_epoch_ns([days_ago(394)])[0]}
+    start, end = to_epoch_ns([days_ago(300), days_ago(293)])
+    # A window after the cached one is fetched from the last cached bar on, leaving no gap
+    assert missing_ranges(meta, start, end) == [(meta['last'], end)]
+    # A window before it is fetched up to the covered start
+    start, end = to_epoch_ns([days_ago(500), days_ago(450)])
+    assert missing_ranges(meta, start, end) == [(start, meta['start'])]
+
+
+def test_repeated_request_is_served_from_the_store(tmp_path, provider, engine):
+    start, end = days_ago(400), days_ago(380)
+    first = get_bars('AAA.NS', '1d', start, end, engine=engine, root=str(tmp_path))
+    calls = len(provider.calls)
+    second = get_bars('AAA.NS', '1d', start, end, engine=engine, root=str(tmp_path))
+    assert len(provider.calls) == calls
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_disjoint_windows_leave_no_gap(tmp_path, provider, engine):
+    root = str(tmp_path)
+    get_bars('AAA.NS', '1d', days_ago(400), days_ago(393), engine=engine, root=root)
+    get_bars('AAA.NS', '1d', days_ago(300), days_ago(293), engine=engine, root=root)
+    tickerData = get_bars('AAA.NS', '1d', days_ago(400), days_ago(290), engine=engine, root=root)
+
+    expected = expected_bars('AAA.NS', days_ago(400), days_ago(290))
+    assert len(tickerData) == len(expected)
+    assert tickerData['Close'].to_numpy() == pytest.approx(expected['Close'].round(2).to_numpy())
+
+    # The gap was really stored: the same window again needs no download
+    calls = len(provider.calls)
+    get_bars('AAA.NS', '1d', days_ago(390), days_ago(300), engine=engine, root=root)
+    assert len(provider.calls) == calls
+
+
+def test_source_interval_needs_covering_15m_bars(tmp_path, engine):
+    root = str(tmp_path)
+    get_bars('AAA.NS', '15m', days_ago(200), days_ago(199), engine=engine, root=root)
+    # 15m bars from 200 days ago only cover a day; a 1d request from 300 days ago is downloaded as 1d
+    assert source_interval('AAA.NS', '1d', days_ago(300), root) == '1d'
+    assert source_interval('AAA.NS', '1d', days_ago(200), root) == '15m'
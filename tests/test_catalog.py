@@ -0,0 +1,45 @@
+import catalog
+
+
+def dataset(ticker, interval, **fields):
+    return dict({'ticker': ticker, 'interval': interval, 'first': 1, 'last': 9, 'rows': 5, 'start': 0, 'end': 10,
+                 'columns': ['Open', 'Close'], 'path': f"bars/{interval}/{ticker}", 'checksum': 'abc'}, **fields)
+
+
+def test_lookups_on_a_root_without_catalog(tmp_path):
+    assert catalog.lookup(str(tmp_path), 'AAA.NS', '1d') is None
+    assert catalog.lookup_many(str(tmp_path), ['AAA.NS'], '1d') == {}
+    assert catalog.entries(str(tmp_path)) == []
+
+
+def test_upsert_lookup_and_remove(tmp_path):
+    root = str(tmp_path)
+    catalog.upsert(root, dataset('AAA.NS', '1d', updated_at=5.0))
+    catalog.upsert(root, dataset('BBB.NS', '1d'))
+    catalog.upsert(root, dataset('AAA.NS', '15m'))
+
+    found = catalog.lookup(root, 'AAA.NS', '1d')
+    assert found == dataset('AAA.NS', '1d', updated_at=5.0)
+    assert found['columns'] == ['Open', 'Close']
+
+    # Upserting again replaces the entry
+    catalog.upsert(root, dataset('AAA.NS', '1d', rows=7, last=12, end=20))
+    assert (catalog.lookup(root, 'AAA.NS', '1d')['rows'], catalog.lookup(root, 'AAA.NS', '1d')['end']) == (7, 20)
+
+    assert sorted(catalog.lookup_many(root, ['AAA.NS', 'BBB.NS', 'CCC.NS'], '1d')) == ['AAA.NS', 'BBB.NS']
+    assert [(entry['interval'], entry['ticker']) for entry in catalog.entries(root)] == \
+        [('15m', 'AAA.NS'), ('1d', 'AAA.NS'), ('1d', 'BBB.NS')]
+    assert [entry['ticker'] for entry in catalog.entries(root, '1d')] == ['AAA.NS', 'BBB.NS']
+
+    catalog.remove(root, 'AAA.NS', '1d')
+    assert catalog.lookup(root, 'AAA.NS', '1d') is None
+    assert catalog.lookup(root, 'AAA.NS', '15m') is not None
+
+
+def test_lookup_many_spans_query_chunks(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    monkeypatch.setattr(catalog, '_QUERY_CHUNK', 2)
+    tickers = [f"T{i}.NS" for i in range(5)]
+    for ticker in tickers:
+        catalog.upsert(root, dataset(ticker, '1d'))
+    assert sorted(catalog.lookup_many(root, tickers, '1d')) == tickers
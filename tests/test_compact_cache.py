@@ -0,0 +1,86 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import catalog
+from bar_store import bars_path, load_bars, save_bars, to_epoch_ns
+from compact_cache import compact_store, find_legacy_files, import_legacy
+
+
+def bars(start, periods, freq, close):
+    index = pd.date_range(start, periods=periods, freq=freq, tz='UTC')
+    values = np.full(periods, float(close))
+    return pd.DataFrame({'Open': values, 'High': values + 1, 'Low': values - 1, 'Close': values,
+                         'Volume': np.arange(periods, dtype=np.int64)}, index=index)
+
+
+def write_legacy(folder, name, tickerData):
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, name)
+    tickerData.rename_axis('Date').to_csv(path)
+    return path
+
+
+def test_find_legacy_files(tmp_path):
+    write_legacy(tmp_path / 'data', 'AAA.NS_data_20240101_20240201_1h.csv', bars('2024-01-01', 3, 'h', 1))
+    write_legacy(tmp_path / 'chart_data', 'AAA.NS_20240101_20240201.csv', bars('2024-01-01', 3, 'D', 1))
+    write_legacy(tmp_path / 'data', 'notes.csv', bars('2024-01-01', 3, 'D', 1))
+    files = find_legacy_files(str(tmp_path))
+    assert sorted(files) == [('AAA.NS', '1d'), ('AAA.NS', '1h')]
+    assert files[('AAA.NS', '1h')][0][0] == pd.Timestamp('2024-01-01')
+
+
+def test_import_keeps_stored_bars_over_legacy_ones(tmp_path):
+    root = str(tmp_path / 'cache')
+    stored = bars('2024-01-10', 10, 'D', 200)
+    save_bars('AAA.NS', '1d', stored, root=root)
+    # Two overlapping legacy files; the later one wins over the earlier, the store over both
+    files = [(pd.Timestamp('2024-01-01'), write_legacy(tmp_path / 'data', 'a.csv', bars('2024-01-01', 15, 'D', 100))),
+             (pd.Timestamp('2024-01-05'), write_legacy(tmp_path / 'data', 'b.csv', bars('2024-01-05', 8, 'D', 150)))]
+    import_legacy('AAA.NS', '1d', files, root=root)
+
+    merged = load_bars('AAA.NS', '1d', root=root)
+    assert merged.index.equals(pd.date_range('2024-01-01', periods=19, freq='D', tz='UTC'))
+    assert merged['Close'].tolist() == [100] * 4 + [150] * 5 + [200] * 10
+    dataset = catalog.lookup(root, 'AAA.NS', '1d')
+    assert (dataset['start'], dataset['end']) == (to_epoch_ns(['2024-01-01'])[0], to_epoch_ns(['2024-01-19'])[0])
+
+
+def test_import_dry_run_writes_nothing(tmp_path):
+    root = str(tmp_path / 'cache')
+    files = [(pd.Timestamp('2024-01-01'), write_legacy(tmp_path / 'data', 'a.csv', bars('2024-01-01', 5, 'D', 100)))]
+    import_legacy('AAA.NS', '1d', files, dry_run=True, root=root)
+    assert catalog.lookup(root, 'AAA.NS', '1d') is None
+
+
+def test_compact_store(tmp_path):
+    root = str(tmp_path)
+    save_bars('AAA.NS', '15m', bars('2024-01-01', 400, '15min', 10), root=root)
+    # Inside the 15m coverage, so resampling replaces it
+    save_bars('AAA.NS', '1h', bars('2024-01-01 04:00', 20, 'h', 10), root=root)
+    # Daily bars are kept even when the 15m bars cover them
+    save_bars('AAA.NS', '1d', bars('2024-01-01', 3, 'D', 10), root=root)
+    save_bars('BBB.NS', '1d', bars('2024-01-01', 5, 'D', 10), root=root)
+    save_bars('CCC.NS', '1d', bars('2024-01-01', 5, 'D', 10), root=root)
+    save_bars('DDD.NS', '1d', bars('2024-01-01', 5, 'D', 10), root=root)
+
+    np.save(os.path.join(bars_path('BBB.NS', '1d', root), 'close.npy'), np.zeros(5))
+    os.remove(os.path.join(bars_path('CCC.NS', '1d', root), 'open.npy'))
+    catalog.remove(root, 'DDD.NS', '1d')
+    unfinished = os.path.join(bars_path('AAA.NS', '15m', root), 'close.tmp.npy')
+    shutil.copy(os.path.join(bars_path('AAA.NS', '15m', root), 'close.npy'), unfinished)
+
+    compact_store(dry_run=True, root=root)
+    assert len(catalog.entries(root)) == 5 and os.path.exists(unfinished)
+
+    compact_store(root=root)
+    assert [(entry['ticker'], entry['interval']) for entry in catalog.entries(root)] == \
+        [('AAA.NS', '15m'), ('AAA.NS', '1d'), ('DDD.NS', '1d')]
+    assert not os.path.exists(bars_path('AAA.NS', '1h', root))
+    assert not os.path.exists(bars_path('BBB.NS', '1d', root))
+    assert not os.path.exists(unfinished)
+    # The uncataloged folder is registered with its first and last bar as coverage
+    dataset = catalog.lookup(root, 'DDD.NS', '1d')
+    assert (dataset['rows'], dataset['start'], dataset['end']) == \
+        (5, to_epoch_ns(['2024-01-01'])[0], to_epoch_ns(['2024-01-05'])[0])
+    assert load_bars('DDD.NS', '1d', root=root)['Close'].tolist() == [10.0] * 5
@@ -0,0 +1,47 @@
+import os
+import pandas as pd
+from confluence import ZoneIntervals, ConfluenceEngine
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def brute_force_locate(intervals, times, prices):
+    found = []
+    for t, p in zip(times, prices):
+        inside = [k for k in range(len(intervals))
+                  if intervals.start[k] <= t < intervals.end[k] and intervals.low[k] <= p <= intervals.high[k]]
+        found.append(intervals.positions[inside[0]] if inside else -1)
+    return found
+
+
+def test_locate_picks_the_earliest_starting_zone_in_force():
+    intervals = ZoneIntervals('demand', start=[30, 10, 10, 50], end=[90, 40, 60, 51],
+                              low=[1.0, 2.0, 1.5, 0.0], high=[3.0, 4.0, 2.5, 9.0], positions=[7, 3, 4, 9])
+    times = [70, 5, 20, 20, 35, 45, 50, 45, 90]
+    prices = [2.0, 2.0, 2.2, 1.5, 2.2, 3.5, 5.0, 2.2, 2.0]
+    assert intervals.locate(times, prices).tolist() == [7, -1, 3, 4, 3, -1, 9, 4, -1] == \
+        brute_force_locate(intervals, times, prices)
+
+
+def test_projected_zones_match_brute_force_and_are_known_when_used():
+    bars = pd.read_csv(os.path.join(DATA, 'detector_bars.csv'))
+    lower = bars[bars['case'] == 'walk'].drop(columns='case').reset_index(drop=True)
+    lower.index = pd.date_range('2024-01-01', periods=len(lower), freq='15min', tz='UTC')
+    higher = lower.resample('1h').agg({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'})
+
+    engine = ConfluenceEngine(window=2, candles_count=3)
+    engine.add('X.NS', '15m', lower)
+    engine.add('X.NS', '1h', higher)
+    projected = engine.project('X.NS', '1h', '15m')
+    upper = engine.detections('X.NS', '1h')
+
+    times = lower.index.as_unit('ns').asi8
+    prices = lower['Close'].to_numpy()
+    hour = pd.Timedelta('1h').value
+    for kind in ('demand', 'supply'):
+        found = projected[f"{kind}_zone"].to_numpy()
+        assert (found >= 0).any()
+        assert found.tolist() == brute_force_locate(upper[f"{kind}_intervals"], times, prices)
+        # A zone is only reported once candles_count candles after its zone candle have closed
+        used = found >= 0
+        assert (upper['timestamps'][found[used] + 3] + hour <= times[used]).all()
@@ -0,0 +1,58 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+import detection_cache
+import utils
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+def walk_bars():
+    bars = pd.read_csv(os.path.join(DATA, 'detector_bars.csv'))
+    return bars[bars['case'] == 'walk'].drop(columns='case').reset_index(drop=True)
+
+
+def test_hit_matches_fresh_detection(tmp_path):
+    tickerData = walk_bars()
+    first = detection_cache.detect(tickerData, root=str(tmp_path))
+    second = detection_cache.detect(tickerData, root=str(tmp_path))
+    major_highs, major_lows = utils.identify_major_highs_lows(tickerData)
+    assert list(second['major_lows']) == list(first['major_lows']) == list(major_lows)
+    assert list(second['demand_zones']) == list(first['demand_zones']) == \
+        list(utils.identify_demand_zones(tickerData, major_lows, 10, 1.1))
+    assert list(second['fvgs']) == list(utils.identify_fvg(tickerData))
+
+
+def test_vanished_or_truncated_entry_is_a_miss(tmp_path):
+    root = str(tmp_path)
+    detection_cache.store('ab' * 20, {'a': np.arange(3)}, root=root)
+    path = detection_cache.entry_path('ab' * 20, root)
+    with open(path, 'r+b') as f:
+        f.truncate(10)
+    assert detection_cache.load('ab' * 20, root) is None
+    os.remove(path)
+    assert detection_cache.load('ab' * 20, root) is None
+
+
+def test_evict_reclaims_orphan_files(tmp_path):
+    root = str(tmp_path)
+    detection_cache.store('cd' * 20, {'a': np.arange(3)}, root=root)
+    folder = os.path.dirname(detection_cache.entry_path('cd' * 20, root))
+    old, young = os.path.join(folder, 'ef' * 20 + '.npz'), os.path.join(folder, 'cd' * 20 + '.123.tmp.npz')
+    for path in (old, young):
+        np.savez(path, a=np.arange(3))
+    stale = time.time() - detection_cache.ORPHAN_GRACE - 1
+    os.utime(old, (stale, stale))
+    # An index row whose file is gone is dropped too
+    detection_cache.store('01' * 20, {'a': np.arange(3)}, root=root)
+    os.remove(detection_cache.entry_path('01' * 20, root))
+
+    assert detection_cache.reclaim_orphans(root) == 1
+    assert not os.path.exists(old) and os.path.exists(young)
+    assert detection_cache.load('cd' * 20, root)['a'].tolist() == [0, 1, 2]
+    conn = detection_cache.connect(root)
+    try:
+        assert [key for key, in conn.execute("SELECT key FROM entries")] == ['cd' * 20]
+    finally:
+        conn.close()
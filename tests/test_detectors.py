@@ -0,0 +1,127 @@
+import os
+import json
+import importlib.util
+import numpy as np
+import pandas as pd
+import pytest
+import backend
+import utils
+from panel import build_panel, detect_panel
+
+# Outputs of the detectors in old_scripts/utils.py as of the baseline commit, recorded on the bars in
+# data/detector_bars.csv: a random walk with 2-decimal prices, one on a 0.1 tick grid (many ties),
+# and one with a block of NaN bars and a NaN close.
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+with open(os.path.join(DATA, 'baseline_detections.json')) as f:
+    BASELINE = json.load(f)
+
+SETTINGS = [(5, 10), (2, 3)]
+
+TREND_CODES = {'u': utils.TREND_UP, 'd': utils.TREND_DOWN, 's': utils.TREND_SIDE}
+
+BACKENDS = ['numpy', pytest.param('numba', marks=pytest.mark.skipif(importlib.util.find_spec('numba') is None,
+                                                                     reason="Numba is not installed"))]
+
+
+def load_cases():
+    bars = pd.read_csv(os.path.join(DATA, 'detector_bars.csv'))
+    return {case: tickerData.drop(columns='case').reset_index(drop=True)
+            for case, tickerData in bars.groupby('case', sort=False)}
+
+
+CASES = load_cases()
+
+
+@pytest.fixture(params=BACKENDS, autouse=True)
+def kernel_backend(request):
+    previous = backend.name
+    backend.use(request.param)
+    yield request.param
+    backend.use(previous or 'auto')
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_fvgs_match_baseline(case):
+    assert [list(fvg) for fvg in utils.identify_fvg(CASES[case])] == BASELINE[case]['fvgs']
+
+
+@pytest.mark.parametrize('case', CASES)
+@pytest.mark.parametrize('window, candles_count', SETTINGS)
+def test_detectors_match_baseline(case, window, candles_count):
+    tickerData = CASES[case]
+    expected = BASELINE[case][f"window={window},candles_count={candles_count}"]
+
+    major_highs, major_lows = utils.identify_major_highs_lows(tickerData, window)
+    assert list(major_highs) == expected['major_highs']
+    assert list(major_lows) == expected['major_lows']
+
+    assert [list(bos) for bos in utils.identify_bos(tickerData, major_highs, major_lows)] == expected['bos']
+
+    trend = utils.identify_trend(tickerData, major_highs, major_lows)
+    assert trend.tolist() == [TREND_CODES[code] for code in expected['trend']]
+
+    demand_zones = utils.identify_demand_zones(tickerData, major_lows, candles_count, 1.1)
+    supply_zones = utils.identify_supply_zones(tickerData, major_highs, candles_count, 1.1)
+    assert list(demand_zones) == expected['demand_zones']
+    assert list(supply_zones) == expected['supply_zones']
+
+    closest_demand, closest_supply = utils.find_closest_zones(tickerData, demand_zones, supply_zones)
+    assert closest_demand == expected['closest_demand']
+    assert closest_supply == expected['closest_supply']
+
+
+@pytest.mark.parametrize('window, candles_count', SETTINGS)
+def test_panel_matches_per_ticker_detectors(window, candles_count):
+    frames = {case: tickerData.set_axis(pd.date_range('2024-01-01', periods=len(tickerData), freq='15min', tz='UTC'))
+              for case, tickerData in CASES.items()}
+    # A shorter ticker is right-aligned with NaN padding in the panel
+    frames['short'] = frames['walk'].iloc[-400:]
+    detections = detect_panel(build_panel(frames), window, candles_count)
+
+    for case, tickerData in frames.items():
+        major_highs, major_lows = utils.identify_major_highs_lows(tickerData, window)
+        found = detections[case]
+        assert list(found['fvgs']) == list(utils.identify_fvg(tickerData))
+        assert list(found['major_highs']) == list(major_highs)
+        assert list(found['major_lows']) == list(major_lows)
+        assert list(found['demand_zones']) == list(utils.identify_demand_zones(tickerData, major_lows, candles_count, 1.1))
+        assert list(found['supply_zones']) == list(utils.identify_supply_zones(tickerData, major_highs, candles_count, 1.1))
+        assert np.array_equal(found['demand_zones'].timestamps, tickerData.index.as_unit('ns').asi8[found['demand_zones'].positions])
+
+
+def test_panel_aligns_rows_by_position():
+    walk = CASES['walk'].set_axis(pd.date_range('2024-01-01', periods=len(CASES['walk']), freq='D', tz='UTC'))
+    # The same bars without three sessions in the middle, and a ticker that stopped trading early
+    frames = {'walk': walk, 'gap': walk.drop(walk.index[500:503]), 'halted': walk.iloc[:-50]}
+    panel = build_panel(frames)
+    rows = [panel.rows[ticker] for ticker in frames]
+
+    assert panel.start.tolist() == [0, 3, 50]
+    assert panel.valid[rows].sum(axis=1).tolist() == [len(tickerData) for tickerData in frames.values()]
+    # Every row ends in the last column, whatever the date of its last bar
+    assert panel.timestamps[rows[2], -1] == walk.index[-51].value
+    # Before its gap the gapped ticker is three columns to the right of the same sessions of the others
+    assert np.array_equal(panel.timestamps[rows[1], 3:503], panel.timestamps[rows[0], :500])
+    assert np.array_equal(panel.timestamps[rows[1], 503:], panel.timestamps[rows[0], 503:])
+
+    detections = detect_panel(panel)
+    for ticker, tickerData in frames.items():
+        assert panel.frame(ticker).equals(tickerData[list(panel.frame(ticker).columns)])
+        major_highs, major_lows = utils.identify_major_highs_lows(tickerData)
+        assert list(detections[ticker]['major_lows']) == list(major_lows)
+        assert np.array_equal(detections[ticker]['major_lows'].timestamps, major_lows.timestamps)
+        assert list(detections[ticker]['demand_zones']) == list(utils.identify_demand_zones(tickerData, major_lows, 10, 1.1))
+        assert list(detections[ticker]['supply_zones']) == list(utils.identify_supply_zones(tickerData, major_highs, 10, 1.1))
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_shared_candle_classification(case):
+    tickerData = CASES[case]
+    candles = utils.classify_candles(tickerData)
+    major_highs, major_lows = utils.identify_major_highs_lows(tickerData)
+    assert list(utils.identify_fvg(tickerData, candles)) == list(utils.identify_fvg(tickerData))
+    assert list(utils.identify_demand_zones(tickerData, major_lows, 10, 1.1, candles=candles)) == \
+        list(utils.identify_demand_zones(tickerData, major_lows, 10, 1.1))
+    assert list(utils.identify_supply_zones(tickerData, major_highs, 10, 1.1, candles=candles)) == \
+        list(utils.identify_supply_zones(tickerData, major_highs, 10, 1.1))
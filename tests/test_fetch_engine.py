@@ -0,0 +1,54 @@
+import pandas as pd
+from bar_store import load_meta
+from fetch_engine import FetchEngine, StubProvider
+from market_data import get_many_bars
+
+START = pd.Timestamp.now().normalize() - pd.Timedelta(days=400)
+END = START + pd.Timedelta(days=30)
+
+
+def engine_for(provider, retries=2):
+    return FetchEngine(provider, rate=0, retries=retries, backoff=0.0)
+
+
+def test_failed_tickers_are_retried_alone():
+    provider = StubProvider(fail_tickers={'BBB.NS': 1})
+    stored = {}
+    report = engine_for(provider).run([(['AAA.NS', 'BBB.NS'], START, END)], '1d',
+                                      lambda ticker, tickerData, start, end: stored.update({ticker: tickerData}))
+    assert sorted(report.succeeded) == ['AAA.NS', 'BBB.NS'] and not report.failures
+    assert [tickers for tickers, *_ in provider.calls] == [['AAA.NS', 'BBB.NS'], ['BBB.NS']]
+    assert report.requests == 2
+
+
+def test_persistent_failures_are_reported():
+    provider = StubProvider(fail_tickers={'BBB.NS': None})
+    report = engine_for(provider, retries=1).run([(['AAA.NS', 'BBB.NS'], START, END)], '1d', lambda *args: None)
+    assert report.succeeded == ['AAA.NS']
+    assert list(report.failures) == ['BBB.NS']
+
+
+def test_provider_exceptions_fail_the_whole_request():
+    provider = StubProvider(error_rate=1.0)
+    report = engine_for(provider, retries=1).run([(['AAA.NS', 'BBB.NS'], START, END)], '1d', lambda *args: None)
+    assert not report.succeeded
+    assert sorted(report.failures) == ['AAA.NS', 'BBB.NS']
+    assert len(provider.calls) == 2
+
+
+def test_universe_is_batched_and_failures_keep_coverage(tmp_path):
+    root = str(tmp_path)
+    tickers = [f"T{i}.NS" for i in range(7)]
+    provider = StubProvider(fail_tickers={'T3.NS': None})
+    frames = get_many_bars(tickers, '1d', START, END, chunk_size=3, engine=engine_for(provider, retries=0), root=root)
+
+    assert len(provider.calls) == 3
+    assert all(len(tickers_called) <= 3 for tickers_called, *_ in provider.calls)
+    assert frames['T3.NS'].empty and load_meta('T3.NS', '1d', root) is None
+    assert all(len(frames[ticker]) == len(StubProvider.bars(ticker, START, END, '1d')) for ticker in tickers if ticker != 'T3.NS')
+
+    # The failed ticker is the only one requested again
+    provider.fail_tickers.clear()
+    frames = get_many_bars(tickers, '1d', START, END, chunk_size=3, engine=engine_for(provider, retries=0), root=root)
+    assert [tickers_called for tickers_called, *_ in provider.calls[3:]] == [['T3.NS']]
+    assert not frames['T3.NS'].empty
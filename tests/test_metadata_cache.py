@@ -0,0 +1,74 @@
+import time
+import pytest
+from fetch_engine import FetchEngine
+from metadata_cache import connect, get_fields
+
+
+class InfoStub:
+    """Serves the queued .info dicts of each ticker, one per call."""
+
+    def __init__(self, infos):
+        self.infos = {ticker: list(queue) for ticker, queue in infos.items()}
+        self.calls = 0
+
+    def download(self, tickers, start, end, interval):
+        self.calls += 1
+        return {ticker: self.infos[ticker].pop(0) for ticker in tickers}, {}
+
+
+def run(root, infos, ttl=None, provider=None):
+    engine = FetchEngine(provider or InfoStub(infos), rate=0, retries=0)
+    return get_fields(list(infos), ['marketCap', 'sector'], ttl=ttl, engine=engine, root=str(root))
+
+
+def test_partial_info_keeps_the_last_known_value(tmp_path):
+    assert run(tmp_path, {'AAA.NS': [{'marketCap': 100, 'sector': 'Energy'}]}) == \
+        {'AAA.NS': {'marketCap': 100, 'sector': 'Energy'}}
+    # A throttled call answers without marketCap and with a null sector
+    fields = run(tmp_path, {'AAA.NS': [{'sector': None}]}, ttl={'marketCap': 0, 'sector': 0})
+    assert fields == {'AAA.NS': {'marketCap': 100, 'sector': 'Energy'}}
+
+
+def test_field_never_known_is_not_requested_again(tmp_path):
+    assert run(tmp_path, {'AAA.NS': [{'sector': 'Energy'}]}) == {'AAA.NS': {'marketCap': None, 'sector': 'Energy'}}
+    # The stored None is fresh, so nothing is downloaded
+    provider = InfoStub({'AAA.NS': []})
+    assert run(tmp_path, {'AAA.NS': []}, provider=provider) == {'AAA.NS': {'marketCap': None, 'sector': 'Energy'}}
+    assert provider.calls == 0
+    # Once the TTL expires a real value replaces it
+    assert run(tmp_path, {'AAA.NS': [{'marketCap': 5}]}, ttl={'marketCap': 0})['AAA.NS']['marketCap'] == 5
+
+
+@pytest.mark.parametrize('info', [{}, {'marketCap': None}])
+def test_missing_or_null_field_reads_as_none(tmp_path, info):
+    assert run(tmp_path, {'AAA.NS': [info]})['AAA.NS']['marketCap'] is None
+
+
+def test_expired_missing_field_is_fresh_again_after_a_refresh(tmp_path):
+    run(tmp_path, {'AAA.NS': [{'sector': 'Energy'}]})
+    conn = connect(str(tmp_path))
+    with conn:
+        conn.execute("UPDATE fundamentals SET fetched_at = ?", (time.time() - 2 * 24 * 3600,))
+    conn.close()
+
+    # marketCap expired and the refresh still has none; its None must count as fresh afterwards
+    provider = InfoStub({'AAA.NS': [{'sector': 'Energy'}]})
+    assert run(tmp_path, {'AAA.NS': []}, provider=provider) == {'AAA.NS': {'marketCap': None, 'sector': 'Energy'}}
+    assert provider.calls == 1
+    for _ in range(3):
+        provider = InfoStub({'AAA.NS': []})
+        run(tmp_path, {'AAA.NS': []}, provider=provider)
+        assert provider.calls == 0
+
+
+def test_expired_field_missing_from_partial_info_keeps_its_value(tmp_path):
+    run(tmp_path, {'AAA.NS': [{'marketCap': 100, 'sector': 'Energy'}]})
+    conn = connect(str(tmp_path))
+    with conn:
+        conn.execute("UPDATE fundamentals SET fetched_at = ?", (time.time() - 2 * 24 * 3600,))
+    conn.close()
+
+    run(tmp_path, {'AAA.NS': [{'sector': 'Energy'}]})
+    provider = InfoStub({'AAA.NS': []})
+    assert run(tmp_path, {'AAA.NS': []}, provider=provider) == {'AAA.NS': {'marketCap': 100, 'sector': 'Energy'}}
+    assert provider.calls == 0
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+from bar_store import save_bars, to_epoch_ns
+from fetch_engine import StubProvider
+from market_data import load_window
+from resample import bar_labels, can_resample, interval_to_ns, resample_arrays
+
+# Two sessions and a weekend: Friday 2024-03-01 and Monday 2024-03-04
+START, END = pd.Timestamp('2024-03-01', tz='Asia/Kolkata'), pd.Timestamp('2024-03-05', tz='Asia/Kolkata')
+
+
+def stub_arrays(interval='15m'):
+    tickerData = StubProvider.bars('AAA.NS', START, END, interval)
+    arrays = {column: tickerData[column].to_numpy(copy=True) for column in tickerData.columns}
+    arrays['timestamp'] = to_epoch_ns(tickerData.index)
+    return tickerData, arrays
+
+
+def ist(values):
+    return pd.DatetimeIndex(pd.to_datetime(values, unit='ns', utc=True)).tz_convert('Asia/Kolkata')
+
+
+def test_interval_arithmetic():
+    assert interval_to_ns('15m') == pd.Timedelta(minutes=15).value
+    assert can_resample('15m', '1h') and can_resample('15m', '75m') and can_resample('1h', '1d')
+    assert not can_resample('15m', '20m') and not can_resample('1h', '15m') and not can_resample('1d', '1wk')
+    assert not can_resample('1d', '5d')
+
+
+def test_hourly_bars_are_anchored_at_the_session_open():
+    tickerData, arrays = stub_arrays()
+    assert ist(arrays['timestamp'])[[0, -1]].strftime('%H:%M').tolist() == ['09:15', '15:15']
+    hourly = resample_arrays(arrays, '1h')
+    labels = ist(hourly['timestamp'])
+    session = ['09:15', '10:15', '11:15', '12:15', '13:15', '14:15', '15:15']
+    assert labels.strftime('%H:%M').tolist() == session * 2
+    assert sorted(set(labels.strftime('%Y-%m-%d'))) == ['2024-03-01', '2024-03-04']
+
+    # Each hour aggregates its 15m bars; the 15:15 bar only has the session's last bar
+    groups = tickerData.groupby(bar_labels(arrays['timestamp'], '1h'))
+    assert groups.size().tolist() == [4] * 6 + [1] + [4] * 6 + [1]
+    assert np.array_equal(hourly['Open'], groups['Open'].first().to_numpy())
+    assert np.array_equal(hourly['High'], groups['High'].max().to_numpy())
+    assert np.array_equal(hourly['Low'], groups['Low'].min().to_numpy())
+    assert np.array_equal(hourly['Close'], groups['Close'].last().to_numpy())
+    assert np.array_equal(hourly['Adj Close'], groups['Adj Close'].last().to_numpy())
+    assert np.array_equal(hourly['Volume'], groups['Volume'].sum().to_numpy())
+
+
+def test_75m_bars_split_the_session_evenly():
+    _, arrays = stub_arrays()
+    labels = ist(resample_arrays(arrays, '75m')['timestamp'])
+    assert labels.strftime('%H:%M').tolist()[:5] == ['09:15', '10:30', '11:45', '13:00', '14:15']
+
+
+def test_daily_bars_are_labelled_with_the_trading_date():
+    tickerData, arrays = stub_arrays()
+    daily = resample_arrays(arrays, '1d')
+    # The IST date at 00:00 UTC, as daily bars are kept in the bar store
+    assert daily['timestamp'].tolist() == to_epoch_ns(['2024-03-01', '2024-03-04']).tolist()
+    for day, (_, session) in enumerate(tickerData.groupby(tickerData.index.tz_convert('Asia/Kolkata').date)):
+        assert daily['Open'][day] == session['Open'].iloc[0]
+        assert daily['High'][day] == session['High'].max()
+        assert daily['Low'][day] == session['Low'].min()
+        assert daily['Close'][day] == session['Close'].iloc[-1]
+        assert daily['Volume'][day] == session['Volume'].sum()
+
+
+def test_nan_bars_are_ignored_by_high_and_low():
+    _, arrays = stub_arrays()
+    arrays['High'][1] = arrays['Low'][1] = np.nan
+    hourly = resample_arrays(arrays, '1h')
+    assert hourly['High'][0] == np.nanmax(arrays['High'][:4])
+    assert hourly['Low'][0] == np.nanmin(arrays['Low'][:4])
+
+
+def test_empty_arrays():
+    _, arrays = stub_arrays()
+    empty = resample_arrays({column: values[:0] for column, values in arrays.items()}, '1h')
+    assert all(len(values) == 0 for values in empty.values())
+
+
+@pytest.mark.parametrize('interval', ['30m', '1h'])
+def test_resampled_15m_bars_match_the_stub_labels(interval):
+    # The stub's own bars of an interval start where the resampled ones do
+    _, arrays = stub_arrays()
+    _, native = stub_arrays(interval)
+    assert resample_arrays(arrays, interval)['timestamp'].tolist() == native['timestamp'].tolist()
+
+
+def test_load_window_resamples_stored_15m_bars(tmp_path):
+    tickerData, _ = stub_arrays()
+    save_bars('AAA.NS', '15m', tickerData, root=str(tmp_path))
+
+    daily = load_window('AAA.NS', '1d', '15m', START, END, root=str(tmp_path))
+    assert daily.index.equals(pd.DatetimeIndex(['2024-03-01', '2024-03-04']).tz_localize('Asia/Kolkata'))
+    hourly = load_window('AAA.NS', '1h', '15m', START, END, root=str(tmp_path))
+    assert hourly.index[0] == pd.Timestamp('2024-03-01 09:15', tz='Asia/Kolkata')
+    assert hourly.index[6] == pd.Timestamp('2024-03-01 15:15', tz='Asia/Kolkata')
+    assert hourly['Volume'].sum() == tickerData['Volume'].sum()
@@ -0,0 +1,72 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import utils
+from streaming import StreamingDetector
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# Every prefix of the first PREFIX_BARS bars of each case is checked; the gaps case has its NaN
+# block at bars 300-319
+PREFIX_BARS = 400
+
+
+def load_cases():
+    bars = pd.read_csv(os.path.join(DATA, 'detector_bars.csv'))
+    cases = {}
+    for case, tickerData in bars.groupby('case', sort=False):
+        tickerData = tickerData.drop(columns='case').reset_index(drop=True)
+        tickerData.index = pd.date_range('2024-01-01', periods=len(tickerData), freq='15min', tz='UTC')
+        cases[case] = tickerData
+    return cases
+
+
+CASES = load_cases()
+
+
+def assert_matches_full_recompute(detector, tickerData, window, candles_count):
+    major_highs, major_lows = utils.identify_major_highs_lows(tickerData, window)
+    streamed_highs, streamed_lows = detector.pivots()
+    assert list(streamed_highs) == list(major_highs)
+    assert list(streamed_lows) == list(major_lows)
+    assert np.array_equal(streamed_highs.timestamps, major_highs.timestamps)
+    assert list(detector.fvgs()) == list(utils.identify_fvg(tickerData))
+
+    for kind, pivots, identify, history in (
+            ('demand', major_lows, utils.identify_demand_zones, utils.identify_demand_zone_history),
+            ('supply', major_highs, utils.identify_supply_zones, utils.identify_supply_zone_history)):
+        assert list(detector.zones(kind)) == list(identify(tickerData, pivots, candles_count, 1.1))
+        streamed, full = detector.zone_history(kind), history(tickerData, pivots, candles_count, 1.1)
+        assert list(streamed) == list(full)
+        assert np.array_equal(streamed.invalidated_at, full.invalidated_at)
+        assert np.array_equal(streamed.timestamps, full.timestamps)
+
+
+@pytest.mark.parametrize('case', CASES)
+@pytest.mark.parametrize('window, candles_count', [(5, 10), (2, 3)])
+def test_every_prefix_matches_full_recompute(case, window, candles_count):
+    tickerData = CASES[case].iloc[:PREFIX_BARS]
+    detector = StreamingDetector(window, candles_count)
+    for n in range(1, len(tickerData) + 1):
+        detector.extend(tickerData.iloc[n - 1:n])
+        assert_matches_full_recompute(detector, tickerData.iloc[:n], window, candles_count)
+
+
+@pytest.mark.parametrize('case', CASES)
+def test_whole_series_matches_full_recompute(case):
+    detector = StreamingDetector.from_frame(CASES[case])
+    assert_matches_full_recompute(detector, CASES[case], 5, 10)
+
+
+def test_events_report_what_each_bar_settled():
+    tickerData = CASES['walk']
+    detector = StreamingDetector()
+    events = detector.extend(tickerData)
+    major_highs, major_lows = detector.pivots()
+    assert [position for event, kind, position in events if event == 'pivot' and kind == 'low'] == list(major_lows)
+    assert sorted(position for event, _, position in events if event == 'fvg') == sorted(detector.fvgs().start.tolist())
+    # Every zone reported as new is either still valid or reported as invalidated later
+    found = {position for event, kind, position in events if event == 'zone' and kind == 'demand'}
+    invalidated = {position for event, kind, position in events if event == 'invalidated' and kind == 'demand'}
+    assert set(detector.zones('demand').positions.tolist()) == found - invalidated
@@ -0,0 +1,78 @@
+import os
+import pandas as pd
+import pytest
+import backtest
+import utils
+from sweep import DEFAULT_PARAMETERS, parameter_grid, sweep
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+GRID = parameter_grid(window=[2, 5], candles_count=[3, 10])
+
+
+def load_cases():
+    bars = pd.read_csv(os.path.join(DATA, 'detector_bars.csv'))
+    return {case: tickerData.drop(columns='case').reset_index(drop=True)
+            for case, tickerData in bars.groupby('case', sort=False)}
+
+
+CASES = load_cases()
+
+
+def direct_scan(tickerData, parameters):
+    """The scan of long_nse200_1d_180.py with the cell's settings, from the utils detectors."""
+    major_highs, major_lows = utils.identify_major_highs_lows(tickerData, parameters['window'])
+    demand = utils.identify_demand_zones(tickerData, major_lows, parameters['candles_count'], 1.1)
+    supply = utils.identify_supply_zones(tickerData, major_highs, parameters['candles_count'], 1.1)
+    closest_demand, closest_supply = utils.find_closest_zones(tickerData, demand, supply)
+    high, low = tickerData['High'].to_numpy(), tickerData['Low'].to_numpy()
+    demand_met = (closest_demand is not None
+                  and high[closest_demand] < low[-1] <= high[closest_demand] * parameters['demand_proximity'])
+    supply_met = closest_supply is not None and high[-1] < low[closest_supply] * parameters['supply_proximity']
+    return {
+        'major_highs': len(major_highs), 'major_lows': len(major_lows),
+        'demand_zones': len(demand), 'supply_zones': len(supply),
+        'closest_demand': -1 if closest_demand is None else closest_demand,
+        'closest_supply': -1 if closest_supply is None else closest_supply,
+        'demand_met': bool(demand_met), 'supply_met': bool(supply_met),
+        'signal': bool(demand_met and supply_met),
+    }
+
+
+def test_parameter_grid():
+    assert len(GRID) == 4
+    assert GRID[1] == dict(DEFAULT_PARAMETERS, window=2, candles_count=10)
+    with pytest.raises(ValueError):
+        parameter_grid(windows=[3])
+
+
+def test_sweep_matches_direct_detector_runs():
+    results = sweep(CASES, GRID, processes=1)
+    assert len(results) == len(CASES) * len(GRID)
+    for row in results.to_dict('records'):
+        parameters = {name: row[name] for name in DEFAULT_PARAMETERS}
+        expected = direct_scan(CASES[row['ticker']], parameters)
+        assert {name: row[name] for name in expected} == expected, (row['ticker'], parameters)
+
+
+def test_sweep_of_prefixes_matches_backtest_signals():
+    tickerData = CASES['walk'].iloc[:400]
+    grid = parameter_grid(window=[2], candles_count=[3], demand_proximity=[1.05])
+    prefixes = {t: tickerData.iloc[:t + 1] for t in range(40, len(tickerData), 3)}
+    results = sweep(prefixes, grid, processes=1).set_index('ticker')
+    signals = backtest.scan_signals(tickerData, window=2, candles_count=3, demand_proximity=1.05,
+                                    supply_proximity=DEFAULT_PARAMETERS['supply_proximity'])
+    assert results['demand_met'].any()
+    for t in prefixes:
+        for column in ('closest_demand', 'closest_supply', 'demand_met', 'supply_met', 'signal'):
+            assert results.at[t, column] == signals[column].iat[t], (t, column)
+
+
+def test_process_pool_gives_the_same_results():
+    grid = parameter_grid(window=[2, 5], boring_ratio=[0.4, 0.5])
+    frames = {case: tickerData.iloc[:300] for case, tickerData in CASES.items()}
+    in_process = sweep(frames, grid, processes=1)
+    pooled = sweep(frames, grid, processes=2)
+    key = ['ticker', 'window', 'boring_ratio']
+    pd.testing.assert_frame_equal(pooled.sort_values(key).reset_index(drop=True),
+                                  in_process.sort_values(key).reset_index(drop=True))
@@ -0,0 +1,95 @@
+import os
+import pandas as pd
+import pytest
+import walk_forward
+from bar_store import save_bars
+from walk_forward import evaluate_fold, make_folds, rule_grid
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# A loose supply rule so every rule set trades on the walk case
+GRID = rule_grid(window=[2, 5], candles_count=[3, 10], supply_proximity=[1.0])
+
+
+def ist(day):
+    """Daily bars are labelled with midnight IST of their date, so fold dates are given in IST."""
+    return pd.Timestamp(day, tz='Asia/Kolkata')
+
+
+@pytest.fixture
+def root(tmp_path):
+    """A bar store with the walk case of detector_bars.csv as daily bars of X.NS from 2020-01-01."""
+    bars = pd.read_csv(os.path.join(DATA, 'detector_bars.csv'))
+    tickerData = bars[bars['case'] == 'walk'].drop(columns='case').reset_index(drop=True)
+    tickerData.index = pd.date_range('2020-01-01', periods=len(tickerData), freq='D', tz='UTC')
+    save_bars('X.NS', '1d', tickerData, root=str(tmp_path))
+    return str(tmp_path)
+
+
+def test_folds_are_ordered_and_train_and_test_windows_do_not_overlap():
+    folds = make_folds('2020-01-01', '2021-01-01', train=pd.Timedelta(days=120), test=pd.Timedelta(days=30))
+    assert len(folds) == 8
+    assert folds[0] == (pd.Timestamp('2020-01-01'), pd.Timestamp('2020-04-30'), pd.Timestamp('2020-05-30'))
+    for train_start, test_start, test_end in folds:
+        assert test_start - train_start == pd.Timedelta(days=120) and test_end - test_start == pd.Timedelta(days=30)
+    assert folds[-1][2] <= pd.Timestamp('2021-01-01')
+    # By default the test windows follow each other
+    for (_, _, previous_end), (_, test_start, _) in zip(folds, folds[1:]):
+        assert test_start == previous_end
+
+
+def test_folds_with_a_step():
+    folds = make_folds('2020-01-01', '2020-12-31', train='90D', test='30D', step='60D')
+    assert [train_start for train_start, _, _ in folds] == list(pd.date_range('2020-01-01', periods=len(folds), freq='60D'))
+    assert make_folds('2020-01-01', '2020-03-01', train='90D', test='30D') == []
+
+
+def test_rules_are_chosen_in_sample_and_applied_out_of_sample(root, monkeypatch):
+    dates = (ist('2020-06-01'), ist('2021-06-01'), ist('2021-10-01'))
+    calls = []
+    backtest = walk_forward.backtest
+
+    def recording_backtest(tickerData, ticker=None, **rules):
+        calls.append((tickerData.index[0], tickerData.index[-1], rules))
+        return backtest(tickerData, ticker, **rules)
+
+    monkeypatch.setattr(walk_forward, 'backtest', recording_backtest)
+    row, trades = evaluate_fold('X.NS', '1d', '1d', 3, dates, GRID, root=root)
+    assert row['selected']
+
+    # Every rule set is tried on the train window only, then the chosen one runs once over train + test
+    train_calls, test_call = calls[:-1], calls[-1]
+    assert [rules for _, _, rules in train_calls] == GRID
+    assert all(first >= dates[0] and last < dates[1] for first, last, _ in train_calls)
+    assert test_call[0] >= dates[0] and dates[1] <= test_call[1] < dates[2]
+    chosen = test_call[2]
+    assert {name: row[name] for name in chosen} == chosen
+
+    # The chosen rules have the best train total return
+    train_returns = {}
+    for rules in GRID:
+        train_trades = backtest(walk_forward.load_window('X.NS', '1d', '1d', dates[0], dates[1], root), **rules)
+        closed = train_trades[train_trades['exit_reason'] != 'open']
+        if len(closed):
+            train_returns[GRID.index(rules)] = walk_forward.trade_stats(closed)['total_return']
+    assert GRID.index(chosen) == max(train_returns, key=train_returns.get)
+    assert row['train_total_return'] == train_returns[GRID.index(chosen)]
+
+    # Only trades signalled in the test window are kept
+    assert len(trades) and (trades['fold'] == 3).all()
+    assert ((trades['signal_time'] >= dates[1]) & (trades['signal_time'] < dates[2])).all()
+
+
+def test_test_bars_do_not_change_the_selection(root):
+    dates = (ist('2020-06-01'), ist('2021-06-01'), ist('2021-10-01'))
+    row, _ = evaluate_fold('X.NS', '1d', '1d', 0, dates, GRID, root=root)
+    shorter = (dates[0], dates[1], ist('2021-07-01'))
+    other, _ = evaluate_fold('X.NS', '1d', '1d', 0, shorter, GRID, root=root)
+    assert {name: other[name] for name in GRID[0]} == {name: row[name] for name in GRID[0]}
+    assert other['train_total_return'] == row['train_total_return']
+
+
+def test_fold_without_test_bars_is_not_selected(root):
+    dates = (ist('2023-01-01'), ist('2024-01-01'), ist('2024-06-01'))
+    row, trades = evaluate_fold('X.NS', '1d', '1d', 0, dates, GRID, root=root)
+    assert not row['selected'] and trades is None
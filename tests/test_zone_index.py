@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import utils
+from backtest import _closest
+from zone_index import ZoneIndex
+
+
+def test_nan_price_matches_no_zone():
+    index = ZoneIndex([10.0, 12.0, np.nan, 11.0], [3, 7, 8, 9])
+    assert index.nearest(11.4) == 9
+    assert index.nearest(np.nan) is None
+    assert index.nearest_below(np.nan) is None
+    assert index.nearest_above(np.nan) is None
+    assert index.within(np.nan, 5) == []
+
+
+def test_find_closest_zones_with_nan_last_close():
+    tickerData = pd.DataFrame({'Open': [10.0, 11.0, 12.0], 'High': [10.5, 11.5, 12.5],
+                               'Low': [9.5, 10.5, 11.5], 'Close': [10.2, 11.2, np.nan]})
+    assert utils.find_closest_zones(tickerData, [0], [1]) == (None, None)
+    assert utils.find_closest_zones(tickerData.iloc[:2], [0], [1]) == (0, 1)
+
+
+def test_closest_skips_bars_with_nan_close():
+    positions = np.array([0, 1])
+    prices = np.array([10.0, 12.0])
+    known_at = np.array([0, 0])
+    invalidated_at = np.array([4, 4])
+    close = np.array([10.4, np.nan, 11.8, np.nan])
+    assert _closest(positions, prices, known_at, invalidated_at, close).tolist() == [0, -1, 1, -1]
@@ -0,0 +1,35 @@
+import json
+import zone_trace
+
+
+def test_per_ticker_files_are_closed_when_the_ticker_changes(tmp_path):
+    zone_trace.enable(str(tmp_path / '{ticker}.jsonl'))
+    try:
+        for i in range(50):
+            zone_trace.set_ticker(f"T{i}.NS")
+            zone_trace.emit('zone', pos=i)
+            assert len(zone_trace._files) == 1
+        # Coming back to a ticker appends to its file
+        zone_trace.set_ticker('T0.NS')
+        zone_trace.emit('zone', pos=100)
+    finally:
+        zone_trace.disable()
+        zone_trace.set_ticker(None)
+
+    assert len(list(tmp_path.iterdir())) == 50
+    with open(tmp_path / 'T0.NS.jsonl') as f:
+        assert [json.loads(line)['pos'] for line in f] == [0, 100]
+
+
+def test_single_file_stays_open_across_tickers(tmp_path):
+    zone_trace.enable(str(tmp_path / 'trace.jsonl'), tickers=['A.NS', 'B.NS'])
+    try:
+        for ticker in ('A.NS', 'C.NS', 'B.NS'):
+            zone_trace.set_ticker(ticker)
+            zone_trace.emit('zone', pos=1)
+    finally:
+        zone_trace.disable()
+        zone_trace.set_ticker(None)
+
+    with open(tmp_path / 'trace.jsonl') as f:
+        assert [json.loads(line)['ticker'] for line in f] == ['A.NS', 'B.NS']